@@ -1,9 +1,21 @@
-import requests
+import hashlib
 import json
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List, Optional
 import os
 from dotenv import load_dotenv
 import streamlit as st
+from ats_rules import default_ats_engine
+from http_client import HttpClient, default_http_client
+from metrics import timed
+from provider_cache import ProviderCache, default_provider_cache
+from skill_matcher import default_taxonomy
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 load_dotenv()
 
@@ -21,14 +33,39 @@ def get_api_key(key_name: str) -> str:
 class CompanyResearcher:
     """Advanced company research using multiple data sources"""
     
-    def __init__(self):
-        self.news_api_key = get_api_key('NEWS_API_KEY')
-        self.serpapi_key = get_api_key('SERP_API_KEY')
-        self.alpha_vantage_key = get_api_key('ALPHA_VANTAGE_API_KEY')
-        self.finnhub_key = get_api_key('FINNHUB_API_KEY')
-        
+    def __init__(self, http: Optional[HttpClient] = None, cache: Optional[ProviderCache] = None):
+        self.http = http or default_http_client
+        self.cache = cache or default_provider_cache
+    
+    # Keys are read per request rather than at construction, since one instance
+    # is shared by every session for the life of the process
+    @property
+    def news_api_key(self) -> str:
+        return get_api_key('NEWS_API_KEY')
+    
+    @property
+    def serpapi_key(self) -> str:
+        return get_api_key('SERP_API_KEY')
+    
+    @property
+    def alpha_vantage_key(self) -> str:
+        return get_api_key('ALPHA_VANTAGE_API_KEY')
+    
+    @property
+    def finnhub_key(self) -> str:
+        return get_api_key('FINNHUB_API_KEY')
+    
     def get_company_news(self, company_name: str, days: int = 30) -> List[Dict]:
         """Get recent news about the company using News API"""
+        news = self._fetch_company_news(company_name)
+        return news if news is not None else self._mock_news_data(company_name)
+    
+    def _fetch_company_news(self, company_name: str) -> Optional[List[Dict]]:
+        """Cached News API lookup; None when the API is unavailable or fails"""
+        return self.cache.get_or_fetch('news', (company_name,), lambda: self._request_company_news(company_name))
+    
+    def _request_company_news(self, company_name: str) -> Optional[List[Dict]]:
+        """News API request"""
         try:
             if self.news_api_key and self.news_api_key != 'your_news_api_key_here':
                 url = "https://newsapi.org/v2/everything"
@@ -40,7 +77,7 @@ class CompanyResearcher:
                     'apiKey': self.news_api_key
                 }
                 
-                response = requests.get(url, params=params, timeout=15)
+                response = self.http.get('newsapi', url, params=params)
                 if response.status_code == 200:
                     articles = response.json().get('articles', [])
                     return [
@@ -58,10 +95,19 @@ class CompanyResearcher:
         except Exception as e:
             print(f"News API error: {e}")
         
-        return self._mock_news_data(company_name)
+        return None
     
     def get_company_financial_data(self, symbol: str) -> Dict:
         """Get company financial data using Alpha Vantage API"""
+        financial_data = self._fetch_financial_data(symbol)
+        return financial_data if financial_data is not None else self._mock_financial_data()
+    
+    def _fetch_financial_data(self, symbol: str) -> Optional[Dict]:
+        """Cached Alpha Vantage OVERVIEW lookup; None when the API is unavailable or fails"""
+        return self.cache.get_or_fetch('financial_data', (symbol,), lambda: self._request_financial_data(symbol))
+    
+    def _request_financial_data(self, symbol: str) -> Optional[Dict]:
+        """Alpha Vantage OVERVIEW request"""
         try:
             if self.alpha_vantage_key and self.alpha_vantage_key != 'your_alpha_vantage_key_here':
                 url = "https://www.alphavantage.co/query"
@@ -71,7 +117,7 @@ class CompanyResearcher:
                     'apikey': self.alpha_vantage_key
                 }
                 
-                response = requests.get(url, params=params, timeout=15)
+                response = self.http.get('alphavantage', url, params=params)
                 if response.status_code == 200:
                     data = response.json()
                     if 'Symbol' in data:  # Valid response
@@ -86,14 +132,15 @@ class CompanyResearcher:
         except Exception as e:
             print(f"Financial API error: {e}")
         
-        return {
-            'market_cap': 'Data not available',
-            'sector': 'Technology/Services',
-            'growth_status': 'Stable/Growing'
-        }
+        return None
     
     def get_market_sentiment(self, company_name: str) -> Dict:
         """Get market sentiment using SERP API for search trends"""
+        sentiment = self._fetch_market_sentiment(company_name)
+        return sentiment if sentiment is not None else self._mock_market_sentiment()
+    
+    def _fetch_market_sentiment(self, company_name: str) -> Optional[Dict]:
+        """SERP API sentiment; None when the API is unavailable or fails"""
         try:
             if self.serpapi_key and self.serpapi_key != 'your_serp_api_key_here':
                 # Note: This is a simplified example - SERP API has different endpoints
@@ -106,11 +153,7 @@ class CompanyResearcher:
         except Exception as e:
             print(f"SERP API error: {e}")
         
-        return {
-            'sentiment': 'Neutral',
-            'trend': 'Stable',
-            'market_interest': 'Moderate'
-        }
+        return None
     
     def _mock_news_data(self, company_name: str) -> List[Dict]:
         """Mock news data when API not available"""
@@ -120,10 +163,56 @@ class CompanyResearcher:
             {'title': f'{company_name} hiring initiative launched', 'description': 'Company plans to hire 1000+ employees'},
         ]
     
-    def get_company_info(self, company_name: str) -> Dict:
-        """Get comprehensive company information with real data"""
-        news = self.get_company_news(company_name)
+    def _mock_financial_data(self) -> Dict:
+        """Placeholder financial data when API not available"""
+        return {
+            'market_cap': 'Data not available',
+            'sector': 'Technology/Services',
+            'growth_status': 'Stable/Growing'
+        }
+    
+    def _mock_market_sentiment(self) -> Dict:
+        """Neutral sentiment when API not available"""
+        return {
+            'sentiment': 'Neutral',
+            'trend': 'Stable',
+            'market_interest': 'Moderate'
+        }
+    
+    def _fetch_sources(self, fetchers: Dict, timeout: Optional[float]) -> Dict:
+        """Run provider fetchers in parallel under one deadline
+        
+        fetchers maps source name -> (fetch, args, fallback). Returns
+        {source: (data, status)} where status is 'live', 'mock' (provider
+        unavailable) or 'timeout' (missed the deadline); the last two carry
+        the fallback data.
+        """
+        executor = ThreadPoolExecutor(max_workers=max(1, len(fetchers)), thread_name_prefix="company-source")
+        try:
+            futures = {name: executor.submit(fetch, *args) for name, (fetch, args, _) in fetchers.items()}
+            wait(futures.values(), timeout=timeout)
+        finally:
+            # Stragglers finish in the background; their results are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        outcomes = {}
+        for name, future in futures.items():
+            fallback = fetchers[name][2]
+            if not future.done():
+                outcomes[name] = (fallback(), 'timeout')
+            elif future.cancelled() or future.exception() is not None or future.result() is None:
+                outcomes[name] = (fallback(), 'mock')
+            else:
+                outcomes[name] = (future.result(), 'live')
+        return outcomes
+    
+    def get_company_info(self, company_name: str, timeout: Optional[float] = 20) -> Dict:
+        """Get comprehensive company information with real data
         
+        News, financials and sentiment are fetched concurrently; whatever
+        hasn't arrived after `timeout` seconds is replaced by fallback data
+        and reported in 'sources'.
+        """
         # Try to get financial data if company has a stock symbol
         # This is simplified - in production you'd have a symbol lookup
         common_symbols = {
@@ -138,8 +227,20 @@ class CompanyResearcher:
                 symbol = stock_symbol
                 break
         
-        financial_data = self.get_company_financial_data(symbol) if symbol else {}
-        market_sentiment = self.get_market_sentiment(company_name)
+        fetchers = {
+            'news': (self._fetch_company_news, (company_name,), lambda: self._mock_news_data(company_name)),
+            'market_sentiment': (self._fetch_market_sentiment, (company_name,), self._mock_market_sentiment)
+        }
+        if symbol:
+            fetchers['financial_data'] = (self._fetch_financial_data, (symbol,), self._mock_financial_data)
+        
+        outcomes = self._fetch_sources(fetchers, timeout)
+        news = outcomes['news'][0]
+        market_sentiment = outcomes['market_sentiment'][0]
+        financial_data = outcomes['financial_data'][0] if symbol else {}
+        sources = {name: status for name, (_, status) in outcomes.items()}
+        if not symbol:
+            sources['financial_data'] = 'skipped'
         
         # Enhanced research summary
         news_count = len([n for n in news if n.get('title')])
@@ -157,18 +258,39 @@ class CompanyResearcher:
             'recent_news': news,
             'financial_data': financial_data,
             'market_sentiment': market_sentiment,
+            'sources': sources,
             'research_summary': research_summary.strip()
         }
 
 class JobMatcher:
     """Advanced job matching with skill analysis and real job data"""
     
-    def __init__(self):
-        self.adzuna_app_id = os.getenv('ADZUNA_APP_ID')
-        self.adzuna_api_key = os.getenv('ADZUNA_API_KEY')
+    def __init__(self, http: Optional[HttpClient] = None, cache: Optional[ProviderCache] = None):
+        self.http = http or default_http_client
+        self.cache = cache or default_provider_cache
+    
+    @property
+    def adzuna_app_id(self) -> str:
+        return get_api_key('ADZUNA_APP_ID')
+    
+    @property
+    def adzuna_api_key(self) -> str:
+        return get_api_key('ADZUNA_API_KEY')
     
     def get_real_job_data(self, job_title: str, location: str = "us") -> Dict:
         """Get real job market data using Adzuna API"""
+        job_data = self.cache.get_or_fetch('job_market', (job_title, location), lambda: self._request_job_data(job_title, location))
+        if job_data is not None:
+            return job_data
+        
+        return {
+            'total_jobs': 'Data not available',
+            'market_demand': 'High demand expected',
+            'salary_range': '$50,000 - $120,000 (estimated)'
+        }
+    
+    def _request_job_data(self, job_title: str, location: str) -> Optional[Dict]:
+        """Adzuna job search request; None when the API is unavailable or fails"""
         try:
             if self.adzuna_app_id and self.adzuna_api_key:
                 # Adzuna API endpoint for job search
@@ -181,7 +303,7 @@ class JobMatcher:
                     'sort_by': 'salary'
                 }
                 
-                response = requests.get(url, params=params, timeout=15)
+                response = self.http.get('adzuna', url, params=params)
                 if response.status_code == 200:
                     data = response.json()
                     jobs = data.get('results', [])
@@ -208,34 +330,17 @@ class JobMatcher:
         except Exception as e:
             print(f"Adzuna API error: {e}")
         
-        return {
-            'total_jobs': 'Data not available',
-            'market_demand': 'High demand expected',
-            'salary_range': '$50,000 - $120,000 (estimated)'
-        }
+        return None
     
     @staticmethod
     def extract_skills_from_text(text: str) -> List[str]:
         """Extract technical skills from text"""
-        common_skills = [
-            'Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'MongoDB',
-            'AWS', 'Azure', 'Docker', 'Kubernetes', 'Git', 'Machine Learning',
-            'AI', 'Deep Learning', 'TensorFlow', 'PyTorch', 'Pandas', 'NumPy',
-            'Streamlit', 'Flask', 'Django', 'FastAPI', 'REST API', 'GraphQL',
-            'HTML', 'CSS', 'Bootstrap', 'Tailwind', 'Vue.js', 'Angular',
-            'PostgreSQL', 'MySQL', 'Redis', 'Elasticsearch', 'Spark',
-            'Linux', 'Unix', 'Bash', 'PowerShell', 'CI/CD', 'Jenkins',
-            'Agile', 'Scrum', 'Project Management', 'Leadership', 'Communication'
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        
-        for skill in common_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
-        
-        return found_skills
+        return default_taxonomy.extract(text)
+    
+    @staticmethod
+    def find_skill_mentions(text: str) -> List[Dict]:
+        """Locate skill mentions with canonical names and character offsets"""
+        return default_taxonomy.find(text)
     
     @staticmethod
     def calculate_match_score(resume_skills: List[str], job_skills: List[str]) -> Dict:
@@ -243,8 +348,10 @@ class JobMatcher:
         if not job_skills:
             return {'score': 0, 'matched': [], 'missing': []}
         
-        matched_skills = list(set(resume_skills) & set(job_skills))
-        missing_skills = list(set(job_skills) - set(resume_skills))
+        # Framework experience counts toward its parent skill (Django -> Python)
+        resume_skill_set = set(default_taxonomy.expand_with_parents(resume_skills))
+        matched_skills = list(resume_skill_set & set(job_skills))
+        missing_skills = list(set(job_skills) - resume_skill_set)
         
         score = (len(matched_skills) / len(job_skills)) * 100 if job_skills else 0
         
@@ -256,29 +363,92 @@ class JobMatcher:
             'total_matched': len(matched_skills)
         }
     
-    def calculate_job_compatibility(self, resume_text: str, job_description: str) -> Dict:
-        """Calculate comprehensive job compatibility with market data"""
-        resume_skills = self.extract_skills_from_text(resume_text)
-        job_skills = self.extract_skills_from_text(job_description)
-        match_data = self.calculate_match_score(resume_skills, job_skills)
+    @staticmethod
+    def rank_resumes(resumes: Dict[str, str], jobs: Dict[str, str]) -> "pd.DataFrame":
+        """Score every resume against every job in one vectorized pass
+        
+        Skills are extracted once per document. Returns one row per
+        (job, resume) pair with the same fields as calculate_match_score,
+        in job input order and by descending score, with a per-job rank.
+        """
+        import numpy as np
+        import pandas as pd  # only batch ranking needs these; kept off the import path
+        
+        columns = ['job_id', 'resume_id', 'rank', 'score', 'total_matched', 'total_required', 'matched', 'missing']
+        if not resumes or not jobs:
+            return pd.DataFrame(columns=columns)
         
-        # Extract potential job title from job description
-        job_title = "software engineer"  # Default
+        resume_ids, job_ids = list(resumes), list(jobs)
+        job_skills = [get_document_features(jobs[job_id]).skills for job_id in job_ids]
+        resume_skills = [set(default_taxonomy.expand_with_parents(get_document_features(resumes[resume_id]).skills))
+                         for resume_id in resume_ids]
+        
+        # Only skills some job asks for affect the score, so they are the only columns
+        vocabulary = list(dict.fromkeys(skill for skills in job_skills for skill in skills))
+        column = {skill: i for i, skill in enumerate(vocabulary)}
+        
+        resume_matrix = np.zeros((len(resume_ids), len(vocabulary)), dtype=np.float32)
+        for row, skills in enumerate(resume_skills):
+            resume_matrix[row, [column[skill] for skill in skills if skill in column]] = 1
+        job_matrix = np.zeros((len(job_ids), len(vocabulary)), dtype=np.float32)
+        for row, skills in enumerate(job_skills):
+            job_matrix[row, [column[skill] for skill in skills]] = 1
+        
+        matched_counts = job_matrix @ resume_matrix.T  # jobs x resumes
+        required = job_matrix.sum(axis=1, keepdims=True)
+        scores = np.divide(matched_counts * 100, required, out=np.zeros_like(matched_counts), where=required > 0)
+        
+        rows = []
+        for j, job_id in enumerate(job_ids):
+            for r, resume_id in enumerate(resume_ids):
+                rows.append({
+                    'job_id': job_id,
+                    'resume_id': resume_id,
+                    'score': round(float(scores[j, r]), 1),
+                    'total_matched': int(matched_counts[j, r]),
+                    'total_required': len(job_skills[j]),
+                    'matched': [skill for skill in job_skills[j] if skill in resume_skills[r]],
+                    'missing': [skill for skill in job_skills[j] if skill not in resume_skills[r]]
+                })
+        
+        table = pd.DataFrame(rows)
+        job_position = {job_id: i for i, job_id in enumerate(job_ids)}
+        table = table.sort_values(
+            ['job_id', 'score'], ascending=[True, False], kind='stable',
+            key=lambda col: col.map(job_position) if col.name == 'job_id' else col
+        ).reset_index(drop=True)
+        table['rank'] = table.groupby('job_id').cumcount() + 1
+        return table[columns]
+    
+    @staticmethod
+    def extract_job_title(job_description: str) -> str:
+        """Detect a common job title in a job description"""
+        job_description_lower = job_description.lower()
         common_titles = ['software engineer', 'data scientist', 'product manager', 'developer', 'analyst']
         for title in common_titles:
-            if title in job_description.lower():
-                job_title = title
-                break
+            if title in job_description_lower:
+                return title
+        return "software engineer"  # Default
+    
+    def calculate_job_compatibility(self, resume_text: str, job_description: str, include_market_data: bool = True) -> Dict:
+        """Calculate comprehensive job compatibility with market data
+        
+        Skills and title come from the memoized document features. Pass
+        include_market_data=False when the Adzuna lookup isn't needed.
+        """
+        resume = get_document_features(resume_text)
+        job = get_document_features(job_description)
+        match_data = self.calculate_match_score(resume.skills, job.skills)
         
         # Get real market data
-        market_data = self.get_real_job_data(job_title)
+        market_data = self.get_real_job_data(job.job_title) if include_market_data else {}
         
         return {
             'score': match_data['score'],
             'matched_skills': match_data['matched'],
             'missing_skills': match_data['missing'],
             'market_data': market_data,
-            'job_title': job_title,
+            'job_title': job.job_title,
             'recommendation': self._generate_compatibility_recommendation(match_data, market_data)
         }
     
@@ -298,6 +468,12 @@ class JobMatcher:
 class InterviewPrep:
     """Advanced interview preparation system"""
     
+    # Question bank to fall back on when a JD names no title but its skills lean one way
+    CATEGORY_ROLES = {
+        'Data & ML': 'data scientist',
+        'Methodologies': 'product manager'
+    }
+    
     @staticmethod
     def generate_questions_by_role(role: str) -> Dict:
         """Generate role-specific interview questions"""
@@ -343,57 +519,82 @@ class InterviewPrep:
             }
         }
         
-        # Default to software engineer if role not found
         role_lower = role.lower()
         for key in question_banks:
             if key in role_lower:
                 return question_banks[key]
         
+        # No title in the text: infer the role from the dominant skill category
+        skills_by_category = default_taxonomy.group_by_category(default_taxonomy.extract(role))
+        if skills_by_category:
+            dominant = max(skills_by_category, key=lambda category: len(skills_by_category[category]))
+            key = InterviewPrep.CATEGORY_ROLES.get(dominant)
+            if key in question_banks:
+                return question_banks[key]
+        
+        # Default to software engineer if role not found
         return question_banks['software engineer']
 
 class ResumeAnalyzer:
     """Advanced resume analysis with ATS optimization"""
     
     @staticmethod
-    def calculate_ats_score(resume_text: str) -> Dict:
-        """Calculate ATS compatibility score"""
-        score = 100
-        issues = []
-        
-        # Check for common ATS issues
-        if len(resume_text.split()) < 200:
-            score -= 20
-            issues.append("Resume may be too short (< 200 words)")
-        
-        if len(resume_text.split()) > 1000:
-            score -= 10
-            issues.append("Resume may be too long (> 1000 words)")
-        
-        # Check for contact information
-        if '@' not in resume_text:
-            score -= 15
-            issues.append("Missing email address")
-        
-        # Check for phone number pattern
-        import re
-        phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        if not re.search(phone_pattern, resume_text):
-            score -= 10
-            issues.append("Phone number format may not be ATS-friendly")
-        
-        # Check for skills section
-        skills_keywords = ['skills', 'technical skills', 'expertise', 'proficiency']
-        if not any(keyword in resume_text.lower() for keyword in skills_keywords):
-            score -= 15
-            issues.append("Missing dedicated skills section")
+    def categorize_skills(resume_text: str) -> Dict[str, List[str]]:
+        """Group the resume's skills by taxonomy category"""
+        return default_taxonomy.group_by_category(get_document_features(resume_text).skills)
+    
+    @staticmethod
+    @timed('ats_scoring')
+    def calculate_ats_score(resume_text: str, job_description: Optional[str] = None) -> Dict:
+        """Calculate ATS compatibility score
         
-        return {
-            'score': max(0, score),
-            'issues': issues,
-            'suggestions': [
-                "Use standard section headers (Experience, Education, Skills)",
-                "Include relevant keywords from job descriptions",
-                "Save as PDF to preserve formatting",
-                "Use a clean, simple layout"
-            ]
-        }
\ No newline at end of file
+        Runs the configured rule set (ats_rules.json). Keyword coverage is
+        only checked when a job description is given.
+        """
+        features = get_document_features(resume_text)
+        result = default_ats_engine.score(features.text, job_description, skills=features.skills)
+        result['skill_categories'] = default_taxonomy.group_by_category(features.skills)
+        result['suggestions'] = list(default_ats_engine.suggestions)
+        return result
+    
+    @staticmethod
+    def score_ats_batch(resumes: Dict[str, str], job_description: Optional[str] = None) -> "pd.DataFrame":
+        """ATS scores for many resumes in one vectorized pass (see ATSEngine.score_batch)"""
+        return default_ats_engine.score_batch(resumes, job_description)
+
+class DocumentFeatures:
+    """Derived data for one document; each piece is computed on first use only"""
+    
+    def __init__(self, text: str):
+        self.text = text
+    
+    @cached_property
+    def skills(self) -> List[str]:
+        return default_taxonomy.extract(self.text)
+    
+    @cached_property
+    def job_title(self) -> str:
+        return JobMatcher.extract_job_title(self.text)
+    
+    @cached_property
+    def ats(self) -> Dict:
+        return ResumeAnalyzer.calculate_ats_score(self.text)
+
+_features_cache = OrderedDict()
+_features_lock = threading.Lock()
+FEATURES_CACHE_SIZE = 128
+
+def get_document_features(text: str) -> DocumentFeatures:
+    """Memoized DocumentFeatures keyed by a hash of the text"""
+    text = text or ""
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    with _features_lock:
+        features = _features_cache.get(key)
+        if features is None:
+            features = DocumentFeatures(text)
+            _features_cache[key] = features
+            if len(_features_cache) > FEATURES_CACHE_SIZE:
+                _features_cache.popitem(last=False)
+        else:
+            _features_cache.move_to_end(key)
+        return features
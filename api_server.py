@@ -0,0 +1,339 @@
+"""Headless JSON API over CareerAssistant for programmatic clients
+
+    python api_server.py --workers 4 --port 8000
+
+Endpoints (JSON bodies unless noted):
+    GET    /health
+    GET    /metrics                       Prometheus text for this worker process
+    POST   /v1/analyze/{analysis}         resume | job-match | company | interview | comprehensive | semantic-match;
+                                          ?stream=true returns NDJSON {"chunk"} lines then {"result"}
+    POST   /v1/extract/pdf                raw PDF body -> {"text"}
+    POST   /v1/batch/match                {"resumes": {id: text}, "jobs": {id: text}, "top_k": 0}
+    POST   /v1/batch                      {"requests": [{"kind", "params"}, ...]} -> job IDs
+    POST   /v1/job-index                  {"jobs": {id: text}} adds job descriptions to the vector index
+    POST   /v1/job-index/search           {"resume_text", "k": 10, "align_top": 0} -> nearest stored jobs
+    POST   /v1/jobs                       {"kind", "params"} -> 202 {"job_id"}
+    GET    /v1/jobs/{job_id}              status, progress, events and result
+    DELETE /v1/jobs/{job_id}              cancel
+"""
+import argparse
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from metrics import metrics
+
+# Whole request bodies (PDF uploads included) and individual text fields
+MAX_BODY_BYTES = int(os.getenv('API_MAX_BODY_BYTES', str(5 * 1024 * 1024)))
+MAX_TEXT_CHARS = int(os.getenv('API_MAX_TEXT_CHARS', '100000'))
+# Requests per /v1/batch call, and resumes x jobs pairs per /v1/batch/match call
+MAX_BATCH = int(os.getenv('API_MAX_BATCH', '50'))
+MAX_BATCH_PAIRS = int(os.getenv('API_MAX_BATCH_PAIRS', '10000'))
+
+# Same caps as the Streamlit upload path
+PDF_MAX_PAGES = 10
+PDF_MAX_CHARS = 20000
+
+# analysis -> (CareerAssistant method, argument fields in call order, required fields, streaming method)
+ANALYSES = {
+    'resume': ('analyze_resume', ('resume_text',), ('resume_text',), 'analyze_resume_stream'),
+    'job-match': ('match_jobs', ('resume_text', 'job_description'), ('resume_text',), 'match_jobs_stream'),
+    'company': ('research_company', ('company_name', 'resume_text'), ('company_name',), 'research_company_stream'),
+    'interview': ('prepare_interview', ('job_description', 'company_name', 'resume_text'), (), 'prepare_interview_stream'),
+    'comprehensive': ('comprehensive_career_analysis', ('resume_text', 'job_description', 'company_name'), ('resume_text',), None),
+    'semantic-match': ('semantic_match_jobs', ('resume_text', 'job_description'), ('resume_text', 'job_description'), None),
+}
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over max_bytes with 413, whether or not Content-Length is sent"""
+
+    def __init__(self, app, max_bytes: int = MAX_BODY_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope['headers']).get(b'content-length', b'')
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            response = JSONResponse({"error": f"Request body exceeds {self.max_bytes} bytes"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise HTTPException(413, f"Request body exceeds {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def read_json(request: Request) -> Dict:
+    try:
+        body = json.loads(await request.body() or b'{}')
+    except ValueError:
+        raise HTTPException(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Request body must be a JSON object")
+    return body
+
+
+def text_fields(body: Dict, fields: Tuple[str, ...], required: Tuple[str, ...]) -> List[str]:
+    """The named string fields in order ('' when absent), validated for type, presence and length"""
+    values = []
+    for field in fields:
+        value = body.get(field, "")
+        if not isinstance(value, str):
+            raise HTTPException(422, f"'{field}' must be a string")
+        if field in required and not value.strip():
+            raise HTTPException(422, f"'{field}' is required")
+        if len(value) > MAX_TEXT_CHARS:
+            raise HTTPException(413, f"'{field}' exceeds {MAX_TEXT_CHARS} characters")
+        values.append(value)
+    return values
+
+
+def client_id(request: Request) -> str:
+    """Jobs are owned by the API key that submitted them"""
+    key = request.headers.get('x-api-key', '')
+    return "api:" + (hashlib.sha256(key.encode('utf-8')).hexdigest()[:16] if key else "anonymous")
+
+
+def check_api_key(request: Request):
+    keys = request.app.state.api_keys
+    if keys and request.headers.get('x-api-key') not in keys:
+        raise HTTPException(401, "Missing or invalid X-API-Key header")
+
+
+def analysis_response(result: Dict) -> JSONResponse:
+    # The backend reports failures (model unavailable, upstream errors, busy queue) as error dicts
+    return JSONResponse(result, status_code=502 if result.get('error') else 200)
+
+
+def ndjson(stream):
+    """NDJSON lines for an AnalysisStream: each text chunk, then the final result dict"""
+    for chunk in stream:
+        yield json.dumps({"chunk": chunk}) + "\n"
+    yield json.dumps({"result": stream.result}) + "\n"
+
+
+async def health(request: Request):
+    return JSONResponse({"status": "ok", "model_loaded": request.app.state.assistant.llm is not None})
+
+
+async def metrics_text(request: Request):
+    return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+async def analyze(request: Request):
+    check_api_key(request)
+    name = request.path_params['analysis']
+    if name not in ANALYSES:
+        raise HTTPException(404, f"Unknown analysis '{name}'; expected one of: {', '.join(ANALYSES)}")
+    method, fields, required, stream_method = ANALYSES[name]
+    args = text_fields(await read_json(request), fields, required)
+    assistant = request.app.state.assistant
+
+    if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+        if stream_method is None:
+            raise HTTPException(400, f"'{name}' does not support streaming; submit it as a job instead")
+        # Building the prompt may call data providers, so it runs off the event loop too
+        stream = await run_in_threadpool(getattr(assistant, stream_method), *args)
+        return StreamingResponse(ndjson(stream), media_type="application/x-ndjson")
+
+    return analysis_response(await run_in_threadpool(getattr(assistant, method), *args))
+
+
+async def extract_pdf(request: Request):
+    check_api_key(request)
+    from pdf_extraction import NO_TEXT_MESSAGE, extract_pdf_text
+    pdf_bytes = await request.body()
+    text = await run_in_threadpool(extract_pdf_text, pdf_bytes, PDF_MAX_PAGES, PDF_MAX_CHARS)
+    if text.startswith("Error processing PDF") or text == NO_TEXT_MESSAGE:
+        return JSONResponse({"error": text}, status_code=422)
+    return JSONResponse({"text": text})
+
+
+async def batch_match(request: Request):
+    check_api_key(request)
+    body = await read_json(request)
+    resumes, jobs, top_k = body.get('resumes'), body.get('jobs'), body.get('top_k', 0)
+    for field, documents in (('resumes', resumes), ('jobs', jobs)):
+        if not isinstance(documents, dict) or not documents:
+            raise HTTPException(422, f"'{field}' must be a non-empty object of id -> text")
+        text_fields(documents, tuple(documents), ())
+    if len(resumes) * len(jobs) > MAX_BATCH_PAIRS:
+        raise HTTPException(413, f"At most {MAX_BATCH_PAIRS} resume/job pairs per request")
+    if not isinstance(top_k, int) or top_k < 0:
+        raise HTTPException(422, "'top_k' must be a non-negative integer")
+
+    result = await run_in_threadpool(request.app.state.assistant.batch_match_jobs, resumes, jobs, top_k)
+    if result.get('success'):
+        # DataFrame -> records; to_json handles the numpy scalar types
+        result['ranking'] = json.loads(result['ranking'].to_json(orient='records'))
+    return analysis_response(result)
+
+
+async def index_jobs(request: Request):
+    check_api_key(request)
+    jobs = (await read_json(request)).get('jobs')
+    if not isinstance(jobs, dict) or not jobs:
+        raise HTTPException(422, "'jobs' must be a non-empty object of id -> text")
+    if len(jobs) > MAX_BATCH_PAIRS:
+        raise HTTPException(413, f"At most {MAX_BATCH_PAIRS} jobs per request")
+    text_fields(jobs, tuple(jobs), tuple(jobs))
+    return analysis_response(await run_in_threadpool(request.app.state.assistant.index_job_descriptions, jobs))
+
+
+async def search_jobs(request: Request):
+    check_api_key(request)
+    body = await read_json(request)
+    resume_text, = text_fields(body, ('resume_text',), ('resume_text',))
+    k, align_top = body.get('k', 10), body.get('align_top', 0)
+    if not isinstance(k, int) or not 0 < k <= 100:
+        raise HTTPException(422, "'k' must be an integer between 1 and 100")
+    if not isinstance(align_top, int) or not 0 <= align_top <= k:
+        raise HTTPException(422, "'align_top' must be an integer between 0 and k")
+    return analysis_response(await run_in_threadpool(request.app.state.assistant.find_similar_jobs, resume_text, k, align_top))
+
+
+def _validate_job(request: Request, spec) -> Tuple[str, Dict]:
+    if not isinstance(spec, dict) or not isinstance(spec.get('params', {}), dict):
+        raise HTTPException(422, "Each job needs a 'kind' and a 'params' object")
+    kind, params = spec.get('kind'), spec.get('params', {})
+    queue = request.app.state.jobs
+    if kind not in queue.handlers:
+        raise HTTPException(422, f"Unknown job kind '{kind}'; expected one of: {', '.join(queue.handlers)}")
+    required = queue.required.get(kind, ())
+    text_fields(params, tuple(dict.fromkeys(required + tuple(params))), required)
+    return kind, params
+
+
+async def submit_job(request: Request):
+    check_api_key(request)
+    kind, params = _validate_job(request, await read_json(request))
+    job_id = await run_in_threadpool(request.app.state.jobs.submit, kind, params, client_id(request))
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+
+async def submit_batch(request: Request):
+    check_api_key(request)
+    specs = (await read_json(request)).get('requests')
+    if not isinstance(specs, list) or not specs:
+        raise HTTPException(422, "'requests' must be a non-empty list of {kind, params}")
+    if len(specs) > MAX_BATCH:
+        raise HTTPException(413, f"At most {MAX_BATCH} requests per batch")
+    validated = [_validate_job(request, spec) for spec in specs]
+
+    owner, queue = client_id(request), request.app.state.jobs
+    job_ids = await run_in_threadpool(lambda: [queue.submit(kind, params, owner) for kind, params in validated])
+    return JSONResponse({"job_ids": job_ids, "status": "queued"}, status_code=202)
+
+
+async def _owned_job(request: Request) -> Dict:
+    job = await run_in_threadpool(request.app.state.jobs.get, request.path_params['job_id'])
+    if job is None or job['user_id'] != client_id(request):
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+async def get_job(request: Request):
+    check_api_key(request)
+    job = await _owned_job(request)
+    return JSONResponse({field: job[field] for field in ('id', 'kind', 'status', 'progress', 'message', 'events',
+                                                          'result', 'error', 'created_at', 'started_at', 'finished_at')})
+
+
+async def cancel_job(request: Request):
+    check_api_key(request)
+    job = await _owned_job(request)
+    cancelled = await run_in_threadpool(request.app.state.jobs.cancel, job['id'])
+    return JSONResponse({"job_id": job['id'], "cancelled": cancelled})
+
+
+async def http_error(request: Request, exc: HTTPException):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+def create_app(assistant=None, jobs=None, api_keys: Optional[List[str]] = None) -> Starlette:
+    """Build the ASGI app; the backend and job workers are loaded at startup unless passed in"""
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        if app.state.assistant is None:
+            from career_backend_simple import get_career_assistant, get_llm
+            await run_in_threadpool(get_llm)
+            app.state.assistant = get_career_assistant()
+        if app.state.jobs is None:
+            from job_queue import job_queue_from_env, register_career_jobs
+            app.state.jobs = register_career_jobs(job_queue_from_env(), app.state.assistant)
+        app.state.jobs.start()
+        yield
+        app.state.jobs.stop(timeout=5)
+
+    app = Starlette(
+        routes=[
+            Route('/health', health),
+            Route('/metrics', metrics_text),
+            Route('/v1/analyze/{analysis}', analyze, methods=['POST']),
+            Route('/v1/extract/pdf', extract_pdf, methods=['POST']),
+            Route('/v1/batch/match', batch_match, methods=['POST']),
+            Route('/v1/batch', submit_batch, methods=['POST']),
+            Route('/v1/job-index', index_jobs, methods=['POST']),
+            Route('/v1/job-index/search', search_jobs, methods=['POST']),
+            Route('/v1/jobs', submit_job, methods=['POST']),
+            Route('/v1/jobs/{job_id}', get_job, methods=['GET']),
+            Route('/v1/jobs/{job_id}', cancel_job, methods=['DELETE']),
+        ],
+        middleware=[Middleware(BodySizeLimitMiddleware, max_bytes=MAX_BODY_BYTES)],
+        exception_handlers={HTTPException: http_error},
+        lifespan=lifespan,
+    )
+    app.state.assistant = assistant
+    app.state.jobs = jobs
+    if api_keys is None:
+        api_keys = [key.strip() for key in os.getenv('API_KEYS', '').split(',') if key.strip()]
+    app.state.api_keys = set(api_keys)
+    return app
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the CareerAssistant JSON API")
+    parser.add_argument('--host', default=os.getenv('API_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('API_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', '1')))
+    args = parser.parse_args()
+
+    if args.workers > 1 and not os.getenv('JOB_QUEUE_PATH'):
+        # Each worker is its own process: jobs must live in a shared store to be visible from any of them
+        from job_queue import DEFAULT_JOBS_PATH
+        os.environ['JOB_QUEUE_PATH'] = DEFAULT_JOBS_PATH
+
+    import uvicorn
+    uvicorn.run('api_server:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import json
+import math
+import os
+import re
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from metrics import timed
+from skill_matcher import default_taxonomy
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ATS_RULES_PATH = os.getenv('ATS_RULES_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ats_rules.json')
+
+# A short line (or the label before a colon) is treated as a possible section header
+HEADER_MAX_WORDS = 4
+_HEADER_STRIP = ' \t:-*#|=_•'
+_BULLET = re.compile(r'^(?:[-*•▪●◦‣–—>]|\(cid:\d+\)|\d{1,2}[.)])\s+')
+
+_MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+_YEAR = r'(?:19|20)\d{2}'
+_DATE = rf'(?:{_MONTH}\s+{_YEAR}|\d{{1,2}}/{_YEAR}|{_YEAR}-\d{{2}}(?!\d)|{_YEAR})'
+_HAS_YEAR = re.compile(_YEAR)
+_DATE_RANGE = re.compile(rf'\b({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|present|current|now)\b', re.IGNORECASE)
+_DATE_FORMATS = [
+    ('Mon YYYY', re.compile(rf'{_MONTH}\s+{_YEAR}$', re.IGNORECASE)),
+    ('MM/YYYY', re.compile(rf'\d{{1,2}}/{_YEAR}$')),
+    ('YYYY-MM', re.compile(rf'{_YEAR}-\d{{2}}$')),
+    ('YYYY', re.compile(rf'{_YEAR}$')),
+]
+
+
+class ATSDocument:
+    """A resume split into lines once; every rule reads from this shared index"""
+
+    def __init__(self, text: str, skills: Optional[List[str]] = None):
+        self.text = text or ""
+        self.word_count = len(self.text.split())
+        self.headers = []
+        self.content_lines = 0
+        self.bullet_lines = 0
+        self.dated_lines = []  # only these are scanned for date ranges
+        for line in self.text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if _HAS_YEAR.search(line):
+                self.dated_lines.append(line)
+            label, _, rest = line.partition(':')
+            if len(label.split()) <= HEADER_MAX_WORDS and not label.endswith('.'):
+                self.headers.append(label.strip(_HEADER_STRIP).lower())
+                if not rest.strip():
+                    continue  # a header line on its own ("SKILLS", "Experience:")
+            self.content_lines += 1
+            if _BULLET.match(line):
+                self.bullet_lines += 1
+        self._skills = skills
+
+    @cached_property
+    def skills(self) -> set:
+        """Resume skills plus the parent skills they imply"""
+        skills = self._skills if self._skills is not None else default_taxonomy.extract(self.text)
+        return set(default_taxonomy.expand_with_parents(skills))
+
+    @cached_property
+    def date_formats(self) -> List[str]:
+        """Formats used by the endpoints of date ranges (employment and education periods)"""
+        formats = []
+        for match in _DATE_RANGE.finditer('\n'.join(self.dated_lines)):
+            for endpoint in match.groups():
+                for name, pattern in _DATE_FORMATS:
+                    if pattern.match(endpoint):
+                        formats.append(name)
+                        break
+        return formats
+
+
+class ATSRule:
+    """One configured check: a measurement compared against min/max bounds
+
+    A NaN measurement means the rule does not apply (no job description,
+    too few lines) and never fails.
+    """
+
+    def __init__(self, config: Dict):
+        self.id = config['id']
+        self.type = config['type']
+        self.penalty = float(config.get('penalty', 0))
+        self.message = config.get('message', self.id)
+        self.min = config.get('min')
+        self.max = config.get('max')
+        self.min_lines = config.get('min_lines', 0)
+
+        self._measure = getattr(self, f"_measure_{self.type}", None)
+        if self._measure is None:
+            raise ValueError(f"Unknown ATS rule type '{self.type}' in rule '{self.id}'")
+        if self.type == 'pattern':
+            self.pattern = re.compile(config['pattern'], re.IGNORECASE)
+        elif self.type == 'section':
+            self.pattern = re.compile(r'\b(?:' + '|'.join(re.escape(h.lower()) for h in config['headers']) + r')\b')
+
+    def measure(self, doc: ATSDocument, job_skills: Optional[set]) -> float:
+        return float(self._measure(doc, job_skills))
+
+    def fails(self, value: float) -> bool:
+        return (self.min is not None and value < self.min) or (self.max is not None and value > self.max)
+
+    def issue(self, value: float) -> str:
+        return self.message.format(value=value)
+
+    def _measure_word_count(self, doc: ATSDocument, job_skills) -> int:
+        return doc.word_count
+
+    def _measure_pattern(self, doc: ATSDocument, job_skills) -> bool:
+        return self.pattern.search(doc.text) is not None
+
+    def _measure_section(self, doc: ATSDocument, job_skills) -> bool:
+        return any(self.pattern.search(header) for header in doc.headers)
+
+    def _measure_date_formats(self, doc: ATSDocument, job_skills) -> int:
+        return len(set(doc.date_formats))
+
+    def _measure_bullet_density(self, doc: ATSDocument, job_skills) -> float:
+        if doc.content_lines < max(self.min_lines, 1):
+            return math.nan
+        return doc.bullet_lines / doc.content_lines
+
+    def _measure_keyword_coverage(self, doc: ATSDocument, job_skills) -> float:
+        if not job_skills:
+            return math.nan
+        return len(job_skills & doc.skills) / len(job_skills)
+
+
+class ATSEngine:
+    """Scores resumes against a rule set loaded from config"""
+
+    def __init__(self, rules: List[ATSRule], base_score: float = 100, suggestions: Optional[List[str]] = None,
+                 version=None):
+        self.rules = rules
+        self.base_score = base_score
+        self.suggestions = list(suggestions or [])
+        self.version = version
+
+    @classmethod
+    def from_config(cls, data: Dict) -> 'ATSEngine':
+        return cls([ATSRule(rule) for rule in data['rules']], data.get('base_score', 100),
+                   data.get('suggestions'), data.get('version'))
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def job_skills(job_description: Optional[str]) -> Optional[frozenset]:
+        """Skills a job description asks for; memoized since one JD is usually scored against many resumes"""
+        return frozenset(default_taxonomy.extract(job_description)) if job_description else None
+
+    def measure(self, text: str, job_skills: Optional[set] = None, skills: Optional[List[str]] = None) -> List[float]:
+        """One value per rule, in rule order"""
+        doc = ATSDocument(text, skills)
+        return [rule.measure(doc, job_skills) for rule in self.rules]
+
+    def score(self, text: str, job_description: Optional[str] = None, skills: Optional[List[str]] = None) -> Dict:
+        """Score one resume; pass skills when they are already extracted"""
+        values = self.measure(text, self.job_skills(job_description), skills)
+        score = self.base_score
+        issues = []
+        for rule, value in zip(self.rules, values):
+            if rule.fails(value):
+                score -= rule.penalty
+                issues.append(rule.issue(value))
+        return {
+            'score': max(0, round(score)),
+            'issues': issues,
+            'checks': {rule.id: None if math.isnan(value) else round(value, 3) for rule, value in zip(self.rules, values)},
+        }
+
+    @timed('ats_scoring_batch')
+    def score_batch(self, resumes: Dict[str, str], job_description: Optional[str] = None) -> "pd.DataFrame":
+        """Score many resumes at once
+
+        Each resume is indexed once; thresholds, penalties and totals are
+        then applied to the whole resumes x rules matrix with NumPy. Returns
+        one row per resume (input order) with score, issues and one column
+        per rule holding its measurement.
+        """
+        import numpy as np
+        import pandas as pd
+
+        rule_ids = [rule.id for rule in self.rules]
+        if not resumes:
+            return pd.DataFrame(columns=['resume_id', 'score', 'issues', *rule_ids])
+
+        job_skills = self.job_skills(job_description)
+        values = np.array([self.measure(text, job_skills) for text in resumes.values()], dtype=np.float64)
+        values = values.reshape(len(resumes), len(self.rules))
+
+        mins = np.array([np.nan if rule.min is None else rule.min for rule in self.rules])
+        maxs = np.array([np.nan if rule.max is None else rule.max for rule in self.rules])
+        penalties = np.array([rule.penalty for rule in self.rules])
+
+        failed = (values < mins) | (values > maxs)  # comparisons with NaN are False
+        scores = np.clip(self.base_score - failed @ penalties, 0, None).round().astype(int)
+
+        table = pd.DataFrame(values, columns=rule_ids)
+        table.insert(0, 'resume_id', list(resumes))
+        table.insert(1, 'score', scores)
+        table.insert(2, 'issues', [[self.rules[j].issue(row[j]) for j in np.flatnonzero(mask)]
+                                   for row, mask in zip(values, failed)])
+        return table
+
+
+def load_ats_engine(path: str = ATS_RULES_PATH) -> ATSEngine:
+    """Build an engine from a JSON rule file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return ATSEngine.from_config(json.load(f))
+
+
+default_ats_engine = load_ats_engine()
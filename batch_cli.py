@@ -0,0 +1,358 @@
+"""Bulk resume processing: text extraction, ATS scoring and job matching over a directory or manifest
+
+    python batch_cli.py --input resumes/ --job role.txt --output results.jsonl --workers 8
+    python batch_cli.py --manifest files.csv --output results.csv --llm resume --llm-rpm 10
+
+Parsing and scoring run on a process pool; results are appended to the
+output as each file finishes (JSONL, CSV or a directory of Parquet parts)
+and the file is recorded in a checkpoint, so an interrupted run picks up
+where it stopped when started again with the same arguments. Optional LLM
+enrichment runs on a few threads behind the shared rate limiter.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INPUT_EXTENSIONS = ('.pdf', '.txt')
+
+# Same caps as the Streamlit upload path
+PDF_MAX_PAGES = 10
+PDF_MAX_CHARS = 20000
+
+# Rows buffered per Parquet part file
+PARQUET_PART_ROWS = 1000
+
+CSV_COLUMNS = ['id', 'path', 'sha256', 'chars', 'ats_score', 'ats_issues', 'skills', 'best_job', 'best_score',
+               'matches', 'llm_analysis', 'llm_error', 'error']
+
+# Arrow type per column (list/dict fields are stored as JSON strings); every
+# Parquet part uses it, so a part where a column is all empty still matches
+PARQUET_TYPES = {'chars': 'int64', 'ats_score': 'int64', 'best_score': 'float64'}
+
+
+# Inputs
+
+def iter_directory(root: str, directory: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """(relative path, path) for every supported file under root, in a stable order, one directory at a time"""
+    entries = sorted(os.scandir(directory or root), key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_directory(root, entry.path)
+        elif entry.name.lower().endswith(INPUT_EXTENSIONS):
+            yield os.path.relpath(entry.path, root), entry.path
+
+
+def iter_manifest(manifest: str) -> Iterator[Tuple[str, str]]:
+    """(id, path) from a CSV with a 'path' (and optional 'id') column, or a plain list of paths"""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, newline='', encoding='utf-8') as handle:
+        first = handle.readline()
+        handle.seek(0)
+        if 'path' in [column.strip() for column in first.split(',')]:
+            rows = ((row.get('id') or row['path'], row['path']) for row in csv.DictReader(handle))
+        else:
+            rows = ((line.strip(), line.strip()) for line in handle if line.strip() and not line.startswith('#'))
+        for item_id, path in rows:
+            yield item_id, path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def checkpoint_key(item_id: str, path: str) -> str:
+    """Identifies one version of one input; a file changed since the last run is processed again"""
+    try:
+        stat = os.stat(path)
+        return f"{item_id}\t{stat.st_size}\t{stat.st_mtime_ns}"
+    except OSError:
+        return f"{item_id}\t-\t-"
+
+
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as handle:
+        return {line.rstrip('\n') for line in handle if line.strip()}
+
+
+# Worker side (runs in the process pool)
+
+_job_skills = {}
+
+
+def _init_worker(job_skills: Dict[str, List[str]]):
+    global _job_skills
+    _job_skills = job_skills
+
+
+def read_document(path: str) -> str:
+    """Text of a PDF or plain-text file; raises ValueError when nothing usable comes out"""
+    if path.lower().endswith('.pdf'):
+        from pdf_extraction import NO_TEXT_MESSAGE, extract_pdf_text
+        with open(path, 'rb') as handle:
+            text = extract_pdf_text(handle.read(), PDF_MAX_PAGES, PDF_MAX_CHARS)
+        if text.startswith("Error processing PDF") or text == NO_TEXT_MESSAGE:
+            raise ValueError(text)
+        return text
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        return handle.read(PDF_MAX_CHARS)
+
+
+def process_file(item_id: str, path: str, keep_text: bool) -> Dict:
+    """Extract, score and match one resume; errors are reported in the record rather than raised"""
+    from advanced_tools import JobMatcher, ResumeAnalyzer, get_document_features
+
+    record = {'id': item_id, 'path': path}
+    try:
+        text = read_document(path)
+        features = get_document_features(text)
+        ats = ResumeAnalyzer.calculate_ats_score(text)
+        matches = {job_id: JobMatcher.calculate_match_score(features.skills, skills) for job_id, skills in _job_skills.items()}
+        best = max(matches, key=lambda job_id: matches[job_id]['score'], default=None)
+        record.update(
+            sha256=hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            chars=len(text),
+            ats_score=ats['score'],
+            ats_issues=ats['issues'],
+            skills=features.skills,
+            matches=matches,
+            best_job=best,
+            best_score=matches[best]['score'] if best else None,
+        )
+        if keep_text:
+            record['text'] = text
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record
+
+
+# Outputs
+
+class JsonlWriter:
+    buffered = 0
+
+    def __init__(self, path: str):
+        self.handle = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: Dict):
+        self.handle.write(json.dumps(record, default=str) + "\n")
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class CsvWriter:
+    """One row per resume; list and dict fields are JSON-encoded"""
+    buffered = 0
+
+    def __init__(self, path: str):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.handle = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.handle, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, record: Dict):
+        row = {column: json.dumps(value) if isinstance(value, (list, dict)) else value
+               for column, value in record.items()}
+        self.writer.writerow(row)
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class ParquetWriter:
+    """Parquet files can't be appended to, so rows go to numbered part files in a directory"""
+
+    def __init__(self, path: str, part_rows: int = PARQUET_PART_ROWS):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.schema = pa.schema([(column, PARQUET_TYPES.get(column, 'string')) for column in CSV_COLUMNS])
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.part_rows = part_rows
+        self.rows = []
+        self.part = len([name for name in os.listdir(path) if name.endswith('.parquet')])
+
+    @property
+    def buffered(self) -> int:
+        return len(self.rows)
+
+    def write(self, record: Dict):
+        self.rows.append({column: json.dumps(value) if isinstance(value, (list, dict)) else value
+                          for column, value in record.items()})
+        if len(self.rows) >= self.part_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist(self.rows, schema=self.schema)
+        pq.write_table(table, os.path.join(self.path, f"part-{self.part:05d}.parquet"))
+        self.part += 1
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'parquet': ParquetWriter}
+
+
+def output_format(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'json': 'jsonl', 'jsonl': 'jsonl', 'csv': 'csv', 'parquet': 'parquet'}.get(extension, 'jsonl')
+
+
+# LLM enrichment (runs in this process)
+
+def make_enricher(mode: str, rpm: float, jobs: Dict[str, str]):
+    """Returns record -> record adding llm_analysis, using CareerAssistant behind its own rate limiter"""
+    from career_backend_simple import CareerAssistant
+    from llm_scheduler import BATCH, LLMScheduler, call_priority
+
+    assistant = CareerAssistant(scheduler=LLMScheduler(requests_per_minute=rpm, max_queue=1000, queue_timeout=3600))
+    if not assistant.llm:
+        raise SystemExit("LLM enrichment needs GOOGLE_API_KEY")
+
+    def enrich(record: Dict) -> Dict:
+        text = record.pop('text', "")
+        with call_priority(BATCH):
+            if mode == 'match' and record.get('best_job'):
+                result = assistant.match_jobs(text, jobs[record['best_job']])
+            else:
+                result = assistant.analyze_resume(text)
+        record['llm_analysis'] = result.get('analysis') if result.get('success') else None
+        if not result.get('success'):
+            record['llm_error'] = result.get('error')
+        return record
+
+    return enrich
+
+
+def run(args) -> Dict:
+    sources = iter_manifest(args.manifest) if args.manifest else iter_directory(args.input)
+    jobs = {os.path.basename(path): path for path in args.job}
+    job_texts = {job_id: read_document(path) for job_id, path in jobs.items()}
+    from skill_matcher import default_taxonomy
+    job_skills = {job_id: default_taxonomy.extract(text) for job_id, text in job_texts.items()}
+
+    fmt = output_format(args.output, args.format)
+    checkpoint_path = args.checkpoint or f"{args.output.rstrip(os.sep)}.checkpoint"
+    done = load_checkpoint(checkpoint_path)
+    writer = WRITERS[fmt](args.output)
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8')
+    enrich = make_enricher(args.llm, args.llm_rpm, job_texts) if args.llm != 'none' else None
+
+    stats = {'processed': 0, 'skipped': 0, 'errors': 0}
+    start = time.perf_counter()
+    keys = {}  # future -> checkpoint key
+    unsaved = []  # keys of records the writer is still buffering
+    window = args.workers * 4  # bounds memory: only this many files are in flight
+
+    def save_checkpoint():
+        checkpoint.writelines(key + "\n" for key in unsaved)
+        checkpoint.flush()
+        unsaved.clear()
+
+    def finish(record: Dict, key: str):
+        record.pop('text', None)
+        writer.write(record)
+        # Checkpoint only once the result is on disk: a crash in between repeats the file, never drops it
+        unsaved.append(key)
+        if not writer.buffered:
+            save_checkpoint()
+        stats['processed'] += 1
+        stats['errors'] += 1 if record.get('error') else 0
+        if stats['processed'] % args.progress_every == 0:
+            rate = stats['processed'] / (time.perf_counter() - start)
+            print(f"{stats['processed']} done ({rate:.1f}/s), {stats['skipped']} skipped, {stats['errors']} errors",
+                  file=sys.stderr)
+
+    def drain(parsing, enriching, until: int):
+        while len(parsing) + len(enriching) > until:
+            completed, _ = wait(parsing | enriching, return_when=FIRST_COMPLETED)
+            for future in completed:
+                key = keys.pop(future)
+                record = future.result()
+                if future in parsing:
+                    parsing.discard(future)
+                    if enrich and not record.get('error'):
+                        enrichment = llm_pool.submit(enrich, record)
+                        keys[enrichment] = key
+                        enriching.add(enrichment)
+                        continue
+                else:
+                    enriching.discard(future)
+                finish(record, key)
+
+    parsing, enriching = set(), set()
+    llm_pool = ThreadPoolExecutor(max_workers=args.llm_concurrency, thread_name_prefix="llm-enrich") if enrich else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(job_skills,)) as pool:
+            for item_id, path in sources:
+                key = checkpoint_key(item_id, path)
+                if key in done:
+                    stats['skipped'] += 1
+                    continue
+                drain(parsing, enriching, window - 1)
+                future = pool.submit(process_file, item_id, path, enrich is not None)
+                keys[future] = key
+                parsing.add(future)
+            drain(parsing, enriching, 0)
+    finally:
+        if llm_pool:
+            llm_pool.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+        save_checkpoint()
+        checkpoint.close()
+
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    stats['files_per_s'] = round(stats['processed'] / stats['seconds'], 2) if stats['seconds'] else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="directory searched recursively for .pdf/.txt resumes")
+    source.add_argument('--manifest', help="CSV with a 'path' (and optional 'id') column, or one path per line")
+    parser.add_argument('--job', action='append', default=[], help="job description file (.txt/.pdf); repeatable")
+    parser.add_argument('--output', required=True, help="results file (.jsonl/.csv) or directory (.parquet)")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="defaults to the output extension")
+    parser.add_argument('--checkpoint', help="defaults to <output>.checkpoint")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="parsing processes")
+    parser.add_argument('--llm', choices=['none', 'resume', 'match'], default='none',
+                        help="add an LLM resume analysis, or a match narrative against the best job")
+    parser.add_argument('--llm-rpm', type=float, default=float(os.getenv('LLM_REQUESTS_PER_MINUTE', '10')))
+    parser.add_argument('--llm-concurrency', type=int, default=2)
+    parser.add_argument('--progress-every', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.llm == 'match' and not args.job:
+        parser.error("--llm match needs at least one --job")
+    names = [os.path.basename(path) for path in args.job]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        parser.error(f"--job files are reported by file name, which must be unique: {', '.join(duplicates)}")
+    try:
+        stats = run(args)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Seeded synthetic resumes, job descriptions and PDFs for benchmarks"""
+import json
+import os
+import random
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Words per resume for each size class
+RESUME_SIZES = {'short': 180, 'medium': 500, 'long': 1400}
+
+_TITLES = ["Software Engineer", "Data Scientist", "Backend Developer", "DevOps Engineer", "Machine Learning Engineer",
+           "Full Stack Developer", "Data Engineer", "Product Analyst"]
+_COMPANIES = ["Globex", "Initech", "Hooli", "Acme Corp", "Umbrella Analytics", "Stark Industries", "Soylent", "Cyberdyne"]
+_VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Shipped", "Scaled", "Maintained", "Reduced"]
+_OBJECTS = ["a payments service", "the data ingestion pipeline", "an internal analytics dashboard", "CI/CD workflows",
+            "a recommendation model", "customer-facing REST APIs", "the search indexing layer", "batch ETL jobs"]
+_RESULTS = ["cutting latency by 40%", "serving 2M requests per day", "saving $120k per year", "with 99.95% uptime",
+            "for 30 enterprise customers", "reducing on-call pages by half", "ahead of schedule", "across four teams"]
+
+
+def load_skill_names() -> List[str]:
+    with open(os.path.join(ROOT, 'skills_taxonomy.json'), encoding='utf-8') as handle:
+        return [entry['name'] for entry in json.load(handle)['skills']]
+
+
+def make_resume(rng: random.Random, skills: List[str], words: int) -> str:
+    """One plain-text resume of roughly `words` words"""
+    picked = rng.sample(skills, min(len(skills), rng.randint(8, 20)))
+    name = f"Candidate {rng.randint(1000, 9999)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | ({rng.randint(200, 989)}) 555-{rng.randint(1000, 9999)} | linkedin.com/in/candidate",
+        "",
+        "SUMMARY",
+        f"{rng.choice(_TITLES)} with {rng.randint(2, 15)} years of experience in {', '.join(picked[:4])}.",
+        "",
+        "EXPERIENCE",
+    ]
+    while sum(len(line.split()) for line in lines) < words - 60:
+        lines.append(f"{rng.choice(_TITLES)} - {rng.choice(_COMPANIES)} ({rng.randint(2010, 2022)} - {rng.randint(2023, 2026)})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(picked)}, {rng.choice(_RESULTS)}")
+        lines.append("")
+    lines += [
+        "SKILLS",
+        ", ".join(picked),
+        "",
+        "EDUCATION",
+        f"B.S. Computer Science, State University, {rng.randint(2005, 2020)}",
+    ]
+    return "\n".join(lines)
+
+
+def make_job(rng: random.Random, skills: List[str]) -> str:
+    """One job description naming a handful of required and preferred skills"""
+    required = rng.sample(skills, 6)
+    preferred = rng.sample(skills, 4)
+    return "\n".join([
+        f"{rng.choice(_TITLES)} at {rng.choice(_COMPANIES)}",
+        "",
+        "About the role",
+        "You will design, build and operate services used by millions of customers.",
+        "",
+        "Requirements",
+        *(f"- {rng.randint(2, 6)}+ years with {skill}" for skill in required),
+        "",
+        "Nice to have",
+        *(f"- Experience with {skill}" for skill in preferred),
+    ])
+
+
+def build_corpus(count: int = 30, seed: int = 42) -> Dict[str, List[str]]:
+    """Resumes cycling through the size classes plus one job description per resume"""
+    rng = random.Random(seed)
+    skills = load_skill_names()
+    sizes = list(RESUME_SIZES.values())
+    return {
+        'resumes': [make_resume(rng, skills, sizes[index % len(sizes)]) for index in range(count)],
+        'jobs': [make_job(rng, skills) for _ in range(count)],
+    }
+
+
+def _escape(text: str) -> bytes:
+    return text.encode('latin-1', 'replace').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def make_pdf(text: str, lines_per_page: int = 50, width: int = 95) -> bytes:
+    """Minimal uncompressed text PDF (Helvetica, one Tj per line)"""
+    wrapped = []
+    for line in text.splitlines() or [""]:
+        while len(line) > width:
+            cut = line.rfind(' ', 0, width)
+            cut = cut if cut > 0 else width
+            wrapped.append(line[:cut])
+            line = line[cut:].lstrip()
+        wrapped.append(line)
+    pages = [wrapped[start:start + lines_per_page] for start in range(0, len(wrapped), lines_per_page)]
+
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 2 + 2 * len(pages)
+    kids = []
+    for lines in pages:
+        ops = b"BT /F1 10 Tf 40 760 Td 14 TL " + b" ".join(b"(" + _escape(line) + b") Tj T*" for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(ops) + ops + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % (pages_id, len(objects)))
+        kids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) + b"] /Count %d >>" % len(kids))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    return bytes(out)
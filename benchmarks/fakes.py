@@ -0,0 +1,100 @@
+"""Deterministic stand-ins for Gemini and the data providers, so benchmarks run offline"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+_WORDS = ("candidate strong experience python cloud services data pipelines leadership impact team "
+          "scalable systems metrics delivery roadmap interview practice growth skills gap recommend").split()
+
+
+class FakeChatModel:
+    """Chat model with the invoke/stream surface the backend uses
+
+    The reply is derived from a hash of the prompt, so identical prompts get
+    identical replies. invoke() sleeps `latency` seconds; stream() waits
+    `first_chunk_latency` before the first chunk and spreads the rest of the
+    latency over `chunks` chunks.
+    """
+
+    def __init__(self, latency: float = 0.5, first_chunk_latency: Optional[float] = None, response_tokens: int = 400,
+                 chunks: int = 10, model: str = 'fake-chat', temperature: float = 0.7):
+        self.latency = latency
+        self.first_chunk_latency = latency / 4 if first_chunk_latency is None else first_chunk_latency
+        self.response_tokens = response_tokens
+        self.chunks = max(1, chunks)
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _reply(self, messages: List) -> str:
+        prompt = "".join(str(getattr(message, 'content', message)) for message in messages)
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+        words = [_WORDS[(seed >> (index % 200)) % len(_WORDS)] for index in range(self.response_tokens)]
+        lines = [" ".join(words[start:start + 12]) for start in range(0, len(words), 12)]
+        return "<h3>Report</h3>\n" + "\n".join(f"<p>- {line}.</p>" for line in lines)
+
+    def _usage(self, messages: List, text: str) -> Dict:
+        prompt_tokens = sum(len(str(getattr(message, 'content', message))) for message in messages) // 4
+        output_tokens = len(text) // 4
+        return {'input_tokens': prompt_tokens, 'output_tokens': output_tokens, 'total_tokens': prompt_tokens + output_tokens}
+
+    def invoke(self, messages: List, **kwargs) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        text = self._reply(messages)
+        return AIMessage(content=text, usage_metadata=self._usage(messages, text))
+
+    def stream(self, messages: List, **kwargs) -> Iterator[AIMessageChunk]:
+        with self._lock:
+            self.calls += 1
+        text = self._reply(messages)
+        size = -(-len(text) // self.chunks)
+        pause = max(0.0, self.latency - self.first_chunk_latency) / self.chunks
+        time.sleep(self.first_chunk_latency)
+        for start in range(0, len(text), size):
+            if start:
+                time.sleep(pause)
+            yield AIMessageChunk(content=text[start:start + size])
+        yield AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+
+
+class FixtureResponse:
+    """The slice of requests.Response the provider code reads"""
+
+    def __init__(self, data: Dict, status_code: int = 200):
+        self._data = data
+        self.status_code = status_code
+
+    def json(self) -> Dict:
+        return self._data
+
+
+class FixtureHttpClient:
+    """HttpClient replacement that answers from fixtures/<provider>.json after `latency` seconds"""
+
+    def __init__(self, latency: float = 0.15, fixtures_dir: str = FIXTURES_DIR):
+        self.latency = latency
+        self.fixtures = {}
+        for name in os.listdir(fixtures_dir):
+            if name.endswith('.json'):
+                with open(os.path.join(fixtures_dir, name), encoding='utf-8') as handle:
+                    self.fixtures[name[:-5]] = json.load(handle)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, url: str, params: Optional[Dict] = None, **kwargs) -> FixtureResponse:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        if provider not in self.fixtures:
+            return FixtureResponse({}, status_code=404)
+        return FixtureResponse(self.fixtures[provider])
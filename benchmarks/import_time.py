@@ -0,0 +1,60 @@
+"""Cold-start benchmark: how long importing the backend takes and what it pulls in
+
+Each measurement runs in a fresh interpreter so nothing is already cached
+in sys.modules. Prints a JSON report.
+
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load once an AI tool is actually used
+HEAVY_MODULES = ['langchain_core', 'langchain_google_genai', 'pdfplumber', 'PyPDF2', 'pandas', 'bs4', 'advanced_tools']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+first_llm = None
+if {with_llm}:
+    start = time.perf_counter()
+    {module}.get_llm()
+    first_llm = time.perf_counter() - start
+print(json.dumps({{'import_s': imported, 'heavy_loaded': loaded, 'first_llm_s': first_llm}}))
+"""
+
+
+def measure(module: str, with_llm: bool = False) -> dict:
+    """Import module in a fresh interpreter and return its timings"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES, with_llm=with_llm)
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = [measure('streamlit')['import_s'] for _ in range(args.runs)]
+    backend = [measure('career_backend_simple', with_llm=True) for _ in range(args.runs)]
+
+    print(json.dumps({
+        'runs': args.runs,
+        'streamlit_import_s': round(statistics.median(baseline), 3),
+        'backend_import_s': round(statistics.median(run['import_s'] for run in backend), 3),
+        'first_get_llm_s': round(statistics.median(run['first_llm_s'] for run in backend), 3),
+        'heavy_modules_on_import': backend[0]['heavy_loaded'],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""Offline performance benchmarks for CareerAssistant
+
+Runs against FakeChatModel and fixture-backed providers (see fakes.py), so
+results depend only on our own code plus the configured fake latencies.
+Suites: micro (skill extraction, ATS scoring, HTML cleanup, PDF parsing),
+latency (one request at a time per analysis) and throughput (N concurrent
+sessions). Prints a JSON report; --compare diffs it against an earlier one.
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --suite micro latency --compare before.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [ROOT, BENCH_DIR]
+
+from corpus import build_corpus, make_pdf  # noqa: E402
+from fakes import FakeChatModel, FixtureHttpClient  # noqa: E402
+
+SUITES = ('micro', 'latency', 'throughput')
+
+# Keys the provider code checks before calling out; the fixture client never does
+PROVIDER_ENV = {'NEWS_API_KEY': 'benchmark', 'ALPHA_VANTAGE_API_KEY': 'benchmark',
+                'ADZUNA_APP_ID': 'benchmark', 'ADZUNA_API_KEY': 'benchmark'}
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Millisecond statistics for a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_calls(func: Callable, inputs: List, repeat: int, before: Optional[Callable] = None) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            if before:
+                before()
+            start = time.perf_counter()
+            func(item)
+            samples.append(time.perf_counter() - start)
+    result = summarize(samples)
+    result['ops_per_s'] = round(len(samples) / sum(samples), 1) if sum(samples) else None
+    return result
+
+
+def bench_micro(corpus: Dict, args) -> Dict:
+    """Per-call cost of the CPU-bound helpers; caches are cleared so every call is cold"""
+    import advanced_tools
+    import pdf_extraction
+    from career_backend_simple import clean_html_tags
+
+    resumes = corpus['resumes']
+    replies = [FakeChatModel(response_tokens=600)._reply([resume]) for resume in resumes]
+    pdfs = [make_pdf(resume) for resume in resumes]
+
+    def parse_pdf(pdf_bytes):
+        return pdf_extraction.extract_text_from_pdf(io.BytesIO(pdf_bytes))
+
+    import pandas  # noqa: F401  (import cost is import_time.py's concern, not the first timed batch call)
+    from semantic_matcher import EmbeddingCache, SemanticMatcher
+    semantic = SemanticMatcher(cache=EmbeddingCache(max_entries=0), index_backend='numpy')
+    semantic.add_jobs(dict(enumerate(corpus['jobs'])))
+
+    return {
+        'extract_skills_from_text': time_calls(advanced_tools.JobMatcher.extract_skills_from_text, resumes, args.repeat),
+        'calculate_ats_score': time_calls(advanced_tools.ResumeAnalyzer.calculate_ats_score, resumes, args.repeat,
+                                          before=advanced_tools._features_cache.clear),
+        # One call scores the whole corpus
+        'score_ats_batch': time_calls(lambda batch: advanced_tools.ResumeAnalyzer.score_ats_batch(batch, corpus['jobs'][0]),
+                                      [dict(enumerate(resumes))], args.repeat),
+        'semantic_search': time_calls(semantic.search, resumes, args.repeat),
+        'clean_html_tags': time_calls(clean_html_tags, replies, args.repeat),
+        'extract_text_from_pdf': time_calls(parse_pdf, pdfs, args.repeat, before=pdf_extraction._pdf_text_cache.clear),
+    }
+
+
+def make_assistant(args):
+    """A CareerAssistant wired to the fakes, with no response cache and (by default) no rate limit"""
+    from advanced_tools import CompanyResearcher, JobMatcher
+    from career_backend_simple import CareerAssistant
+    from llm_cache import LLMResponseCache
+    from llm_scheduler import LLMScheduler
+    from provider_cache import ProviderCache
+
+    scheduler = LLMScheduler(requests_per_minute=args.rpm or 1e9, tokens_per_minute=args.tpm or 1e12,
+                             max_queue=10000, queue_timeout=600)
+    assistant = CareerAssistant(response_cache=LLMResponseCache(max_entries=0), scheduler=scheduler)
+    assistant.llm = FakeChatModel(latency=args.llm_latency, response_tokens=args.response_tokens)
+    http = FixtureHttpClient(latency=args.http_latency)
+    assistant.company_researcher = CompanyResearcher(http=http, cache=ProviderCache())
+    assistant.job_matcher = JobMatcher(http=http, cache=ProviderCache())
+    return assistant
+
+
+def _company(index: int) -> str:
+    # Unique per call so the provider cache never answers, but still maps to a ticker
+    return f"Google {index}"
+
+
+def _operations(corpus: Dict) -> Dict[str, Callable]:
+    resumes, jobs = corpus['resumes'], corpus['jobs']
+
+    def pick(items, index):
+        return items[index % len(items)]
+
+    return {
+        'analyze_resume': lambda a, i: a.analyze_resume(pick(resumes, i)),
+        'match_jobs': lambda a, i: a.match_jobs(pick(resumes, i), pick(jobs, i)),
+        'research_company': lambda a, i: a.research_company(_company(i), pick(resumes, i)),
+        'prepare_interview': lambda a, i: a.prepare_interview(pick(jobs, i), _company(i), pick(resumes, i)),
+        'comprehensive_career_analysis': lambda a, i: a.comprehensive_career_analysis(pick(resumes, i), pick(jobs, i), _company(i)),
+        'job_market_data': lambda a, i: _job_market_data(a, pick(resumes, i), pick(jobs, i)),
+    }
+
+
+def _job_market_data(assistant, resume: str, job: str) -> Dict:
+    # match_jobs skips the Adzuna lookup, so exercise it directly; job titles repeat, hence the cache clear
+    assistant.job_matcher.cache.clear()
+    compatibility = assistant.job_matcher.calculate_job_compatibility(resume, job)
+    return {'success': 'average_salary' in compatibility['market_data']}
+
+
+def bench_latency(corpus: Dict, args) -> Dict:
+    """Wall time of each analysis run one at a time, plus the per-stage breakdown from metrics"""
+    from metrics import metrics
+
+    assistant = make_assistant(args)
+    metrics.reset()
+    results = {}
+    call = 0
+    for name, operation in _operations(corpus).items():
+        samples, errors = [], 0
+        for _ in range(args.iterations):
+            call += 1
+            start = time.perf_counter()
+            outcome = operation(assistant, call)
+            samples.append(time.perf_counter() - start)
+            errors += 0 if outcome.get('success') else 1
+        results[name] = dict(summarize(samples), errors=errors)
+
+    first_chunk, total = [], []
+    for _ in range(args.iterations):
+        call += 1
+        start = time.perf_counter()
+        stream = assistant.analyze_resume_stream(corpus['resumes'][call % len(corpus['resumes'])])
+        for index, _chunk in enumerate(stream):
+            if index == 0:
+                first_chunk.append(time.perf_counter() - start)
+        total.append(time.perf_counter() - start)
+    results['analyze_resume_stream'] = dict(summarize(total), first_chunk=summarize(first_chunk))
+
+    results['stages'] = [row for row in metrics.snapshot() if row['type'] == 'duration']
+    return results
+
+
+def bench_throughput(corpus: Dict, args) -> Dict:
+    """Sessions (resume analysis + job match + company research) completed per second at each concurrency level"""
+    operations = _operations(corpus)
+    steps = [operations['analyze_resume'], operations['match_jobs'], operations['research_company']]
+    results = {}
+    offset = 100000  # keep inputs distinct from the latency suite
+    for sessions in args.sessions:
+        assistant = make_assistant(args)
+        total = sessions * args.rounds
+
+        def session(index, assistant=assistant):
+            start = time.perf_counter()
+            failures = sum(0 if step(assistant, offset + index).get('success') else 1 for step in steps)
+            return time.perf_counter() - start, failures
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            outcomes = list(pool.map(session, range(total)))
+        wall = time.perf_counter() - start
+        offset += total
+
+        results[str(sessions)] = dict(
+            summarize([elapsed for elapsed, _ in outcomes]),
+            sessions=total,
+            wall_s=round(wall, 3),
+            sessions_per_s=round(total / wall, 3),
+            requests_per_s=round(total * len(steps) / wall, 3),
+            errors=sum(failures for _, failures in outcomes),
+        )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print p50 / throughput changes against a baseline report; returns the regressions"""
+    rows = []
+    for suite in ('micro', 'latency'):
+        for name, current in report.get(suite, {}).items():
+            previous = baseline.get(suite, {}).get(name)
+            if isinstance(current, dict) and isinstance(previous, dict) and previous.get('p50_ms'):
+                # Lower is better: positive change is a slowdown
+                rows.append((f"{suite}.{name}.p50_ms", previous['p50_ms'], current['p50_ms'],
+                             current['p50_ms'] / previous['p50_ms'] - 1))
+    for sessions, current in report.get('throughput', {}).items():
+        previous = baseline.get('throughput', {}).get(sessions)
+        if previous and previous.get('sessions_per_s'):
+            # Higher is better: flip the sign so positive still means worse
+            rows.append((f"throughput.{sessions}.sessions_per_s", previous['sessions_per_s'], current['sessions_per_s'],
+                         1 - current['sessions_per_s'] / previous['sessions_per_s']))
+
+    regressions = []
+    print(f"{'metric':60} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for metric, before, after, worse_by in rows:
+        flag = ''
+        if worse_by > threshold:
+            flag = '  REGRESSION'
+            regressions.append(metric)
+        print(f"{metric:60} {before:>12} {after:>12} {worse_by:>+8.1%}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--corpus', type=int, default=30, help="synthetic resumes/jobs to generate")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the corpus per microbenchmark")
+    parser.add_argument('--iterations', type=int, default=5, help="calls per analysis in the latency suite")
+    parser.add_argument('--sessions', type=lambda value: [int(n) for n in value.split(',')], default=[1, 4, 8],
+                        help="comma-separated concurrency levels for the throughput suite")
+    parser.add_argument('--rounds', type=int, default=2, help="sessions per worker at each concurrency level")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="fake model seconds per call")
+    parser.add_argument('--response-tokens', type=int, default=400)
+    parser.add_argument('--http-latency', type=float, default=0.15, help="fake provider seconds per request")
+    parser.add_argument('--rpm', type=float, default=0, help="LLM requests/minute limit (0 = unlimited)")
+    parser.add_argument('--tpm', type=float, default=0, help="LLM tokens/minute limit (0 = unlimited)")
+    parser.add_argument('--output', help="also write the report to this file")
+    parser.add_argument('--compare', help="baseline report to diff against; exits 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    os.environ.update(PROVIDER_ENV)
+    corpus = build_corpus(args.corpus, args.seed)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        }
+    }
+    suites = {'micro': bench_micro, 'latency': bench_latency, 'throughput': bench_throughput}
+    for name in SUITES:
+        if name in args.suite:
+            report[name] = suites[name](corpus, args)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            regressions = compare(report, json.load(handle), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,17 @@
-from typing import Dict, List, Optional
-from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.document_loaders import PyPDFLoader
+from typing import Callable, Dict, Iterator, List, Optional
+import contextvars
 import os
+import re
+import threading
+from functools import cached_property
 from dotenv import load_dotenv
-import tempfile
-import requests
-from bs4 import BeautifulSoup
-from advanced_tools import CompanyResearcher, JobMatcher, InterviewPrep, ResumeAnalyzer
-import pdfplumber
+from job_queue import JobCancelled
+from llm_cache import LLMResponseCache, cache_from_env, make_cache_key
+from metrics import metrics, timed
+from llm_scheduler import BATCH, LLMScheduler, call_priority, scheduler_from_env
+from prompt_builder import JOB_SECTIONS, RESUME_SECTIONS, PromptBuilder, count_tokens
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import streamlit as st
 
 # Load environment variables
@@ -26,531 +28,631 @@ def get_api_key(key_name: str) -> str:
     except:
         return os.getenv(key_name, '')
 
-# HTML cleaning function
+# HTML cleaning: one tokenizer pass over tags and entities (both start with a literal
+# '<' or '&', so plain markdown is scanned at C speed), then whitespace normalization
+_HTML_TOKEN = re.compile(r'<(?P<tag>/?[a-zA-Z!][^>]*)>|&(?P<entity>lt;/?[a-zA-Z][^&]*?&gt|#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);')
+_TAG_NAME = re.compile(r'/?([a-zA-Z0-9]*)')
+_ATTRIBUTE_DEBRIS = re.compile(r'\b(?:class|id)\s*=\s*["\'][^"\'>]*["\']')
+_NEWLINE_RUN = re.compile(r'\n+')
+_SPACE_RUN = re.compile(r' {2,}')
+
+# Tags that carry formatting; every other tag is dropped
+_HTML_TAG_REPLACEMENTS = {
+    'br': '\n', 'p': '\n',
+    'strong': '**', 'b': '**',
+    'em': '*', 'i': '*',
+}
+
+_HTML_ENTITIES = {
+    'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'", 'nbsp': ' '
+}
+
+def _replace_html_token(match) -> str:
+    tag = match.group('tag')
+    if tag is not None:
+        return _HTML_TAG_REPLACEMENTS.get(_TAG_NAME.match(tag).group(1).lower(), '')
+    
+    entity = match.group('entity')
+    if entity[0] == '#':
+        try:
+            return chr(int(entity[2:], 16) if entity[1] in 'xX' else int(entity[1:]))
+        except (ValueError, OverflowError):
+            return match.group()
+    if entity.startswith('lt;'):
+        return ''  # escaped tag such as &lt;div&gt;
+    return _HTML_ENTITIES.get(entity.lower(), match.group())
+
+@timed('sanitization')
 def clean_html_tags(text: str) -> str:
     """Remove HTML tags and clean formatting from text"""
     if not isinstance(text, str):
         return str(text)
     
-    # Remove common HTML tags including those with attributes
-    import re
-    
-    # Aggressive div tag removal
-    text = re.sub(r'<div[^>]*>', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'</div>', '', text, flags=re.IGNORECASE)
-    
-    # Remove any remaining div-like patterns with any attributes
-    text = re.sub(r'<div\s*class\s*=\s*["\'][^"\'>]*["\'][^>]*>', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'</?div[^>]*>', '', text, flags=re.IGNORECASE)
-    
-    # Remove literal div text that might appear
-    text = re.sub(r'&lt;div[^&]*&gt;', '', text)
-    text = re.sub(r'&lt;/div&gt;', '', text)
-    
-    # Remove other HTML tags
-    text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-    text = text.replace('<p>', '').replace('</p>', '\n')
-    text = re.sub(r'</?p[^>]*>', '\n', text)
-    text = re.sub(r'<span[^>]*>', '', text)
-    text = text.replace('</span>', '')
-    text = text.replace('<strong>', '**').replace('</strong>', '**')
-    text = text.replace('<b>', '**').replace('</b>', '**')
-    text = text.replace('<em>', '*').replace('</em>', '*')
-    text = text.replace('<i>', '*').replace('</i>', '*')
-    
-    # Remove any remaining HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Remove HTML entities
-    text = text.replace('&nbsp;', ' ')
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
-    text = text.replace('&quot;', '"')
-    
-    # Remove any leftover HTML-like patterns
-    text = re.sub(r'\s*<[^>]*>\s*', ' ', text)
-    
-    # Clean up common problematic patterns that might slip through
-    text = re.sub(r'class\s*=\s*["\'][^"\'>]*["\']', '', text)
-    text = re.sub(r'id\s*=\s*["\'][^"\'>]*["\']', '', text)
-    text = text.replace('&quot;', '"')
-    text = text.replace('&#39;', "'")
-    
-    # Clean up extra whitespace
-    text = re.sub(r'\n+', '\n\n', text)  # Replace multiple newlines with double newlines
-    text = re.sub(r' +', ' ', text)      # Replace multiple spaces with single space
-    
+    text = _HTML_TOKEN.sub(_replace_html_token, text)
+    if '=' in text:
+        text = _ATTRIBUTE_DEBRIS.sub('', text)
+    text = _NEWLINE_RUN.sub('\n\n', text)  # Replace multiple newlines with double newlines
+    text = _SPACE_RUN.sub(' ', text)        # Replace multiple spaces with single space
     return text.strip()
 
-# Initialize Gemini model with error handling
-try:
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=get_api_key("GOOGLE_API_KEY"),
-        temperature=0.3
-    )
-except Exception as e:
-    print(f"Error initializing Gemini: {e}")
-    llm = None
+# LangChain, pdfplumber and pandas are imported on first use so the app
+# (and the Home page) starts without loading the AI stack
+_llm = None
+_llm_loaded = False
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Build the Gemini model on first call; None if it can't be initialized"""
+    global _llm, _llm_loaded
+    if _llm_loaded:
+        return _llm
+    with _llm_lock:
+        if not _llm_loaded:
+            try:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                _llm = ChatGoogleGenerativeAI(
+                    model="gemini-2.5-flash",
+                    google_api_key=get_api_key("GOOGLE_API_KEY"),
+                    temperature=0.3,
+                    max_retries=1  # no SDK retries; the scheduler retries 429s with shared backoff
+                )
+            except Exception as e:
+                print(f"Error initializing Gemini: {e}")
+                _llm = None
+            _llm_loaded = True
+    return _llm
+
+def extract_text_from_pdf(uploaded_file, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                          processes: int = 0):
+    """Extract text from uploaded PDF (see pdf_extraction.extract_text_from_pdf)"""
+    from pdf_extraction import extract_text_from_pdf as extract
+    return extract(uploaded_file, max_pages, max_chars, processes)
+
+def message_text(message) -> str:
+    """Text of a LangChain message or chunk, whether content is a string or content blocks"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+class AnalysisInputError(ValueError):
+    """Raised by request builders when the input can't be analyzed"""
+
+class AnalysisStream:
+    """Iterable of LLM text chunks; .result holds the usual result dict once exhausted"""
+    
+    def __init__(self, chunks: Optional[Iterator[str]], finish=None, failure: str = "Analysis failed"):
+        self._chunks = chunks
+        self._finish = finish
+        self._failure = failure
+        self.result = None
+    
+    @classmethod
+    def failed(cls, result: Dict) -> "AnalysisStream":
+        stream = cls(None)
+        stream.result = result
+        return stream
+    
+    def __iter__(self) -> Iterator[str]:
+        if self._chunks is None:
+            return
+        parts = []
+        try:
+            for chunk in self._chunks:
+                parts.append(chunk)
+                yield chunk
+            self.result = self._finish("".join(parts))
+        except Exception as e:
+            self.result = {"error": f"{self._failure}: {str(e)}"}
+        finally:
+            self._chunks = None
 
 # Simplified Career Assistant Class with all interconnected features
 class CareerAssistant:
-    def __init__(self):
-        self.llm = llm
-        self.company_researcher = CompanyResearcher()
-        self.job_matcher = JobMatcher()
-        self.interview_prep = InterviewPrep()
-        self.resume_analyzer = ResumeAnalyzer()
+    # Cache lifetime (seconds) per method; company research goes stale fastest
+    LLM_CACHE_TTLS = {
+        "analyze_resume": 24 * 3600,
+        "match_jobs": 24 * 3600,
+        "research_company": 6 * 3600,
+        "prepare_interview": 24 * 3600,
+        "comprehensive_summary": 24 * 3600,
+    }
+    
+    # Whole-prompt token budgets; documents get whatever the instructions leave
+    PROMPT_TOKEN_BUDGETS = {
+        "analyze_resume": 850,
+        "match_jobs": 950,
+        "research_company": 900,
+        "prepare_interview": 1000,
+        "comprehensive_summary": 400,
+    }
+    
+    def __init__(self, response_cache: Optional[LLMResponseCache] = None, scheduler: Optional[LLMScheduler] = None):
+        self._llm_override = None
+        self.response_cache = response_cache if response_cache is not None else cache_from_env()
+        self.scheduler = scheduler if scheduler is not None else scheduler_from_env()
+    
+    @property
+    def llm(self):
+        """The shared Gemini model, built on first access unless one was assigned"""
+        if self._llm_override is not None:
+            return self._llm_override
+        return get_llm()
+    
+    @llm.setter
+    def llm(self, value):
+        self._llm_override = value
+    
+    @cached_property
+    def company_researcher(self):
+        from advanced_tools import CompanyResearcher
+        return CompanyResearcher()
+    
+    @cached_property
+    def job_matcher(self):
+        from advanced_tools import JobMatcher
+        return JobMatcher()
+    
+    @cached_property
+    def interview_prep(self):
+        from advanced_tools import InterviewPrep
+        return InterviewPrep()
+    
+    @cached_property
+    def semantic_matcher(self):
+        from semantic_matcher import semantic_matcher_from_env
+        return semantic_matcher_from_env()
+    
+    @cached_property
+    def resume_analyzer(self):
+        from advanced_tools import ResumeAnalyzer
+        return ResumeAnalyzer()
+    
+    def _invoke_llm(self, prompt: str, method: str) -> str:
+        """Call the LLM through the response cache and return the text content"""
+        key = make_cache_key(getattr(self.llm, 'model', ''), getattr(self.llm, 'temperature', None), prompt)
+        cached = self.response_cache.get(key)
+        metrics.increment('llm_cache', method=method, result='miss' if cached is None else 'hit')
+        if cached is not None:
+            return cached
         
-    def analyze_resume(self, resume_text: str) -> Dict:
-        """Comprehensive resume analysis with all advanced features"""
+        from langchain_core.messages import HumanMessage
+        llm = self.llm
+        prompt_tokens = count_tokens(prompt)
+        with metrics.timed('llm_call', method=method):
+            response = self.scheduler.run(lambda: llm.invoke([HumanMessage(content=prompt)]), prompt_tokens)
+        content = message_text(response)
+        self._record_tokens(method, prompt_tokens, content, getattr(response, 'usage_metadata', None))
+        self.response_cache.set(key, content, ttl=self.LLM_CACHE_TTLS.get(method))
+        return content
+    
+    def _stream_llm(self, prompt: str, method: str) -> Iterator[str]:
+        """Yield LLM text chunks as they arrive; the full text is cached at the end"""
+        key = make_cache_key(getattr(self.llm, 'model', ''), getattr(self.llm, 'temperature', None), prompt)
+        cached = self.response_cache.get(key)
+        metrics.increment('llm_cache', method=method, result='miss' if cached is None else 'hit')
+        if cached is not None:
+            yield cached
+            return
+        
+        from langchain_core.messages import HumanMessage
+        llm = self.llm
+        prompt_tokens = count_tokens(prompt)
+        parts = []
+        usage = None
+        start = time.perf_counter()
+        for chunk in self.scheduler.stream(lambda: llm.stream([HumanMessage(content=prompt)]), prompt_tokens):
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+            text = message_text(chunk)
+            if text:
+                if not parts:
+                    metrics.observe('llm_first_chunk', time.perf_counter() - start, method=method)
+                parts.append(text)
+                yield text
+        metrics.observe('llm_call', time.perf_counter() - start, method=method)
+        content = "".join(parts)
+        self._record_tokens(method, prompt_tokens, content, usage)
+        self.response_cache.set(key, content, ttl=self.LLM_CACHE_TTLS.get(method))
+    
+    @staticmethod
+    def _record_tokens(method: str, prompt_tokens: int, content: str, usage: Optional[Dict]):
+        """Count prompt/response tokens, preferring the provider's usage report over our estimate"""
+        usage = usage if isinstance(usage, dict) else {}
+        metrics.increment('llm_tokens', usage.get('input_tokens') or prompt_tokens, method=method, kind='prompt')
+        metrics.increment('llm_tokens', usage.get('output_tokens') or count_tokens(content), method=method, kind='response')
+    
+    def _run_analysis(self, method: str, failure: str, build_request, *args) -> Dict:
+        """Build a request, call the LLM once and shape the result dict"""
         if not self.llm:
             return {"error": "AI model not available"}
-            
-        if not resume_text:
-            return {"error": "No resume text provided"}
         
         try:
-            # Use advanced resume analyzer
-            ats_analysis = self.resume_analyzer.calculate_ats_score(resume_text)
-            skills = self.job_matcher.extract_skills_from_text(resume_text)
-            
-            prompt = f"""
-            Analyze this resume with comprehensive detail:
-            
-            Resume Text: {resume_text[:2000]}...
-            
-            ATS Analysis Data:
-            - ATS Score: {ats_analysis['score']}/100
-            - Issues Found: {', '.join(ats_analysis['issues']) if ats_analysis['issues'] else 'None'}
-            
-            Extracted Skills: {', '.join(skills)}
-            
-            Provide detailed analysis:
-            
-            ## 📊 Resume Analysis Report
-            
-            ### Skills Assessment
-            - Technical skills identified and proficiency levels
-            - Soft skills and leadership qualities
-            - Industry-specific competencies
-            
-            ### Experience Evaluation
-            - Career level assessment (Junior/Mid/Senior)
-            - Years of experience estimation
-            - Career progression analysis
-            
-            ### ATS Optimization
-            - Current ATS compatibility score: {ats_analysis['score']}/100
-            - Specific formatting improvements needed
-            - Missing keywords for better visibility
-            
-            ### Content Quality Review
-            - Strengths and standout achievements
-            - Areas requiring improvement
-            - Missing critical sections
-            
-            ### Market Competitiveness
-            - Overall market readiness score (1-10)
-            - Comparison to industry standards
-            - Competitive advantages identified
-            
-            ### Action Plan
-            - Top 5 specific improvements to implement
-            - Keywords to add for better ATS performance
-            - Recommended next steps
-            
-            Format with clear sections, bullet points, and specific recommendations.
-            """
-            
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            
+            with metrics.timed('analysis', method=method):
+                with metrics.timed('prompt_build', method=method):
+                    prompt, finish = build_request(*args)
+                return finish(self._invoke_llm(prompt, method))
+        except AnalysisInputError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            metrics.increment('analysis_errors', method=method)
+            return {"error": f"{failure}: {str(e)}"}
+    
+    def _stream_analysis(self, method: str, failure: str, build_request, *args) -> "AnalysisStream":
+        """Like _run_analysis but returns an AnalysisStream over the LLM output"""
+        if not self.llm:
+            return AnalysisStream.failed({"error": "AI model not available"})
+        
+        try:
+            with metrics.timed('prompt_build', method=method):
+                prompt, finish = build_request(*args)
+        except AnalysisInputError as e:
+            return AnalysisStream.failed({"error": str(e)})
+        except Exception as e:
+            metrics.increment('analysis_errors', method=method)
+            return AnalysisStream.failed({"error": f"{failure}: {str(e)}"})
+        
+        return AnalysisStream(self._stream_llm(prompt, method), finish, failure)
+    
+    def analyze_resume(self, resume_text: str) -> Dict:
+        """Comprehensive resume analysis with all advanced features"""
+        return self._run_analysis("analyze_resume", "Analysis failed", self._resume_analysis_request, resume_text)
+    
+    def analyze_resume_stream(self, resume_text: str) -> "AnalysisStream":
+        """Streaming variant of analyze_resume; iterate for text chunks, then read .result"""
+        return self._stream_analysis("analyze_resume", "Analysis failed", self._resume_analysis_request, resume_text)
+    
+    def _resume_analysis_request(self, resume_text: str):
+        """Build the analyze_resume prompt and the function that turns the LLM text into the result dict"""
+        if not resume_text:
+            raise AnalysisInputError("No resume text provided")
+        
+        # Use advanced resume analyzer
+        from advanced_tools import get_document_features
+        resume = get_document_features(resume_text)
+        ats_analysis = resume.ats
+        skills = resume.skills
+        
+        prompt = (PromptBuilder("resume_analysis", self.PROMPT_TOKEN_BUDGETS["analyze_resume"])
+                  .add_field("ATS Score", f"{ats_analysis['score']}/100")
+                  .add_field("ATS Issues Found", ats_analysis['issues'] or "None")
+                  .add_field("Extracted Skills", skills)
+                  .add_document("Resume", resume_text, RESUME_SECTIONS, keywords=skills)
+                  .build({"ats_score": ats_analysis['score']}))
+        
+        def finish(response_text: str) -> Dict:
             return {
                 "success": True,
-                "analysis": clean_html_tags(response.content),
+                "analysis": clean_html_tags(response_text),
                 "ats_score": ats_analysis['score'],
                 "extracted_skills": skills,
+                "skill_categories": ats_analysis['skill_categories'],
                 "issues": ats_analysis['issues']
             }
-            
-        except Exception as e:
-            return {"error": f"Analysis failed: {str(e)}"}
+        
+        return prompt, finish
     
     def match_jobs(self, resume_text: str, job_description: str = "") -> Dict:
         """Advanced job matching with role compatibility analysis"""
-        if not self.llm:
-            return {"error": "AI model not available"}
-            
-        try:
-            # Extract skills from resume
-            resume_skills = self.job_matcher.extract_skills_from_text(resume_text)
-            job_skills = self.job_matcher.extract_skills_from_text(job_description) if job_description else []
-            
-            # Calculate compatibility
-            compatibility = self.job_matcher.calculate_job_compatibility(resume_text, job_description) if job_description else {"score": 0}
-            
-            prompt = f"""
-            Perform advanced job matching analysis:
-            
-            Resume Skills: {', '.join(resume_skills)}
-            Job Requirements: {', '.join(job_skills) if job_skills else 'General market analysis'}
-            Compatibility Score: {compatibility.get('score', 0)}/100
-            
-            Resume Text: {resume_text[:1500]}...
-            {f'Job Description: {job_description[:1000]}...' if job_description else ''}
-            
-            Provide comprehensive job matching analysis:
-            
-            ## 🎯 Job Matching Report
-            
-            ### Skills Alignment
-            - Matching skills and proficiency levels
-            - Gap analysis for missing requirements
-            - Transferable skills identification
-            
-            ### Role Compatibility
-            - Overall fit score: {compatibility.get('score', 'N/A')}/100
-            - Experience level match
-            - Industry alignment assessment
-            
-            ### Market Opportunities
-            - Recommended job titles and roles
-            - Growth industries for your skillset
-            - Salary expectations and ranges
-            
-            ### Skill Development Plan
-            - Priority skills to develop
-            - Recommended certifications
-            - Learning resources and timeline
-            
-            ### Application Strategy
-            - How to position yourself for target roles
-            - Keywords to emphasize
-            - Portfolio/project recommendations
-            
-            Provide specific, actionable recommendations.
-            """
-            
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            
+        return self._run_analysis("match_jobs", "Job matching failed", self._job_match_request, resume_text, job_description)
+    
+    def match_jobs_stream(self, resume_text: str, job_description: str = "") -> "AnalysisStream":
+        """Streaming variant of match_jobs; iterate for text chunks, then read .result"""
+        return self._stream_analysis("match_jobs", "Job matching failed", self._job_match_request, resume_text, job_description)
+    
+    def _job_match_request(self, resume_text: str, job_description: str = ""):
+        """Build the match_jobs prompt and the function that turns the LLM text into the result dict"""
+        # Skills come from the shared per-document memo, so nothing is extracted twice
+        from advanced_tools import get_document_features
+        resume_skills = get_document_features(resume_text).skills
+        job_skills = get_document_features(job_description).skills if job_description else []
+        
+        # Calculate compatibility (market data isn't part of the prompt, so skip the Adzuna call)
+        compatibility = self.job_matcher.calculate_job_compatibility(resume_text, job_description, include_market_data=False) if job_description else {"score": 0}
+        
+        # The resume gets the larger share; both sides favour sections that mention the job's skills
+        prompt = (PromptBuilder("job_matching", self.PROMPT_TOKEN_BUDGETS["match_jobs"])
+                  .add_field("Resume Skills", resume_skills)
+                  .add_field("Job Requirements", job_skills or "General market analysis")
+                  .add_field("Compatibility Score", f"{compatibility.get('score', 0)}/100")
+                  .add_document("Resume", resume_text, RESUME_SECTIONS, keywords=job_skills, weight=0.6)
+                  .add_document("Job Description", job_description, JOB_SECTIONS, keywords=job_skills, weight=0.4)
+                  .build({"compatibility_score": compatibility.get('score', 'N/A')}))
+        
+        def finish(response_text: str) -> Dict:
             return {
                 "success": True,
-                "analysis": response.content,
+                "analysis": clean_html_tags(response_text),
                 "resume_skills": resume_skills,
                 "job_skills": job_skills,
                 "compatibility_score": compatibility.get('score', 0)
             }
-            
-        except Exception as e:
-            return {"error": f"Job matching failed: {str(e)}"}
+        
+        return prompt, finish
     
-    def research_company(self, company_name: str, resume_text: str = "") -> Dict:
-        """Advanced company research with market intelligence"""
-        if not self.llm:
-            return {"error": "AI model not available"}
-            
+    def batch_match_jobs(self, resumes: Dict[str, str], jobs: Dict[str, str], top_k: int = 0) -> Dict:
+        """Rank many resumes against many job descriptions
+        
+        Scoring is pure skill-matrix math; the LLM narrative from match_jobs
+        is only generated for the top_k resumes of each job.
+        """
         try:
-            # Use advanced company researcher
-            company_data = self.company_researcher.get_company_info(company_name)
-            
-            prompt = f"""
-            Comprehensive Company Research for Interview Preparation:
-            
-            COMPANY: {company_name}
-            
-            RECENT NEWS & DEVELOPMENTS:
-            {chr(10).join([f"• {news['title']}: {news['description']}" for news in company_data['recent_news']])}
-            
-            MARKET INTELLIGENCE:
-            {company_data['research_summary']}
+            ranking = self.job_matcher.rank_resumes(resumes, jobs)
+            ranking["analysis"] = None
             
-            {f'CANDIDATE PROFILE: {resume_text[:1000]}...' if resume_text else ''}
-            
-            Provide detailed interview preparation guide:
-            
-            ## 🏢 Company Intelligence Report
-            
-            ### Company Overview
-            - Mission, vision, and core values
-            - Business model and key products/services
-            - Market position and competitive advantages
-            - Leadership team and organizational structure
-            
-            ### Recent Developments
-            - Latest news and announcements
-            - Growth initiatives and strategic moves
-            - Financial performance and market trends
-            - Industry challenges and opportunities
-            
-            ### Culture & Work Environment
-            - Company culture and values assessment
-            - Work-life balance and employee benefits
-            - Diversity and inclusion initiatives
-            - Employee satisfaction and retention
-            
-            ### Interview Intelligence
-            - Typical interview process and timeline
-            - Common interview questions for this company
-            - Assessment criteria and what they value
-            - Decision-making factors and priorities
-            
-            ### Strategic Talking Points
-            - How to align your experience with their needs
-            - Key achievements to highlight
-            - Questions to ask your interviewer
-            - Value proposition positioning
-            
-            ### Salary & Benefits Analysis
-            - Market rate expectations for roles
-            - Benefits and perks typically offered
-            - Negotiation strategies and timing
-            - Total compensation benchmarks
-            
-            ### Risk Assessment
-            - Company challenges or potential concerns
-            - Industry headwinds and market risks
-            - Growth sustainability analysis
-            
-            Make it comprehensive and interview-focused with specific, actionable insights.
-            """
-            
-            response = self.llm.invoke([HumanMessage(content=prompt)])
+            if top_k > 0 and self.llm:
+                with call_priority(BATCH):
+                    self._narrate_top_matches(ranking, resumes, jobs, top_k)
             
             return {
                 "success": True,
-                "analysis": clean_html_tags(response.content),
-                "recent_news": company_data['recent_news'],
-                "company_summary": company_data['research_summary']
+                "ranking": ranking,
+                "total_pairs": len(ranking)
             }
             
         except Exception as e:
-            return {"error": f"Company research failed: {str(e)}"}
+            return {"error": f"Batch matching failed: {str(e)}"}
     
-    def prepare_interview(self, job_description: str, company_name: str = "", resume_text: str = "") -> Dict:
-        """Advanced interview preparation with role-specific questions"""
-        if not self.llm:
-            return {"error": "AI model not available"}
-            
+    def _narrate_top_matches(self, ranking, resumes: Dict[str, str], jobs: Dict[str, str], top_k: int):
+        """Fill in the match_jobs narrative for the top_k resumes of each job"""
+        for index, row in ranking[ranking["rank"] <= top_k].iterrows():
+            result = self.match_jobs(resumes[row["resume_id"]], jobs[row["job_id"]])
+            ranking.at[index, "analysis"] = result.get("analysis") if result.get("success") else result.get("error")
+    
+    def semantic_match_jobs(self, resume_text: str, job_description: str, top_k: int = 3) -> Dict:
+        """Embedding-based requirement-to-evidence alignment; no LLM call
+        
+        Catches synonyms and related experience that the exact skill
+        intersection of match_jobs misses.
+        """
         try:
-            # Use advanced interview prep
-            role_questions = self.interview_prep.generate_questions_by_role(job_description)
-            
-            prompt = f"""
-            Advanced Interview Preparation Guide:
-            
-            JOB ROLE: {job_description[:1000]}...
-            COMPANY: {company_name}
-            
-            ROLE-SPECIFIC QUESTIONS BANK:
-            Technical Questions: {', '.join(role_questions.get('technical', []))}
-            Behavioral Questions: {', '.join(role_questions.get('behavioral', []))}
-            
-            {f'CANDIDATE PROFILE: {resume_text[:1000]}...' if resume_text else ''}
-            
-            Create comprehensive interview preparation:
-            
-            ## 🎯 Interview Preparation Masterplan
-            
-            ### Technical Interview Questions (15+ questions)
-            - Role-specific technical questions with difficulty levels
-            - Problem-solving scenarios and case studies
-            - System design questions (if applicable)
-            - Code challenges and algorithmic thinking
-            - Industry-specific technical assessments
-            
-            ### Behavioral Interview Questions (12+ questions)
-            - Leadership and teamwork scenarios
-            - Conflict resolution and problem-solving
-            - Achievement stories and failure recovery
-            - Motivation, career goals, and culture fit
-            - Situational judgment and decision-making
-            
-            ### Company-Specific Questions (8+ questions)
-            - Why this company and role specifically?
-            - How do you align with company values?
-            - Knowledge about products, services, and market
-            - Understanding of company challenges and opportunities
-            
-            ### STAR Method Frameworks
-            - Complete templates for behavioral answers
-            - Example responses for common scenarios
-            - How to structure compelling, memorable stories
-            - Quantifiable achievement examples
-            
-            ### Strategic Questions to Ask Interviewer
-            - About the role, team dynamics, and expectations
-            - About company culture, growth, and challenges
-            - About career development and advancement paths
-            - About success metrics and performance evaluation
-            
-            ### Salary Negotiation Masterclass
-            - Market research and salary ranges analysis
-            - Total compensation package negotiation
-            - When and how to discuss compensation
-            - Counter-offer strategies and alternatives
-            
-            ### Interview Day Excellence
-            - Professional presentation and logistics
-            - Confidence-building techniques and mindset
-            - Follow-up strategies and timeline
-            - Thank you note templates and best practices
-            
-            ### Mock Interview Practice Plan
-            - Key scenarios to practice repeatedly
-            - Common mistakes to avoid at all costs
-            - Recording and self-assessment techniques
-            - Peer practice and feedback incorporation
-            
-            Make it detailed, practical, and specifically tailored to this role and company.
-            """
-            
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            
-            return {
-                "success": True,
-                "analysis": response.content,
-                "technical_questions": role_questions.get('technical', []),
-                "behavioral_questions": role_questions.get('behavioral', [])
-            }
-            
+            return {"success": True, **self.semantic_matcher.align(resume_text, job_description, top_k)}
         except Exception as e:
-            return {"error": f"Interview preparation failed: {str(e)}"}
+            return {"error": f"Semantic matching failed: {str(e)}"}
     
-    def comprehensive_career_analysis(self, resume_text: str, job_description: str = "", company_name: str = "") -> Dict:
-        """Complete end-to-end career analysis combining all tools"""
-        if not self.llm:
-            return {"error": "AI model not available"}
-            
+    def index_job_descriptions(self, jobs: Dict[str, str]) -> Dict:
+        """Add job descriptions to the local vector index searched by find_similar_jobs"""
         try:
-            results = {}
-            
-            # Step 1: Resume Analysis
-            resume_result = self.analyze_resume(resume_text)
-            if resume_result.get("success"):
-                results["resume_analysis"] = resume_result
-            
-            # Step 2: Job Matching (if job provided)
-            if job_description:
-                job_result = self.match_jobs(resume_text, job_description)
-                if job_result.get("success"):
-                    results["job_matching"] = job_result
-            
-            # Step 3: Company Research (if company provided)
-            if company_name:
-                company_result = self.research_company(company_name, resume_text)
-                if company_result.get("success"):
-                    results["company_research"] = company_result
-            
-            # Step 4: Interview Preparation (if job and/or company provided)
-            if job_description or company_name:
-                interview_result = self.prepare_interview(job_description, company_name, resume_text)
-                if interview_result.get("success"):
-                    results["interview_prep"] = interview_result
-            
-            # Step 5: Comprehensive Summary
-            summary_prompt = f"""
-            Create a comprehensive career strategy summary based on all analysis:
-            
-            ## 🚀 Complete Career Strategy Report
-            
-            ### Executive Summary
-            - Overall career readiness assessment
-            - Key strengths and competitive advantages
-            - Priority areas for improvement
-            - Strategic career positioning
-            
-            ### Integrated Action Plan
-            - Immediate actions (next 1-2 weeks)
-            - Short-term goals (next 1-3 months)
-            - Long-term career strategy (6-12 months)
-            - Success metrics and milestones
-            
-            ### Market Positioning Strategy
-            - How to position yourself in the current market
-            - Industry trends and opportunities alignment
-            - Personal brand development recommendations
-            - Networking and visibility strategies
-            
-            ### Next Steps Prioritization
-            1. Top priority actions with deadlines
-            2. Resource requirements and investments
-            3. Success tracking and measurement
-            4. Contingency planning and alternatives
-            
-            Provide a cohesive, strategic overview that connects all analyses.
-            """
-            
-            summary_response = self.llm.invoke([HumanMessage(content=summary_prompt)])
-            results["comprehensive_summary"] = {
+            total = self.semantic_matcher.add_jobs(jobs)
+            return {"success": True, "indexed": len(jobs), "total_jobs": total}
+        except Exception as e:
+            return {"error": f"Job indexing failed: {str(e)}"}
+    
+    def find_similar_jobs(self, resume_text: str, k: int = 10, align_top: int = 0) -> Dict:
+        """Nearest stored job descriptions for a resume, with alignments for the first align_top"""
+        try:
+            matcher = self.semantic_matcher
+            results = matcher.search(resume_text, k)
+            for result in results[:align_top]:
+                requirements = "\n".join("- " + requirement for requirement in matcher.jobs.get(result["job_id"], []))
+                result["alignment"] = matcher.align(resume_text, requirements)
+            return {"success": True, "results": results, "total_jobs": len(matcher.jobs)}
+        except Exception as e:
+            return {"error": f"Job search failed: {str(e)}"}
+    
+    def research_company(self, company_name: str, resume_text: str = "") -> Dict:
+        """Advanced company research with market intelligence"""
+        return self._run_analysis("research_company", "Company research failed", self._company_research_request, company_name, resume_text)
+    
+    def research_company_stream(self, company_name: str, resume_text: str = "") -> "AnalysisStream":
+        """Streaming variant of research_company; iterate for text chunks, then read .result"""
+        return self._stream_analysis("research_company", "Company research failed", self._company_research_request, company_name, resume_text)
+    
+    def _company_research_request(self, company_name: str, resume_text: str = ""):
+        """Build the research_company prompt and the function that turns the LLM text into the result dict"""
+        # Use advanced company researcher
+        company_data = self.company_researcher.get_company_info(company_name)
+        
+        news = "\n".join(f"• {item['title']}: {item['description']}" for item in company_data['recent_news'])
+        prompt = (PromptBuilder("company_research", self.PROMPT_TOKEN_BUDGETS["research_company"])
+                  .add_field("Company", company_name)
+                  .add_document("Recent News & Developments", news)
+                  .add_document("Market Intelligence", company_data['research_summary'])
+                  .add_document("Candidate Profile", resume_text, RESUME_SECTIONS, weight=0.5)
+                  .build())
+        
+        def finish(response_text: str) -> Dict:
+            return {
                 "success": True,
-                "analysis": summary_response.content
+                "analysis": clean_html_tags(response_text),
+                "recent_news": company_data['recent_news'],
+                "company_summary": company_data['research_summary'],
+                "data_sources": company_data.get('sources', {})
             }
-            
+        
+        return prompt, finish
+    
+    def prepare_interview(self, job_description: str, company_name: str = "", resume_text: str = "") -> Dict:
+        """Advanced interview preparation with role-specific questions"""
+        return self._run_analysis("prepare_interview", "Interview preparation failed", self._interview_prep_request, job_description, company_name, resume_text)
+    
+    def prepare_interview_stream(self, job_description: str, company_name: str = "", resume_text: str = "") -> "AnalysisStream":
+        """Streaming variant of prepare_interview; iterate for text chunks, then read .result"""
+        return self._stream_analysis("prepare_interview", "Interview preparation failed", self._interview_prep_request, job_description, company_name, resume_text)
+    
+    def _interview_prep_request(self, job_description: str, company_name: str = "", resume_text: str = ""):
+        """Build the prepare_interview prompt and the function that turns the LLM text into the result dict"""
+        # Use advanced interview prep
+        role_questions = self.interview_prep.generate_questions_by_role(job_description)
+        
+        prompt = (PromptBuilder("interview_prep", self.PROMPT_TOKEN_BUDGETS["prepare_interview"])
+                  .add_field("Company", company_name)
+                  .add_field("Technical Questions Bank", role_questions.get('technical', []))
+                  .add_field("Behavioral Questions Bank", role_questions.get('behavioral', []))
+                  .add_document("Job Role", job_description, JOB_SECTIONS)
+                  .add_document("Candidate Profile", resume_text, RESUME_SECTIONS, weight=0.6)
+                  .build())
+        
+        def finish(response_text: str) -> Dict:
             return {
                 "success": True,
-                "results": results,
-                "total_components": len(results)
+                "analysis": clean_html_tags(response_text),
+                "technical_questions": role_questions.get('technical', []),
+                "behavioral_questions": role_questions.get('behavioral', [])
             }
-            
-        except Exception as e:
-            return {"error": f"Comprehensive analysis failed: {str(e)}"}
-
-# Utility functions for PDF extraction
-def extract_text_from_pdf(uploaded_file):
-    """Extract text from uploaded PDF using multiple robust methods"""
-    try:
-        # Reset file pointer
-        uploaded_file.seek(0)
         
-        # Method 1: Try pdfplumber first (most reliable)
-        try:
-            with pdfplumber.open(uploaded_file) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                
-                if text.strip():
-                    return text
-        except Exception as e:
-            print(f"pdfplumber failed: {e}")
+        return prompt, finish
+    
+    def _run_analysis_steps(self, steps: Dict, concurrent: bool, max_workers: int, step_timeout: Optional[float],
+                            on_done: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """Run independent analysis steps and return {name: result dict}, errors included"""
+        outcomes = {}
         
-        # Method 2: Fallback to PyPDF2
-        try:
-            import PyPDF2
-            uploaded_file.seek(0)
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            if text.strip():
-                return text
-        except Exception as e:
-            print(f"PyPDF2 failed: {e}")
+        if not concurrent:
+            for name, (func, args) in steps.items():
+                try:
+                    outcomes[name] = func(*args)
+                except Exception as e:
+                    outcomes[name] = {"error": f"{name} failed: {str(e)}"}
+                if on_done:
+                    on_done(name, outcomes[name])
+            return outcomes
+        
+        # Fan out on a thread pool; each step is a blocking LLM/HTTP round trip
+        workers = max(1, max_workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="career-step")
+        started = {}  # name -> when a worker began running the step; its timeout counts from here
+        
+        def run_step(name: str, func: Callable, args):
+            started[name] = time.monotonic()
+            return func(*args)
+        
+        def finish(name: str, outcome: Dict):
+            outcomes[name] = outcome
+            if on_done:
+                on_done(name, outcome)
         
-        # Method 3: LangChain PyPDFLoader as last resort
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                uploaded_file.seek(0)
-                tmp_file.write(uploaded_file.read())
-                tmp_file.flush()
-                
-                loader = PyPDFLoader(tmp_file.name)
-                docs = loader.load()
-                text = "\n".join([doc.page_content for doc in docs])
+            # Each step runs in a copy of this context so the caller's LLM priority carries over
+            futures = {executor.submit(contextvars.copy_context().run, run_step, name, func, args): name
+                       for name, (func, args) in steps.items()}
+            # A step stuck past its timeout still holds its thread, so queued steps also get an
+            # overall bound: every round of max_workers steps using its full budget
+            rounds = -(-len(steps) // workers)
+            overall_deadline = time.monotonic() + step_timeout * rounds if step_timeout else None
+            pending = set(futures)
+            
+            # Completion order, so progress is reported as each step finishes rather than behind the slowest
+            while pending:
+                timeout = None
+                if step_timeout:
+                    deadlines = [started[futures[f]] + step_timeout for f in pending if futures[f] in started]
+                    timeout = max(0.0, min(deadlines + [overall_deadline]) - time.monotonic())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {"error": f"{name} failed: {str(e)}"}
+                    # Outside the try: an error from on_done (e.g. JobCancelled) must stop the run
+                    finish(name, outcome)
+                if not step_timeout:
+                    continue
                 
-                os.unlink(tmp_file.name)
-                return text
-        except Exception as e:
-            print(f"PyPDFLoader failed: {e}")
+                now = time.monotonic()
+                for future in list(pending):
+                    name = futures[future]
+                    if name in started and now - started[name] >= step_timeout:
+                        finish(name, {"error": f"{name} timed out after {step_timeout}s"})
+                    elif name not in started and now >= overall_deadline:
+                        finish(name, {"error": f"{name} did not start within {step_timeout * rounds:g}s"})
+                    else:
+                        continue
+                    future.cancel()
+                    pending.discard(future)
+        finally:
+            # Don't block on steps that overran their timeout
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return "Could not extract text from PDF. Please try a different file or check if the PDF contains selectable text."
+        return {name: outcomes[name] for name in steps}
+    
+    def comprehensive_career_analysis(self, resume_text: str, job_description: str = "", company_name: str = "",
+                                      concurrent: bool = True, max_workers: int = 4,
+                                      step_timeout: Optional[float] = 120,
+                                      progress: Optional[Callable[[float, str], None]] = None) -> Dict:
+        """Complete end-to-end career analysis combining all tools
         
-    except Exception as e:
-        return f"Error processing PDF: {str(e)}"
+        With concurrent=True the independent steps (resume, job, company, interview)
+        run in parallel on up to max_workers threads, each bounded by step_timeout
+        seconds from when it starts running (waiting for a free thread doesn't
+        count; waiting in the LLM scheduler does, up to its own queue_timeout).
+        Only the summary step waits for them. All of its LLM calls are
+        scheduled at BATCH priority, behind single interactive analyses.
+        progress(fraction, message) is called as each step finishes.
+        """
+        if not self.llm:
+            return {"error": "AI model not available"}
+            
+        with call_priority(BATCH), metrics.timed('analysis', method="comprehensive_career_analysis"):
+            try:
+                results = {}
+                errors = {}
+            
+                # Steps 1-4: independent analyses (job/company/interview only when inputs provided)
+                steps = {"resume_analysis": (self.analyze_resume, (resume_text,))}
+                if job_description:
+                    steps["job_matching"] = (self.match_jobs, (resume_text, job_description))
+                if company_name:
+                    steps["company_research"] = (self.research_company, (company_name, resume_text))
+                if job_description or company_name:
+                    steps["interview_prep"] = (self.prepare_interview, (job_description, company_name, resume_text))
+            
+                finished = []
+                
+                def step_done(name: str, outcome: Dict):
+                    finished.append(name)
+                    if progress:
+                        status = "done" if outcome.get("success") else "failed"
+                        progress(len(finished) / (len(steps) + 1), f"{name.replace('_', ' ').title()} {status}")
+                
+                if progress:
+                    progress(0.0, f"Running {len(steps)} analyses")
+                outcomes = self._run_analysis_steps(steps, concurrent, max_workers, step_timeout, step_done)
+                for name, outcome in outcomes.items():
+                    if outcome.get("success"):
+                        results[name] = outcome
+                    else:
+                        errors[name] = outcome.get("error", "Unknown error")
+            
+                # Step 5: Comprehensive Summary
+                if progress:
+                    progress(len(steps) / (len(steps) + 1), "Writing career summary")
+                summary_prompt = PromptBuilder("career_summary", self.PROMPT_TOKEN_BUDGETS["comprehensive_summary"]).build()
+            
+                summary_text = self._invoke_llm(summary_prompt, "comprehensive_summary")
+                results["comprehensive_summary"] = {
+                    "success": True,
+                    "analysis": clean_html_tags(summary_text)
+                }
+            
+                return {
+                    "success": True,
+                    "results": results,
+                    "errors": errors,
+                    "total_components": len(results)
+                }
+            
+            except JobCancelled:
+                raise
+            except Exception as e:
+                return {"error": f"Comprehensive analysis failed: {str(e)}"}
+
+_career_assistant = None
+_career_assistant_lock = threading.Lock()
+
+def get_career_assistant() -> CareerAssistant:
+    """The shared CareerAssistant, created on first call"""
+    global _career_assistant
+    if _career_assistant is None:
+        with _career_assistant_lock:
+            if _career_assistant is None:
+                _career_assistant = CareerAssistant()
+    return _career_assistant
 
-# Initialize the career assistant
-career_assistant = CareerAssistant()
\ No newline at end of file
+def __getattr__(name):
+    # Keep `from career_backend_simple import career_assistant, llm` working without import-time setup
+    if name == "career_assistant":
+        return get_career_assistant()
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,8 @@
 import streamlit as st
-from career_backend_simple import career_assistant, extract_text_from_pdf
 import json
+import sys
 import time
+import uuid
 
 # Page configuration
 st.set_page_config(
@@ -14,17 +15,9 @@ st.set_page_config(
     }
 )
 
-# Initialize session state for persistence
+# Initialize session state for the current inputs; results are kept in the history store
 if 'resume_text' not in st.session_state:
     st.session_state.resume_text = None
-if 'analysis_results' not in st.session_state:
-    st.session_state.analysis_results = {}
-if 'company_research' not in st.session_state:
-    st.session_state.company_research = {}
-if 'job_match_results' not in st.session_state:
-    st.session_state.job_match_results = {}
-if 'interview_prep' not in st.session_state:
-    st.session_state.interview_prep = {}
 if 'company_name' not in st.session_state:
     st.session_state.company_name = ""
 if 'job_description' not in st.session_state:
@@ -501,15 +494,110 @@ if 'job_description' not in st.session_state:
     st.session_state.job_description = ""
 if 'company_name' not in st.session_state:
     st.session_state.company_name = ""
-if 'analysis_results' not in st.session_state:
-    st.session_state.analysis_results = {}
-if 'company_research' not in st.session_state:
-    st.session_state.company_research = {}
-    # print("DEBUG: Initialized company_research session state")  # Commented out for production
-if 'job_match_results' not in st.session_state:
-    st.session_state.job_match_results = {}
-if 'interview_prep' not in st.session_state:
-    st.session_state.interview_prep = {}
+
+# Stored history is shown a page at a time
+HISTORY_PAGE_SIZE = 5
+
+@st.cache_resource
+def load_history_store():
+    """History database shared by every session in this process"""
+    from history_store import history_store_from_env
+    return history_store_from_env()
+
+history = load_history_store()
+
+# Users are identified by a random id. With a history database (HISTORY_DB_PATH) it is kept in the
+# URL so history survives reloads and restarts; anyone with that link can see it. Otherwise it lasts
+# for the browser session only.
+if 'user_id' not in st.session_state:
+    uid = st.query_params.get("uid", "") if history.persistent else ""
+    st.session_state.user_id = uid if uid.isalnum() and len(uid) <= 64 else uuid.uuid4().hex
+    if history.persistent:
+        st.query_params["uid"] = st.session_state.user_id
+    history.touch_user(st.session_state.user_id)
+    if not st.session_state.resume_text:
+        st.session_state.resume_text = history.current_resume(st.session_state.user_id) or ""
+user_id = st.session_state.user_id
+history_counts = history.counts(user_id)
+
+def history_offset(key: str, total: int) -> int:
+    """Page picker for a stored history list; returns the row offset"""
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    if pages == 1:
+        return 0
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    return (int(page_number) - 1) * HISTORY_PAGE_SIZE
+
+def stream_to_placeholder(stream):
+    """Render LLM chunks as they arrive, then clear them so the cleaned report is shown in their place"""
+    placeholder = st.empty()
+    placeholder.write_stream(stream)
+    placeholder.empty()
+    return stream.result
+
+@st.cache_resource(show_spinner="Loading AI models...")
+def load_career_assistant():
+    """Backend shared by every session in this process; per-user results go to the history store"""
+    from career_backend_simple import get_career_assistant, get_llm
+    get_llm()
+    assistant = get_career_assistant()
+    # Build the tools now so the skill index, HTTP pool and provider cache are ready before the first request
+    assistant.company_researcher, assistant.job_matcher, assistant.interview_prep, assistant.resume_analyzer
+    return assistant
+
+@st.cache_resource
+def load_job_queue():
+    """Background analysis workers shared by every session; jobs are tracked per user_id"""
+    from job_queue import job_queue_from_env, register_career_jobs
+    queue = register_career_jobs(job_queue_from_env(), load_career_assistant(), load_history_store())
+    queue.start()
+    return queue
+
+# Dashboard refresh interval while a background analysis is running
+JOB_POLL_SECONDS = 3
+
+def show_analysis_jobs(queue, polling: bool):
+    """Progress of this user's running analyses plus the latest finished comprehensive result"""
+    from job_queue import ACTIVE_STATES, FAILED, SUCCEEDED
+    jobs = queue.list_jobs(user_id, limit=10)
+    active = [job for job in jobs if job['status'] in ACTIVE_STATES]
+    if polling and not active:
+        st.rerun()  # a job just finished: redraw the page (history counts, results) and stop polling
+    
+    for job in active:
+        label = job['kind'].replace('_', ' ').title()
+        st.progress(job['progress'], text=f"{label} analysis: {job['message']}")
+        if st.button("Cancel", key=f"cancel_job_{job['id']}"):
+            queue.cancel(job['id'])
+    
+    finished = next((job for job in jobs if job['kind'] == 'comprehensive' and job['status'] not in ACTIVE_STATES), None)
+    if finished is None:
+        return
+    finished_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(finished['finished_at']))
+    if finished['status'] == FAILED:
+        st.error(f"Comprehensive analysis failed: {finished['error'] or 'Unknown error'}")
+    elif finished['status'] == SUCCEEDED:
+        result = finished['result']
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.markdown('### Comprehensive Career Strategy')
+        st.caption(f"Finished {finished_at}")
+        
+        # Display analysis text with proper formatting
+        st.markdown('<div class="analysis-text">', unsafe_allow_html=True)
+        
+        # Show all analyses
+        for component, data in result["results"].items():
+            if data.get("success"):
+                st.markdown(f"## {component.replace('_', ' ').title()}")
+                st.write(data["analysis"])  # Already cleaned in backend
+                st.markdown("---")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        st.success(f"Complete! Analyzed {result['total_components']} components")
+        for component, error in result.get("errors", {}).items():
+            st.warning(f"{component.replace('_', ' ').title()} skipped: {error}")
 
 # Sidebar navigation
 st.sidebar.title("NextRole AI")
@@ -524,37 +612,48 @@ if st.session_state.resume_text:
 else:
     st.sidebar.info("No resume loaded")
 
-if st.session_state.analysis_results:
-    st.sidebar.success(f"{len(st.session_state.analysis_results)} analyses")
+if history_counts['resume'] or history_counts['comprehensive']:
+    st.sidebar.success(f"{history_counts['resume'] + history_counts['comprehensive']} analyses")
 
-if st.session_state.company_research:
-    st.sidebar.success(f"{len(st.session_state.company_research)} companies")
+if history_counts['company_research']:
+    st.sidebar.success(f"{history_counts['company_research']} companies")
 
-if st.session_state.job_match_results:
-    st.sidebar.success(f"{len(st.session_state.job_match_results)} matches")
+if history_counts['job_match']:
+    st.sidebar.success(f"{history_counts['job_match']} matches")
 
 st.sidebar.markdown("---")
 
 # Compact debug info
 with st.sidebar.expander("Debug Info", expanded=False):
     st.text(f"Resume: {len(st.session_state.resume_text) if st.session_state.resume_text else 0} chars")
-    if st.session_state.analysis_results:
-        st.text(f"Analyses: {', '.join(st.session_state.analysis_results.keys())}")
-    if st.session_state.company_research:
-        companies = list(st.session_state.company_research.keys())
-        st.text(f"Companies ({len(companies)}): {', '.join(companies[:2])}{'...' if len(companies) > 2 else ''}")
-        # Show last research timestamp
-        if companies:
-            last_company = companies[-1]
-            if 'timestamp' in st.session_state.company_research[last_company]:
-                st.text(f"Last: {st.session_state.company_research[last_company]['timestamp']}")
-    if st.session_state.job_match_results:
-        st.text(f"Matches: {len(st.session_state.job_match_results)}")
+    st.text(f"User: {user_id[:8]}")
+    st.text(f"Stored: {', '.join(f'{kind} {count}' for kind, count in history_counts.items() if count) or 'nothing yet'}")
+    if history_counts['company_research']:
+        last_research = history.list_company_research(user_id, limit=1)[0]
+        st.text(f"Last: {last_research['company']} {last_research['timestamp']}")
+    if 'career_backend_simple' in sys.modules:  # don't load the backend just for stats
+        cache_stats = load_career_assistant().response_cache.stats()
+        st.text(f"LLM cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits / {cache_stats['misses']} misses")
+        queue_stats = load_career_assistant().scheduler.stats()
+        st.text(f"LLM queue: {queue_stats['queued']} waiting, p95 wait {queue_stats.get('wait_p95', 0)}s, {queue_stats['rate_limited']} rate-limited")
+    if st.checkbox("Show stage timings", key="show_stage_timings"):
+        from metrics import metrics
+        rows = metrics.snapshot()
+        for row in rows:
+            labels = " ".join(str(value) for value in row['labels'].values())
+            if row['type'] == 'duration':
+                st.text(f"{row['stage']} {labels}: {row['count']}x avg {row['avg']}s p95 {row['p95']}s")
+            else:
+                st.text(f"{row['name']} {labels}: {row['value']:g}")
+        if not rows:
+            st.text("No timings recorded yet")
+        st.download_button("Export (Prometheus)", metrics.prometheus_text(), file_name="nextrole_metrics.prom",
+                           mime="text/plain")
 
 if st.sidebar.button("Clear All Data"):
-    for key in ['resume_text', 'job_description', 'company_name', 'analysis_results', 'company_research', 'job_match_results', 'interview_prep']:
-        if key in st.session_state:
-            st.session_state[key] = "" if key in ['resume_text', 'job_description', 'company_name'] else {}
+    history.clear_user(user_id)
+    for key in ['resume_text', 'job_description', 'company_name']:
+        st.session_state[key] = ""
     st.rerun()
 
 st.sidebar.markdown("---")
@@ -569,6 +668,15 @@ page = st.sidebar.selectbox(
 # Configuration section
 CONFIG = {'configurable': {'thread_id': 'career-session'}}
 
+# Long portfolios/appendices are cut off here; the analysis only needs the resume itself
+RESUME_MAX_PAGES = 10
+RESUME_MAX_CHARS = 20000
+
+# The backend (and with it LangChain/Gemini) is only loaded once a tool page is opened
+if page != "Home":
+    from career_backend_simple import extract_text_from_pdf
+    career_assistant = load_career_assistant()
+
 # HOME PAGE
 if page == "Home":
     st.markdown('<h1 class="main-header">NextRole AI</h1>', unsafe_allow_html=True)
@@ -615,9 +723,10 @@ elif page == "Resume Analyzer":
     st.markdown('<div class="glow-effect">Upload your resume (PDF) to get detailed AI-powered analysis and ATS optimization suggestions.</div>', unsafe_allow_html=True)
     
     # Show previous results if available - ALWAYS at top
-    if 'resume' in st.session_state.analysis_results:
+    prev_result = history.latest_analysis(user_id, 'resume') if history_counts['resume'] else None
+    if prev_result:
         st.markdown("### Previous Resume Analysis Results")
-        prev_result = st.session_state.analysis_results['resume']
+        st.caption(f"Analyzed on: {prev_result['timestamp']}")
         
         # Display metrics prominently
         col1, col2, col3 = st.columns(3)
@@ -642,9 +751,9 @@ elif page == "Resume Analyzer":
         if st.button("Re-analyze Current Resume", type="primary"):
             with st.spinner("AI is analyzing your resume... (this may take 30-60 seconds)"):
                 try:
-                    result = career_assistant.analyze_resume(st.session_state.resume_text)
+                    result = stream_to_placeholder(career_assistant.analyze_resume_stream(st.session_state.resume_text))
                     if result.get("success"):
-                        st.session_state.analysis_results['resume'] = result
+                        history.save_analysis(user_id, 'resume', result, resume_text=st.session_state.resume_text)
                         st.rerun()
                 except Exception as e:
                     st.error(f"Analysis failed: {str(e)}")
@@ -653,7 +762,9 @@ elif page == "Resume Analyzer":
     
     if uploaded_file is not None:
         with st.spinner("Extracting text from PDF..."):
-            resume_text = extract_text_from_pdf(uploaded_file)
+            resume_text = extract_text_from_pdf(uploaded_file, max_pages=RESUME_MAX_PAGES, max_chars=RESUME_MAX_CHARS)
+            if resume_text != st.session_state.resume_text and not resume_text.startswith(("Error processing PDF", "Could not extract text")):
+                history.save_document(resume_text, 'resume', user_id)
             st.session_state.resume_text = resume_text
         
         if resume_text and not resume_text.startswith("❌"):
@@ -667,13 +778,11 @@ elif page == "Resume Analyzer":
                     try:
                         # Use the resume text from session state or current text
                         analysis_text = st.session_state.resume_text if st.session_state.resume_text else resume_text
-                        result = career_assistant.analyze_resume(analysis_text)
+                        result = stream_to_placeholder(career_assistant.analyze_resume_stream(analysis_text))
                         
                         if result.get("success"):
-                            # Store results first with timestamp
-                            import datetime
-                            result['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            st.session_state.analysis_results['resume'] = result
+                            # Store results first; the store records the timestamp
+                            history.save_analysis(user_id, 'resume', result, resume_text=analysis_text)
                             
                             # Display results with enhanced styling
                             st.markdown('<div class="result-box">', unsafe_allow_html=True)
@@ -726,6 +835,7 @@ elif page == "Resume Analyzer":
             
             if manual_text and manual_text != st.session_state.resume_text:
                 st.session_state.resume_text = manual_text
+                history.save_document(manual_text, 'resume', user_id)
                 st.success("Resume text updated successfully!")
                 st.rerun()
             
@@ -794,16 +904,15 @@ elif page == "Job Matcher":
     st.markdown('<div class="glow-effect">Compare your resume against a specific job description to find match percentage and improvement areas.</div>', unsafe_allow_html=True)
     
     # Show previous results if available
-    if st.session_state.job_match_results:
+    if history_counts['job_match']:
         with st.expander("Previous Job Match Results", expanded=False):
-            for job_key, match_result in st.session_state.job_match_results.items():
-                st.markdown(f"### {job_key.replace('_', ' ')[:100]}...")
-                if 'timestamp' in match_result:
-                    st.caption(f"Analyzed on: {match_result['timestamp']}")
-                if match_result.get('compatibility_score'):
-                    st.metric("Compatibility Score", f"{match_result['compatibility_score']}/100")
-                clean_analysis = match_result["analysis"].replace('<div>', '').replace('</div>', '').replace('<br>', '\n')
-                st.write(clean_analysis[:300] + "..." if len(clean_analysis) > 300 else clean_analysis)
+            offset = history_offset("job_match_page", history_counts['job_match'])
+            for match_result in history.list_analyses(user_id, 'job_match', HISTORY_PAGE_SIZE, offset):
+                st.markdown(f"### {match_result['label'][:100]}...")
+                st.caption(f"Analyzed on: {match_result['timestamp']}")
+                if match_result['score']:
+                    st.metric("Compatibility Score", f"{match_result['score']}/100")
+                st.write(match_result['preview'] + "...")  # Preview only; cleaned once in the backend
                 st.markdown("---")
     
     if not st.session_state.resume_text:
@@ -825,19 +934,17 @@ elif page == "Job Matcher":
     
     # Add debug storage information
     with st.expander("Debug: Storage Information", expanded=False):
-        st.markdown("**Current Session State:**")
-        st.write(f"Total Job Match Records: {len(st.session_state.job_match_results)}")
-        if st.session_state.job_match_results:
-            st.write("Stored Job Matches:", list(st.session_state.job_match_results.keys()))
-            for job_key, data in st.session_state.job_match_results.items():
-                st.write(f"- {job_key}: {data.get('timestamp', 'No timestamp')} (Score: {data.get('compatibility_score', 'N/A')})")
+        st.markdown("**History Store:**")
+        st.write(f"Total Job Match Records: {history_counts['job_match']}")
+        for data in history.list_analyses(user_id, 'job_match', HISTORY_PAGE_SIZE):
+            st.write(f"- {data['label']}: {data['timestamp']} (Score: {data['score'] if data['score'] is not None else 'N/A'})")
         
     if st.button("Analyze Job Match", type="primary"):
         if st.session_state.resume_text and job_description:
             with st.spinner("Analyzing job match... (this may take 30-60 seconds)"):
                 try:
                     # Use simplified direct job matching
-                    result = career_assistant.match_jobs(st.session_state.resume_text, job_description)
+                    result = stream_to_placeholder(career_assistant.match_jobs_stream(st.session_state.resume_text, job_description))
                     
                     if result.get("success"):
                         st.markdown('<div class="analysis-container">')
@@ -855,11 +962,9 @@ elif page == "Job Matcher":
                         
                         st.markdown('</div>', unsafe_allow_html=True)
                         
-                        # Store results with timestamp and proper key
-                        import datetime
-                        result['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        job_key = f"job_match_{job_description[:50].replace(' ', '_') if job_description else 'general'}"
-                        st.session_state.job_match_results[job_key] = result
+                        # Store results; the store records the timestamp
+                        history.save_analysis(user_id, 'job_match', result, label=job_description[:50] if job_description else 'general',
+                                              resume_text=st.session_state.resume_text, input_text=job_description)
                         
                         st.success(f"Job match analysis saved successfully!")
                         st.balloons()
@@ -881,15 +986,16 @@ elif page == "Company Research":
     st.markdown('<div class="glow-effect">Get comprehensive research about your target company for strategic interview preparation.</div>', unsafe_allow_html=True)
     
     # Show previous results if available - ALWAYS at top
-    if st.session_state.company_research:
+    if history_counts['company_research']:
         st.markdown("### Previous Company Research")
-        for comp_name, research in st.session_state.company_research.items():
+        offset = history_offset("company_research_page", history_counts['company_research'])
+        for summary in history.list_company_research(user_id, HISTORY_PAGE_SIZE, offset):
+            research = history.get_company_research(user_id, summary['id'])
+            if not research:
+                continue
             # Display each company research prominently
-            st.markdown(f"#### {comp_name}")
-            
-            # Show timestamp if available
-            if 'timestamp' in research:
-                st.caption(f"Researched on: {research['timestamp']}")
+            st.markdown(f"#### {summary['company']}")
+            st.caption(f"Researched on: {research['timestamp']}")
                 
             # Show news count if available
             if research.get('recent_news'):
@@ -899,11 +1005,7 @@ elif page == "Company Research":
             with st.container():
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
                 st.markdown('<div class="analysis-text">', unsafe_allow_html=True)
-                # Extra cleaning to remove any HTML tags that slipped through
-                clean_analysis = research["analysis"].replace('<div class="analysis-container">', '').replace('<div class="section-title">', '').replace('</div>', '')
-                import re
-                clean_analysis = re.sub(r'<[^>]+>', '', clean_analysis)  # Remove any remaining HTML tags
-                st.write(clean_analysis)
+                st.write(research["analysis"])  # Cleaned once in the backend
                 st.markdown('</div>', unsafe_allow_html=True)
                 st.markdown('</div>', unsafe_allow_html=True)
                 
@@ -911,12 +1013,10 @@ elif page == "Company Research":
     
     # Add debug storage information
     with st.expander("Debug: Storage Information", expanded=False):
-        st.markdown("**Current Session State:**")
-        st.write(f"Total Company Research Records: {len(st.session_state.company_research)}")
-        if st.session_state.company_research:
-            st.write("Stored Companies:", list(st.session_state.company_research.keys()))
-            for company, data in st.session_state.company_research.items():
-                st.write(f"- {company}: {data.get('timestamp', 'No timestamp')} ({len(str(data.get('analysis', ''))):.0f} chars)")
+        st.markdown("**History Store:**")
+        st.write(f"Total Company Research Records: {history_counts['company_research']}")
+        for data in history.list_company_research(user_id, HISTORY_PAGE_SIZE):
+            st.write(f"- {data['company']}: {data['timestamp']}")
     
     company_name = st.text_input(
         "Company Name:",
@@ -934,7 +1034,7 @@ elif page == "Company Research":
             with st.spinner(f"Researching {company_name}... (this may take 30-60 seconds)"):
                 try:
                     # Use simplified direct company research
-                    result = career_assistant.research_company(company_name, st.session_state.resume_text)
+                    result = stream_to_placeholder(career_assistant.research_company_stream(company_name, st.session_state.resume_text))
                     
                     if result.get("success"):
                         # Display results with clean formatting
@@ -944,26 +1044,19 @@ elif page == "Company Research":
                         # Show research metrics first
                         if result.get("recent_news"):
                             st.info(f"Found {len(result['recent_news'])} recent news items")
+                        fallback_sources = [name.replace('_', ' ') for name, status in result.get("data_sources", {}).items() if status in ('mock', 'timeout')]
+                        if fallback_sources:
+                            st.caption(f"Estimated data used for: {', '.join(fallback_sources)}")
                         
                         # Display clean analysis text with extra cleaning
                         st.markdown('<div class="analysis-text">', unsafe_allow_html=True)
-                        # Double-clean to ensure no HTML tags slip through
-                        clean_analysis = result["analysis"].replace('<div class="analysis-container">', '').replace('<div class="section-title">', '').replace('</div>', '')
-                        st.write(clean_analysis)
+                        st.write(result["analysis"])  # Already cleaned in backend
                         st.markdown('</div>', unsafe_allow_html=True)
                         
                         st.markdown('</div>', unsafe_allow_html=True)
                         
-                        # Store results in company_research with timestamp and clean data
-                        import datetime
-                        result['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        # Ensure the stored analysis is completely clean
-                        result['analysis'] = result['analysis'].replace('<div class="analysis-container">', '').replace('<div class="section-title">', '').replace('</div>', '')
-                        import re
-                        result['analysis'] = re.sub(r'<[^>]+>', '', result['analysis'])
-                        
-                        st.session_state.company_research[company_name] = result
+                        # Store results (analysis is already clean); the store records the timestamp
+                        history.save_company_research(user_id, company_name, result, st.session_state.resume_text)
                         
                         st.success(f"\u2705 Company research for {company_name} saved successfully!")
                         st.balloons()
@@ -986,12 +1079,13 @@ elif page == "Interview Prep":
     st.markdown('<div class="glow-effect">Generate customized interview questions and preparation material based on the job and company.</div>', unsafe_allow_html=True)
     
     # Show previous results if available
-    if st.session_state.interview_prep:
+    if history_counts['interview_prep']:
         with st.expander("Previous Interview Preparations", expanded=False):
-            for prep_key, prep in st.session_state.interview_prep.items():
-                st.markdown(f"### {prep_key.replace('_', ' - ')[:100]}...")
-                clean_prep = prep["analysis"].replace('<div>', '').replace('</div>', '').replace('<br>', '\n')
-                st.write(clean_prep[:500] + "..." if len(clean_prep) > 500 else clean_prep)
+            offset = history_offset("interview_prep_page", history_counts['interview_prep'])
+            for prep in history.list_analyses(user_id, 'interview_prep', HISTORY_PAGE_SIZE, offset):
+                st.markdown(f"### {prep['label'][:100]}...")
+                st.caption(f"Prepared on: {prep['timestamp']}")
+                st.write(prep['preview'] + "...")  # Preview only; cleaned once in the backend
                 st.markdown("---")
     
     col1, col2 = st.columns(2)
@@ -1010,30 +1104,27 @@ elif page == "Interview Prep":
     
     # Add debug storage information
     with st.expander("Debug: Storage Information", expanded=False):
-        st.markdown("**Current Session State:**")
-        st.write(f"Total Interview Prep Records: {len(st.session_state.interview_prep)}")
-        if st.session_state.interview_prep:
-            st.write("Stored Interview Preps:", list(st.session_state.interview_prep.keys()))
-            for prep_key, data in st.session_state.interview_prep.items():
-                st.write(f"- {prep_key}: {data.get('timestamp', 'No timestamp')} ({len(str(data.get('analysis', ''))):.0f} chars)")
+        st.markdown("**History Store:**")
+        st.write(f"Total Interview Prep Records: {history_counts['interview_prep']}")
+        for data in history.list_analyses(user_id, 'interview_prep', HISTORY_PAGE_SIZE):
+            st.write(f"- {data['label']}: {data['timestamp']}")
     
     if st.button("Generate Interview Prep", type="primary"):
         if st.session_state.job_description or st.session_state.company_name:
             with st.spinner("Preparing your interview materials... (this may take 30-60 seconds)"):
                 try:
                     # Use simplified direct interview preparation
-                    result = career_assistant.prepare_interview(
+                    result = stream_to_placeholder(career_assistant.prepare_interview_stream(
                         st.session_state.job_description,
                         st.session_state.company_name,
                         st.session_state.resume_text
-                    )
+                    ))
                     
                     if result.get("success"):
-                        # Store results with timestamp
-                        import datetime
-                        result['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        prep_key = f"{st.session_state.company_name}_{st.session_state.job_description[:50] if st.session_state.job_description else 'general'}"
-                        st.session_state.interview_prep[prep_key] = result
+                        # Store results; the store records the timestamp
+                        prep_label = f"{st.session_state.company_name} - {st.session_state.job_description[:50] if st.session_state.job_description else 'general'}"
+                        history.save_analysis(user_id, 'interview_prep', result, label=prep_label,
+                                              resume_text=st.session_state.resume_text, input_text=st.session_state.job_description)
                         
                         # Display results with enhanced styling
                         st.markdown('<div class="result-box">', unsafe_allow_html=True)
@@ -1050,9 +1141,7 @@ elif page == "Interview Prep":
                         
                         # Display analysis text with proper formatting
                         st.markdown('<div class="analysis-text">', unsafe_allow_html=True)
-                        # Clean the analysis text to remove any HTML tags
-                        clean_analysis = result["analysis"].replace('<div>', '').replace('</div>', '').replace('<br>', '\n')
-                        st.write(clean_analysis)
+                        st.write(result["analysis"])  # Already cleaned in backend
                         st.markdown('</div>', unsafe_allow_html=True)
                         
                         st.markdown('</div>', unsafe_allow_html=True)
@@ -1078,58 +1167,55 @@ elif page == "Dashboard":
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        if 'resume' in st.session_state.analysis_results:
+        if history_counts['resume']:
             st.markdown('<div class="status-complete">Resume Analyzed</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="status-pending">Resume Analysis</div>', unsafe_allow_html=True)
     
     with col2:
-        if st.session_state.job_match_results:
+        if history_counts['job_match']:
             st.markdown('<div class="status-complete">Job Matched</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="status-pending">Job Matching</div>', unsafe_allow_html=True)
     
     with col3:
-        if st.session_state.company_research:
+        if history_counts['company_research']:
             st.markdown('<div class="status-complete">Company Researched</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="status-pending">Company Research</div>', unsafe_allow_html=True)
     
     with col4:
-        if st.session_state.interview_prep:
+        if history_counts['interview_prep']:
             st.markdown('<div class="status-complete">Interview Prep</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="status-pending">Interview Prep</div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
-    # Show individual section results if available
-    if st.session_state.analysis_results:
-        st.markdown("### Resume Analysis Results")
-        with st.expander("View Resume Analysis", expanded=True):
-            for key, result in st.session_state.analysis_results.items():
-                if key != 'comprehensive':
-                    st.markdown(f"**{key.title()}:**")
-                    st.write(result)
-                    st.markdown("---")
-    
-    if st.session_state.job_match_results:
-        st.markdown("### Job Matching Results")
-        with st.expander("View Job Matches", expanded=True):
-            st.write(st.session_state.job_match_results)
-    
-    if st.session_state.company_research:
-        st.markdown("### Company Research Results")
-        with st.expander("View Company Intel", expanded=True):
-            st.write(st.session_state.company_research)
-    
-    if st.session_state.interview_prep:
-        st.markdown("### Interview Preparation")
-        with st.expander("View Interview Guide", expanded=True):
-            st.write(st.session_state.interview_prep)
+    # Show stored history a page at a time; full reports are only loaded for the rows on screen
+    total_analyses = sum(history_counts[kind] for kind in ('resume', 'job_match', 'interview_prep', 'comprehensive'))
+    if total_analyses:
+        st.markdown("### Analysis History")
+        offset = history_offset("dashboard_analyses_page", total_analyses)
+        for summary in history.list_analyses(user_id, limit=HISTORY_PAGE_SIZE, offset=offset):
+            title = summary['kind'].replace('_', ' ').title() + (f": {summary['label']}" if summary['label'] else "")
+            score = f" (Score: {summary['score']:g})" if summary['score'] is not None else ""
+            with st.expander(f"{title[:80]}{score} - {summary['timestamp']}"):
+                full = history.get_analysis(user_id, summary['id'])
+                if full:
+                    st.write(full.get("analysis", ""))  # Already cleaned in backend
+    
+    if history_counts['company_research']:
+        st.markdown("### Company Research History")
+        offset = history_offset("dashboard_research_page", history_counts['company_research'])
+        for summary in history.list_company_research(user_id, HISTORY_PAGE_SIZE, offset):
+            with st.expander(f"{summary['company']} - {summary['timestamp']}"):
+                full = history.get_company_research(user_id, summary['id'])
+                if full:
+                    st.write(full.get("analysis", ""))  # Already cleaned in backend
     
     # Show info message only if no results exist
-    if not (st.session_state.analysis_results or st.session_state.job_match_results or st.session_state.company_research or st.session_state.interview_prep):
+    if not (total_analyses or history_counts['company_research']):
         st.info("Complete analysis in other sections to see your progress here.")
     
     st.markdown("---")
@@ -1138,47 +1224,18 @@ elif page == "Dashboard":
     st.markdown("### Complete Career Analysis")
     st.info("Get a comprehensive end-to-end analysis combining all features!")
     
+    # Runs as a background job, so leaving the page or a dropped connection doesn't lose the work
+    job_queue = load_job_queue()
     if st.button("Run Complete Analysis", type="primary") and st.session_state.resume_text:
-        with st.spinner("Running comprehensive career analysis... (this may take 1-2 minutes)"):
-            try:
-                # Use comprehensive analysis method
-                result = career_assistant.comprehensive_career_analysis(
-                    st.session_state.resume_text,
-                    st.session_state.job_description,
-                    st.session_state.company_name
-                )
-                
-                if result.get("success"):
-                    # Store comprehensive results
-                    st.session_state.analysis_results['comprehensive'] = result
-                    st.session_state.analysis_results.update(result["results"])
-                    
-                    # Display results with enhanced styling
-                    st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                    st.markdown('### Comprehensive Career Strategy')
-                    
-                    # Display analysis text with proper formatting
-                    st.markdown('<div class="analysis-text">', unsafe_allow_html=True)
-                    
-                    # Show all analyses
-                    for component, data in result["results"].items():
-                        if data.get("success"):
-                            st.markdown(f"## {component.replace('_', ' ').title()}")
-                            # Clean the analysis text to remove any HTML tags
-                            clean_analysis = data["analysis"].replace('<div>', '').replace('</div>', '').replace('<br>', '\n')
-                            st.write(clean_analysis)
-                            st.markdown("---")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    st.balloons()
-                    st.success(f"Complete! Analyzed {result['total_components']} components")
-                else:
-                    st.error(f"Comprehensive analysis failed: {result.get('error', 'Unknown error')}")
-                
-            except Exception as e:
-                st.error(f"Analysis failed: {str(e)}")
+        job_queue.submit('comprehensive', {
+            'resume_text': st.session_state.resume_text,
+            'job_description': st.session_state.job_description,
+            'company_name': st.session_state.company_name
+        }, user_id=user_id)
+        st.info("Analysis started in the background - you can keep using the other tools meanwhile.")
+    
+    polling = bool(job_queue.list_jobs(user_id, limit=1, active_only=True))
+    st.fragment(show_analysis_jobs, run_every=JOB_POLL_SECONDS if polling else None)(job_queue, polling)
 
 # Footer
 st.markdown(
@@ -0,0 +1,390 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'history.db')
+
+# Kinds stored in the analyses table; company research has its own table
+ANALYSIS_KINDS = ('resume', 'job_match', 'interview_prep', 'comprehensive')
+
+PREVIEW_CHARS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    resume_hash TEXT,
+    created_at REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL DEFAULT '',
+    resume_hash TEXT,
+    input_hash TEXT,
+    score REAL,
+    preview TEXT NOT NULL DEFAULT '',
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_user_kind_time ON analyses (user_id, kind, created_at DESC);
+CREATE TABLE IF NOT EXISTS company_research (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    company TEXT NOT NULL,
+    company_key TEXT NOT NULL,
+    resume_hash TEXT,
+    preview TEXT NOT NULL DEFAULT '',
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_company_user_time ON company_research (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_company_user_company ON company_research (user_id, company_key, created_at DESC);
+"""
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def format_timestamp(created_at: float) -> str:
+    return datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class HistoryStore:
+    """SQLite-backed history of analyses and company research per user
+
+    Full results are stored as JSON and only loaded for the rows being
+    shown; list queries return previews. Documents are stored once per
+    content hash. Retention (max age, max rows per user and kind) runs on
+    open and every retention_interval writes. path=':memory:' keeps the
+    history in memory for the life of the process.
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, max_age_days: float = 90, max_per_user: int = 200,
+                 retention_interval: int = 50):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_per_user = max_per_user
+        self.retention_interval = retention_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._memory = None
+        if self.path == ':memory:':
+            # A named shared-cache database lives as long as one connection to it stays open
+            self.path = f"file:history-{uuid.uuid4().hex}?mode=memory&cache=shared"
+            self._memory = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.enforce_retention()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, uri=self._memory is not None)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def persistent(self) -> bool:
+        """True when history is written to a database file and outlives the process"""
+        return self._memory is None
+
+    def _wrote(self):
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.retention_interval == 0
+        if due:
+            self.enforce_retention()
+
+    # Users and documents
+
+    def touch_user(self, user_id: str):
+        """Create the user on first visit and record activity"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO users (id, created_at, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (user_id, now, now)
+                )
+        except sqlite3.Error as e:
+            print(f"History store user update failed: {e}")
+
+    @staticmethod
+    def _insert_document(conn: sqlite3.Connection, text: Optional[str], kind: str,
+                         user_id: Optional[str] = None) -> Optional[str]:
+        """Document write inside the caller's transaction, so orphan cleanup can't drop it before it's referenced"""
+        if not text:
+            return None
+        digest = content_hash(text)
+        conn.execute(
+            "INSERT OR IGNORE INTO documents (hash, kind, content, created_at) VALUES (?, ?, ?, ?)",
+            (digest, kind, text, time.time())
+        )
+        if user_id and kind == 'resume':
+            conn.execute("UPDATE users SET resume_hash = ? WHERE id = ?", (digest, user_id))
+        return digest
+
+    def save_document(self, text: str, kind: str = 'resume', user_id: Optional[str] = None) -> Optional[str]:
+        """Store text once per content hash; a resume also becomes the user's current one"""
+        try:
+            with self._connect() as conn:
+                return self._insert_document(conn, text, kind, user_id)
+        except sqlite3.Error as e:
+            print(f"History store document write failed: {e}")
+            return None
+
+    def get_document(self, digest: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT content FROM documents WHERE hash = ?", (digest,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"History store document read failed: {e}")
+            return None
+        return row['content'] if row else None
+
+    def current_resume(self, user_id: str) -> Optional[str]:
+        """The last resume this user analyzed or loaded"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT d.content FROM users u JOIN documents d ON d.hash = u.resume_hash WHERE u.id = ?",
+                    (user_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"History store document read failed: {e}")
+            return None
+        return row['content'] if row else None
+
+    # Writes
+
+    def save_analysis(self, user_id: str, kind: str, result: Dict, label: str = "",
+                      resume_text: Optional[str] = None, input_text: Optional[str] = None) -> Optional[int]:
+        """Store one analysis result dict; returns its id"""
+        score = result.get('ats_score', result.get('compatibility_score'))
+        preview = str(result.get('analysis', ''))[:PREVIEW_CHARS]
+        try:
+            with self._connect() as conn:
+                resume_hash = self._insert_document(conn, resume_text, 'resume', user_id)
+                input_hash = self._insert_document(conn, input_text, 'job_description')
+                cursor = conn.execute(
+                    "INSERT INTO analyses (user_id, kind, label, resume_hash, input_hash, score, preview, result, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, kind, label, resume_hash, input_hash, score, preview,
+                     json.dumps(result, default=str), time.time())
+                )
+                row_id = cursor.lastrowid
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"History store analysis write failed: {e}")
+            return None
+        self._wrote()
+        return row_id
+
+    def save_company_research(self, user_id: str, company: str, result: Dict,
+                              resume_text: Optional[str] = None) -> Optional[int]:
+        """Store one company research result dict; returns its id"""
+        preview = str(result.get('analysis', ''))[:PREVIEW_CHARS]
+        try:
+            with self._connect() as conn:
+                resume_hash = self._insert_document(conn, resume_text, 'resume', user_id)
+                cursor = conn.execute(
+                    "INSERT INTO company_research (user_id, company, company_key, resume_hash, preview, result, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, company, company.strip().lower(), resume_hash, preview,
+                     json.dumps(result, default=str), time.time())
+                )
+                row_id = cursor.lastrowid
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"History store research write failed: {e}")
+            return None
+        self._wrote()
+        return row_id
+
+    def save_comprehensive(self, user_id: str, result: Dict, resume_text: str, job_description: str = "",
+                           company_name: str = "") -> Optional[int]:
+        """Store each component of a comprehensive analysis under its own kind, and the summary as the comprehensive entry"""
+        components = result.get("results", {})
+        if "resume_analysis" in components:
+            self.save_analysis(user_id, 'resume', components["resume_analysis"], resume_text=resume_text)
+        if "job_matching" in components:
+            self.save_analysis(user_id, 'job_match', components["job_matching"], label=job_description[:50],
+                               resume_text=resume_text, input_text=job_description)
+        if "company_research" in components:
+            self.save_company_research(user_id, company_name, components["company_research"], resume_text)
+        if "interview_prep" in components:
+            self.save_analysis(user_id, 'interview_prep', components["interview_prep"],
+                               label=f"{company_name} - {job_description[:50] or 'general'}",
+                               resume_text=resume_text, input_text=job_description)
+        if "comprehensive_summary" not in components:
+            return None
+        return self.save_analysis(user_id, 'comprehensive', dict(components["comprehensive_summary"], errors=result.get("errors", {})),
+                                  label="Career strategy", resume_text=resume_text)
+
+    # Reads
+
+    @staticmethod
+    def _full(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        result = json.loads(row['result'])
+        result['id'] = row['id']
+        result['timestamp'] = format_timestamp(row['created_at'])
+        return result
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict:
+        summary = {key: row[key] for key in row.keys() if key != 'created_at'}
+        summary['timestamp'] = format_timestamp(row['created_at'])
+        return summary
+
+    def _query(self, sql: str, params: tuple) -> List[sqlite3.Row]:
+        try:
+            with self._connect() as conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"History store read failed: {e}")
+            return []
+
+    def latest_analysis(self, user_id: str, kind: str) -> Optional[Dict]:
+        """Most recent full result of one kind"""
+        rows = self._query(
+            "SELECT id, result, created_at FROM analyses WHERE user_id = ? AND kind = ? ORDER BY created_at DESC LIMIT 1",
+            (user_id, kind)
+        )
+        return self._full(rows[0] if rows else None)
+
+    def get_analysis(self, user_id: str, analysis_id: int) -> Optional[Dict]:
+        rows = self._query("SELECT id, result, created_at FROM analyses WHERE id = ? AND user_id = ?", (analysis_id, user_id))
+        return self._full(rows[0] if rows else None)
+
+    def list_analyses(self, user_id: str, kind: Optional[str] = None, limit: int = 10, offset: int = 0) -> List[Dict]:
+        """One page of analysis summaries (no full results), newest first"""
+        if kind:
+            rows = self._query(
+                "SELECT id, kind, label, score, preview, created_at FROM analyses WHERE user_id = ? AND kind = ? "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (user_id, kind, limit, offset)
+            )
+        else:
+            rows = self._query(
+                "SELECT id, kind, label, score, preview, created_at FROM analyses WHERE user_id = ? "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (user_id, limit, offset)
+            )
+        return [self._summary(row) for row in rows]
+
+    def latest_company_research(self, user_id: str, company: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT id, result, created_at FROM company_research WHERE user_id = ? AND company_key = ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (user_id, company.strip().lower())
+        )
+        return self._full(rows[0] if rows else None)
+
+    def get_company_research(self, user_id: str, research_id: int) -> Optional[Dict]:
+        rows = self._query("SELECT id, result, created_at FROM company_research WHERE id = ? AND user_id = ?", (research_id, user_id))
+        return self._full(rows[0] if rows else None)
+
+    def list_company_research(self, user_id: str, limit: int = 10, offset: int = 0) -> List[Dict]:
+        """One page of company research summaries, newest first"""
+        rows = self._query(
+            "SELECT id, company, preview, created_at FROM company_research WHERE user_id = ? "
+            "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (user_id, limit, offset)
+        )
+        return [self._summary(row) for row in rows]
+
+    def counts(self, user_id: str) -> Dict[str, int]:
+        """Stored rows per analysis kind, plus 'company_research'"""
+        counts = {kind: 0 for kind in ANALYSIS_KINDS}
+        for row in self._query("SELECT kind, COUNT(*) AS n FROM analyses WHERE user_id = ? GROUP BY kind", (user_id,)):
+            counts[row['kind']] = row['n']
+        rows = self._query("SELECT COUNT(*) AS n FROM company_research WHERE user_id = ?", (user_id,))
+        counts['company_research'] = rows[0]['n'] if rows else 0
+        return counts
+
+    # Retention
+
+    def clear_user(self, user_id: str):
+        """Delete all of a user's history"""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM analyses WHERE user_id = ?", (user_id,))
+                conn.execute("DELETE FROM company_research WHERE user_id = ?", (user_id,))
+                conn.execute("UPDATE users SET resume_hash = NULL WHERE id = ?", (user_id,))
+        except sqlite3.Error as e:
+            print(f"History store clear failed: {e}")
+        self._delete_orphan_documents()
+
+    def enforce_retention(self):
+        """Drop rows older than max_age_days, keep the newest max_per_user per user and kind, then unused documents"""
+        cutoff = time.time() - self.max_age_days * 86400
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM analyses WHERE created_at < ?", (cutoff,))
+                conn.execute("DELETE FROM company_research WHERE created_at < ?", (cutoff,))
+                conn.execute("DELETE FROM users WHERE last_seen < ?", (cutoff,))
+                conn.execute(
+                    "DELETE FROM analyses WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+                    "(PARTITION BY user_id, kind ORDER BY created_at DESC) AS position FROM analyses) WHERE position > ?)",
+                    (self.max_per_user,)
+                )
+                conn.execute(
+                    "DELETE FROM company_research WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+                    "(PARTITION BY user_id ORDER BY created_at DESC) AS position FROM company_research) WHERE position > ?)",
+                    (self.max_per_user,)
+                )
+        except sqlite3.Error as e:
+            print(f"History store retention failed: {e}")
+        self._delete_orphan_documents()
+
+    def _delete_orphan_documents(self):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM documents WHERE hash NOT IN ("
+                    "SELECT resume_hash FROM analyses WHERE resume_hash IS NOT NULL "
+                    "UNION SELECT input_hash FROM analyses WHERE input_hash IS NOT NULL "
+                    "UNION SELECT resume_hash FROM company_research WHERE resume_hash IS NOT NULL "
+                    "UNION SELECT resume_hash FROM users WHERE resume_hash IS NOT NULL)"
+                )
+        except sqlite3.Error as e:
+            print(f"History store document cleanup failed: {e}")
+
+
+def history_store_from_env() -> HistoryStore:
+    """Build the history store from HISTORY_* environment variables
+
+    History is kept in memory unless HISTORY_DB_PATH is set: stored resumes
+    are personal data, so writing them to disk is opt-in.
+    """
+    return HistoryStore(
+        path=os.getenv('HISTORY_DB_PATH') or ':memory:',
+        max_age_days=float(os.getenv('HISTORY_MAX_AGE_DAYS', '90')),
+        max_per_user=int(os.getenv('HISTORY_MAX_PER_USER', '200'))
+    )
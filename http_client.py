@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics
+
+# (connect, read) timeouts in seconds per data provider
+PROVIDER_TIMEOUTS = {
+    'newsapi': (3.05, 10),
+    'alphavantage': (3.05, 10),
+    'adzuna': (3.05, 12),
+    'default': (3.05, 15),
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """Shared HTTP layer for external data providers
+
+    One HTTPAdapter (and so one urllib3 pool per host) is shared by every
+    thread; each thread gets its own Session mounted on it, so connections
+    are reused without sharing cookie/header state between threads.
+    """
+
+    def __init__(self, retries: int = 3, backoff_factor: float = 0.5, backoff_jitter: float = 0.5,
+                 pool_maxsize: int = 10, timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.timeouts = dict(PROVIDER_TIMEOUTS, **(timeouts or {}))
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry)
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            session.headers['User-Agent'] = 'NextRole-AI/1.0'
+            self._local.session = session
+        return session
+
+    def get(self, provider: str, url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        """GET with the provider's timeout; 429/5xx are retried with jittered backoff"""
+        kwargs.setdefault('timeout', self.timeouts.get(provider, self.timeouts['default']))
+        with metrics.timed('provider_http', provider=provider):
+            response = self._session().get(url, params=params, **kwargs)
+        metrics.increment('provider_responses', provider=provider, status=response.status_code)
+        return response
+
+
+default_http_client = HttpClient()
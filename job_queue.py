@@ -0,0 +1,490 @@
+import copy
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+DEFAULT_JOBS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'jobs.db')
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Progress events kept per job
+MAX_EVENTS = 50
+
+# A job whose worker died is retried this many times in total before it is failed
+MAX_ATTEMPTS = 2
+
+# Finished jobs past retention are purged at most this often (seconds)
+PURGE_INTERVAL = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    events TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_time ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_user_time ON jobs (user_id, created_at DESC);
+"""
+
+_JSON_FIELDS = ('params', 'events', 'result')
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler's progress callback once the job has been cancelled"""
+
+
+def new_job(kind: str, params: Dict, user_id: str = "") -> Dict:
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex, 'user_id': user_id, 'kind': kind, 'params': params, 'status': QUEUED,
+        'progress': 0.0, 'message': 'Queued', 'events': [], 'result': None, 'error': None, 'worker': None,
+        'attempts': 0, 'cancel_requested': False, 'created_at': now, 'started_at': None, 'finished_at': None,
+        'updated_at': now,
+    }
+
+
+def _event(progress: float, message: str) -> Dict:
+    return {'at': time.time(), 'progress': progress, 'message': message}
+
+
+class MemoryJobStore:
+    """Jobs held in this process; lost on restart"""
+
+    def __init__(self):
+        self._jobs = {}  # id -> job dict, in submission order
+        self._lock = threading.Lock()
+
+    def add(self, job: Dict):
+        with self._lock:
+            self._jobs[job['id']] = copy.deepcopy(job)
+
+    def claim_next(self, worker: str) -> Optional[Dict]:
+        """Mark the oldest queued job running and return it"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job['status'] == QUEUED:
+                    now = time.time()
+                    job.update(status=RUNNING, worker=worker, attempts=job['attempts'] + 1, started_at=now,
+                               updated_at=now, message='Started')
+                    return copy.deepcopy(job)
+        return None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields, updated_at=time.time())
+
+    def add_event(self, job_id: str, progress: float, message: str) -> bool:
+        """Record progress; returns False once cancellation was requested"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return False
+            job['events'] = (job['events'] + [_event(progress, message)])[-MAX_EVENTS:]
+            job.update(progress=progress, message=message, updated_at=time.time())
+            return not job['cancel_requested']
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def list(self, user_id: Optional[str] = None, limit: int = 20, active_only: bool = False) -> List[Dict]:
+        """Newest first"""
+        with self._lock:
+            jobs = [job for job in reversed(list(self._jobs.values()))
+                    if (user_id is None or job['user_id'] == user_id) and (not active_only or job['status'] in ACTIVE_STATES)]
+            return [copy.deepcopy(job) for job in jobs[:limit]]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask a running one to stop at its next progress report"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['status'] not in ACTIVE_STATES:
+                return False
+            if job['status'] == QUEUED:
+                job.update(status=CANCELLED, message='Cancelled', finished_at=time.time())
+            job.update(cancel_requested=True, updated_at=time.time())
+            return True
+
+    def running(self) -> List[Dict]:
+        with self._lock:
+            return [copy.deepcopy(job) for job in self._jobs.values() if job['status'] == RUNNING]
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            stale = [job_id for job_id, job in self._jobs.items()
+                     if job['status'] not in ACTIVE_STATES and (job['finished_at'] or 0) < finished_before]
+            for job_id in stale:
+                del self._jobs[job_id]
+            return len(stale)
+
+
+class SQLiteJobStore:
+    """Jobs persisted in SQLite, so queued work and results survive restarts and can be shared by processes"""
+
+    def __init__(self, path: str = DEFAULT_JOBS_PATH):
+        self.path = path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        for field in _JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def add(self, job: Dict):
+        row = dict(job, cancel_requested=int(job['cancel_requested']))
+        for field in _JSON_FIELDS:
+            row[field] = json.dumps(row[field]) if row[field] is not None else None
+        columns = ", ".join(row)
+        with self._connect() as conn:
+            conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+
+    def claim_next(self, worker: str) -> Optional[Dict]:
+        """Mark the oldest queued job running and return it (one statement, so safe across processes)"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, updated_at = ?, "
+                "message = 'Started' WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) "
+                "AND status = ? RETURNING *",
+                (RUNNING, worker, now, now, QUEUED, QUEUED)
+            ).fetchone()
+        return self._row(row)
+
+    def update(self, job_id: str, **fields):
+        for field in _JSON_FIELDS:
+            if field in fields:
+                fields[field] = json.dumps(fields[field]) if fields[field] is not None else None
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", tuple(fields.values()) + (job_id,))
+
+    def add_event(self, job_id: str, progress: float, message: str) -> bool:
+        """Record progress; returns False once cancellation was requested"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT events, cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            events = (json.loads(row['events']) + [_event(progress, message)])[-MAX_EVENTS:]
+            conn.execute("UPDATE jobs SET events = ?, progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                         (json.dumps(events), progress, message, time.time(), job_id))
+            return not row['cancel_requested']
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            return self._row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, user_id: Optional[str] = None, limit: int = 20, active_only: bool = False) -> List[Dict]:
+        """Newest first"""
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if active_only:
+            clauses.append(f"status IN ({', '.join('?' * len(ACTIVE_STATES))})")
+            params.extend(ACTIVE_STATES)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask a running one to stop at its next progress report"""
+        now = time.time()
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = ?, message = 'Cancelled', cancel_requested = 1, finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?", (CANCELLED, now, now, job_id, QUEUED)
+            ).rowcount
+            flagged = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?", (now, job_id, RUNNING)
+            ).rowcount
+        return bool(cancelled or flagged)
+
+    def running(self) -> List[Dict]:
+        with self._connect() as conn:
+            return [self._row(row) for row in conn.execute("SELECT * FROM jobs WHERE status = ?", (RUNNING,)).fetchall()]
+
+    def purge(self, finished_before: float) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                f"DELETE FROM jobs WHERE status NOT IN ({', '.join('?' * len(ACTIVE_STATES))}) AND finished_at < ?",
+                (*ACTIVE_STATES, finished_before)
+            ).rowcount
+
+
+def _worker_alive(worker: str, stale: bool) -> bool:
+    """Whether the process that claimed a job may still be running it"""
+    host, _, pid = (worker or "").rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return not stale  # can't check another machine; trust its heartbeat
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but owned by someone else
+    return True
+
+
+class JobQueue:
+    """Runs long analyses on background worker threads and tracks them by job ID
+
+    submit() stores the job and returns its ID at once; a worker claims it
+    from the store, calls the handler registered for its kind and saves the
+    result. Handlers receive (params, report), with the submitting user_id
+    added to params, and call report(fraction, message) to publish progress
+    events; report raises JobCancelled after cancel(). Callers poll
+    get()/list_jobs() instead of waiting.
+
+    With a SQLiteJobStore, jobs left running by a dead process are
+    requeued on start (up to MAX_ATTEMPTS) and other processes on the same
+    database pick up queued work every poll_interval seconds. Finished jobs
+    older than retention_days are purged by the workers every
+    PURGE_INTERVAL seconds.
+    """
+
+    def __init__(self, store=None, workers: int = 2, poll_interval: float = 2.0, stale_after: float = 900,
+                 retention_days: float = 7):
+        self.store = store if store is not None else MemoryJobStore()
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.retention_days = retention_days
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = {}
+        self.required = {}  # kind -> params the handler can't run without
+        self._wake = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._next_purge = 0.0
+
+    def register(self, kind: str, handler: Callable[[Dict, Callable[[float, str], None]], Dict],
+                 required: Tuple[str, ...] = ()):
+        self.handlers[kind] = handler
+        self.required[kind] = tuple(required)
+
+    def start(self):
+        """Recover abandoned jobs and start the workers (idempotent)"""
+        with self._wake:
+            if self._threads:
+                return
+            self._stopping = False
+            self._recover()
+            for index in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop taking new jobs; running handlers finish in the background"""
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, kind: str, params: Dict, user_id: str = "") -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        missing = [field for field in self.required[kind] if not params.get(field)]
+        if missing:
+            raise ValueError(f"Job kind '{kind}' requires: {', '.join(missing)}")
+        job = new_job(kind, params, user_id)
+        self.store.add(job)
+        metrics.increment('jobs_submitted', kind=kind)
+        self.start()
+        with self._wake:
+            self._wake.notify()
+        return job['id']
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def list_jobs(self, user_id: Optional[str] = None, limit: int = 20, active_only: bool = False) -> List[Dict]:
+        return self.store.list(user_id, limit, active_only)
+
+    def cancel(self, job_id: str) -> bool:
+        return self.store.cancel(job_id)
+
+    def _recover(self):
+        now = time.time()
+        for job in self.store.running():
+            if job['worker'] == self.worker_id:
+                continue
+            if _worker_alive(job['worker'], now - job['updated_at'] > self.stale_after):
+                continue
+            if job['attempts'] >= MAX_ATTEMPTS:
+                self.store.update(job['id'], status=FAILED, error="Interrupted: worker stopped while running this job",
+                                  message='Failed', finished_at=now)
+            else:
+                self.store.update(job['id'], status=QUEUED, worker=None, message='Requeued after restart')
+
+    def _purge_if_due(self):
+        now = time.time()
+        with self._wake:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + PURGE_INTERVAL
+        try:
+            self.store.purge(now - self.retention_days * 86400)
+        except sqlite3.Error as e:
+            print(f"Job store purge failed: {e}")
+
+    def _work(self):
+        while True:
+            with self._wake:
+                if self._stopping:
+                    return
+            self._purge_if_due()
+            job = None
+            try:
+                job = self.store.claim_next(self.worker_id)
+            except sqlite3.Error as e:
+                print(f"Job store claim failed: {e}")
+            if job is None:
+                with self._wake:
+                    if not self._stopping:
+                        self._wake.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict):
+        job_id, kind = job['id'], job['kind']
+        metrics.observe('job_queue_wait', job['started_at'] - job['created_at'], kind=kind)
+
+        def report(progress: float, message: str):
+            if not self.store.add_event(job_id, max(0.0, min(1.0, progress)), message):
+                raise JobCancelled(job_id)
+
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind: {kind}")
+            with metrics.timed('job', kind=kind):
+                result = handler(dict(job['params'], user_id=job['user_id']), report)
+        except JobCancelled:
+            result = None
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e), message='Failed', finished_at=time.time())
+            metrics.increment('jobs_failed', kind=kind)
+            return
+
+        # Handlers that catch all errors swallow JobCancelled, so check the flag too
+        current = self.store.get(job_id)
+        if result is None or (current and current['cancel_requested']):
+            self.store.update(job_id, status=CANCELLED, message='Cancelled', finished_at=time.time())
+            return
+
+        failed = isinstance(result, dict) and result.get('error') and not result.get('success')
+        self.store.update(job_id, status=FAILED if failed else SUCCEEDED, result=result,
+                          error=result['error'] if failed else None, progress=1.0,
+                          message='Failed' if failed else 'Done', finished_at=time.time())
+        if failed:
+            metrics.increment('jobs_failed', kind=kind)
+
+
+def register_career_jobs(queue: JobQueue, assistant, history=None) -> JobQueue:
+    """Register the CareerAssistant analyses as job kinds; results are also saved to history when given
+
+    Params per kind: resume {resume_text}; job_match {resume_text, job_description};
+    company_research {company_name, resume_text}; interview_prep {job_description,
+    company_name, resume_text}; comprehensive {resume_text, job_description, company_name}.
+    submit() rejects a job whose required params (the first one listed, for all but
+    interview_prep) are missing.
+    """
+    def single(run, save):
+        def handler(params: Dict, report) -> Dict:
+            report(0.1, "Analyzing")
+            result = run(params)
+            if history is not None and params.get('user_id') and result.get('success'):
+                save(params, result)
+            return result
+        return handler
+
+    queue.register('resume', single(
+        lambda p: assistant.analyze_resume(p['resume_text']),
+        lambda p, r: history.save_analysis(p['user_id'], 'resume', r, resume_text=p['resume_text'])),
+        required=('resume_text',))
+    queue.register('job_match', single(
+        lambda p: assistant.match_jobs(p['resume_text'], p.get('job_description', "")),
+        lambda p, r: history.save_analysis(p['user_id'], 'job_match', r, label=p.get('job_description', "")[:50] or 'general',
+                                           resume_text=p['resume_text'], input_text=p.get('job_description', ""))),
+        required=('resume_text',))
+    queue.register('company_research', single(
+        lambda p: assistant.research_company(p['company_name'], p.get('resume_text', "")),
+        lambda p, r: history.save_company_research(p['user_id'], p['company_name'], r, p.get('resume_text', ""))),
+        required=('company_name',))
+    queue.register('interview_prep', single(
+        lambda p: assistant.prepare_interview(p.get('job_description', ""), p.get('company_name', ""), p.get('resume_text', "")),
+        lambda p, r: history.save_analysis(p['user_id'], 'interview_prep', r,
+                                           label=f"{p.get('company_name', '')} - {p.get('job_description', '')[:50] or 'general'}",
+                                           resume_text=p.get('resume_text', ""), input_text=p.get('job_description', ""))))
+
+    def comprehensive(params: Dict, report) -> Dict:
+        result = assistant.comprehensive_career_analysis(
+            params['resume_text'], params.get('job_description', ""), params.get('company_name', ""), progress=report)
+        if history is not None and params.get('user_id') and result.get('success'):
+            history.save_comprehensive(params['user_id'], result, params['resume_text'],
+                                       params.get('job_description', ""), params.get('company_name', ""))
+        return result
+
+    queue.register('comprehensive', comprehensive, required=('resume_text',))
+    return queue
+
+
+def job_queue_from_env() -> JobQueue:
+    """Build the job queue from JOB_* environment variables (JOB_QUEUE_PATH switches to the SQLite store)"""
+    path = os.getenv('JOB_QUEUE_PATH')
+    return JobQueue(
+        store=SQLiteJobStore(path) if path else MemoryJobStore(),
+        workers=int(os.getenv('JOB_WORKERS', '2')),
+        poll_interval=float(os.getenv('JOB_POLL_INTERVAL', '2'))
+    )
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+def make_cache_key(model: str, temperature: float, prompt: str) -> str:
+    """Content-addressed key for an LLM call"""
+    digest = hashlib.sha256()
+    for part in (str(model), repr(temperature), prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """LRU cache for LLM responses with per-entry TTL and an optional SQLite tier
+
+    The SQLite tier keeps at most max_disk_entries rows; past that the ones
+    closest to expiry are dropped on write.
+    """
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 3600, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.default_ttl = default_ttl
+        self.disk_path = disk_path
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache "
+                        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires_at)")
+            except sqlite3.Error as e:
+                print(f"LLM disk cache disabled: {e}")
+                self.disk_path = None
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.disk_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response or None if missing/expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['disk_hits'] += 1
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Store a response in memory (and on disk when configured)"""
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._memory_set(key, value, expires_at)
+
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at)
+                    )
+                    conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+            except sqlite3.Error as e:
+                print(f"LLM disk cache write failed: {e}")
+
+    def _memory_set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if not self.disk_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"LLM disk cache read failed: {e}")
+            return None
+
+        if row:
+            # Promote to the memory tier
+            self._memory_set(key, row[0], row[1])
+            return row[0]
+        return None
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM llm_cache")
+            except sqlite3.Error as e:
+                print(f"LLM disk cache clear failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def cache_from_env() -> LLMResponseCache:
+    """Build the response cache from LLM_CACHE_* environment variables"""
+    return LLMResponseCache(
+        max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '256')),
+        default_ttl=float(os.getenv('LLM_CACHE_TTL', '3600')),
+        disk_path=os.getenv('LLM_CACHE_PATH') or None,
+        max_disk_entries=int(os.getenv('LLM_CACHE_MAX_DISK_ENTRIES', '10000'))
+    )
@@ -0,0 +1,265 @@
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from metrics import metrics
+from prompt_builder import count_tokens
+
+# Priority classes; lower is served first
+INTERACTIVE = 0
+BATCH = 1
+
+_call_priority = ContextVar('llm_call_priority', default=INTERACTIVE)
+
+_RETRY_HINT = re.compile(r"retry(?:_delay|Delay| in)?['\"]?\s*[:=]?\s*['\"]?(?:\{\s*seconds:\s*)?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+_RATE_LIMIT_MARKERS = ('429', 'resource_exhausted', 'resource exhausted', 'rate limit', 'quota', '503', 'unavailable', 'overloaded')
+
+
+@contextmanager
+def call_priority(level: int):
+    """Run LLM calls made inside the block (in this context) at the given priority"""
+    token = _call_priority.set(level)
+    try:
+        yield
+    finally:
+        _call_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _call_priority.get()
+
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when the LLM queue is full or a request waited past its queue timeout"""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for 429/quota errors and 503 overload responses, looking through wrapped causes"""
+    for _ in range(5):  # the error and a few wrapped causes
+        if error is None:
+            return False
+        if getattr(error, 'code', None) in (429, 503) or getattr(error, 'status_code', None) in (429, 503):
+            return True
+        text = f"{type(error).__name__} {error}".lower()
+        if any(marker in text for marker in _RATE_LIMIT_MARKERS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def retry_hint(error: BaseException) -> Optional[float]:
+    """Server-suggested retry delay in seconds, if the error message carries one"""
+    match = _RETRY_HINT.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def usage_tokens(message) -> Optional[int]:
+    """Total tokens reported on a LangChain response, if any"""
+    usage = getattr(message, 'usage_metadata', None)
+    if isinstance(usage, dict) and usage.get('total_tokens'):
+        return int(usage['total_tokens'])
+    return None
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 per second up to capacity (not thread-safe on its own)"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available; requests larger than the bucket wait for a full one"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else (0.0 if missing <= 0 else float('inf'))
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        self.level = min(self.capacity, self.level - delta)
+
+
+class LLMScheduler:
+    """Central admission control for LLM calls
+
+    Every call takes one request from the requests-per-minute bucket and
+    its estimated tokens (prompt + expected output) from the
+    tokens-per-minute bucket. Waiting calls are served by priority class,
+    then arrival order; the queue is bounded and each call waits at most
+    queue_timeout seconds. A 429/overload error pauses admission for
+    everyone with jittered exponential backoff (or the server's retry
+    hint) and the call is retried up to max_retries times.
+    """
+
+    def __init__(self, requests_per_minute: float = 10, tokens_per_minute: float = 250000, max_queue: int = 32,
+                 queue_timeout: float = 120, max_retries: int = 4, backoff_base: float = 2.0,
+                 backoff_max: float = 60.0, output_token_estimate: int = 1500):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.output_token_estimate = output_token_estimate
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._waits = deque(maxlen=500)
+        self._stats = {'admitted': 0, 'rejected': 0, 'timeouts': 0, 'rate_limited': 0, 'retries': 0}
+
+    def acquire(self, tokens: int, priority: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """Block until the call may run; returns the seconds spent queued"""
+        ticket = (current_priority() if priority is None else priority, next(self._seq))
+        start = time.monotonic()
+        deadline = start + (self.queue_timeout if timeout is None else timeout)
+
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise SchedulerBusyError(f"AI request queue is full ({self.max_queue} waiting), please try again shortly")
+            heapq.heappush(self._waiting, ticket)
+            admitted = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now),
+                                   self._paused_until - now)
+                        if wait <= 0:
+                            heapq.heappop(self._waiting)
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            admitted = True
+                            break
+                    if now >= deadline:
+                        self._stats['timeouts'] += 1
+                        raise SchedulerBusyError(f"AI service is busy: request waited {now - start:.0f}s in queue")
+                    self._cond.wait(min(wait, deadline - now) if wait is not None else deadline - now)
+            finally:
+                if not admitted and ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                # The next caller in line re-checks the buckets
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self._stats['admitted'] += 1
+            self._waits.append(waited)
+        metrics.observe('llm_queue_wait', waited, priority='batch' if ticket[0] == BATCH else 'interactive')
+        return waited
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Correct the token bucket once the real usage is known"""
+        if used is None:
+            return
+        with self._cond:
+            self.tokens.adjust(used - reserved)
+            self._cond.notify_all()
+
+    def _back_off(self, attempt: int, error: BaseException):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        hint = retry_hint(error)
+        if hint is not None:
+            delay = max(delay, min(hint, self.backoff_max))
+        with self._cond:
+            self._stats['rate_limited'] += 1
+            self._stats['retries'] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        metrics.increment('llm_rate_limited')
+
+    def run(self, call: Callable, prompt_tokens: int, priority: Optional[int] = None):
+        """Admit, run call() and retry it on rate-limit errors"""
+        priority = current_priority() if priority is None else priority
+        reserved = prompt_tokens + self.output_token_estimate
+        for attempt in range(self.max_retries + 1):
+            self.acquire(reserved, priority)
+            try:
+                result = call()
+            except Exception as e:
+                self.settle(reserved, 0)  # a rejected or failed call returns its reservation
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                self._back_off(attempt, e)
+                continue
+            self.settle(reserved, usage_tokens(result))
+            return result
+
+    def stream(self, start: Callable[[], Iterator], prompt_tokens: int, priority: Optional[int] = None) -> Iterator:
+        """Like run() for a streaming call; retries only before the first chunk arrives"""
+        priority = current_priority() if priority is None else priority
+        return self._stream(start, prompt_tokens, priority)
+
+    def _stream(self, start: Callable[[], Iterator], prompt_tokens: int, priority: int) -> Iterator:
+        """Settles once the stream ends (or is abandoned) from the reported usage,
+        falling back to the prompt plus the counted output text; an attempt that
+        fails before its first chunk returns its whole reservation"""
+        reserved = prompt_tokens + self.output_token_estimate
+        for attempt in range(self.max_retries + 1):
+            self.acquire(reserved, priority)
+            produced = completed = False
+            used = None
+            output_tokens = 0
+            try:
+                for chunk in start():
+                    produced = True
+                    used = usage_tokens(chunk) or used
+                    content = getattr(chunk, 'content', chunk)
+                    if isinstance(content, str):
+                        output_tokens += count_tokens(content)
+                    yield chunk
+                completed = True
+                return
+            except Exception as e:
+                if produced or attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                self._back_off(attempt, e)
+            finally:
+                if produced or completed:
+                    self.settle(reserved, used if used is not None else prompt_tokens + output_tokens)
+                else:
+                    self.settle(reserved, 0)
+
+    def stats(self) -> Dict:
+        """Admission counters, current queue depth and queue-time percentiles (seconds)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._waiting)
+            waits = sorted(self._waits)
+        if waits:
+            stats['wait_avg'] = round(sum(waits) / len(waits), 3)
+            stats['wait_p50'] = round(waits[len(waits) // 2], 3)
+            stats['wait_p95'] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3)
+            stats['wait_max'] = round(waits[-1], 3)
+        return stats
+
+
+def scheduler_from_env() -> LLMScheduler:
+    """Build the scheduler from LLM_* environment variables (defaults fit the Gemini free tier)"""
+    return LLMScheduler(
+        requests_per_minute=float(os.getenv('LLM_REQUESTS_PER_MINUTE', '10')),
+        tokens_per_minute=float(os.getenv('LLM_TOKENS_PER_MINUTE', '250000')),
+        max_queue=int(os.getenv('LLM_MAX_QUEUE', '32')),
+        queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', '120'))
+    )
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+from typing import Dict, List, Optional, Tuple
+
+# Histogram buckets in seconds, from regex passes up to full LLM calls
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Recent samples kept per series for percentiles
+SAMPLE_WINDOW = 1000
+
+
+def _series_key(name: str, labels: Dict) -> Tuple:
+    return (name,) + tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_text(key: Tuple) -> str:
+    if len(key) == 1:
+        return ""
+    pairs = ",".join(f'{label}="{value}"' for label, value in key[1:])
+    return "{" + pairs + "}"
+
+
+class _Histogram:
+    __slots__ = ('count', 'total', 'max', 'buckets', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+
+
+class Metrics:
+    """Thread-safe registry of stage durations (histograms) and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}  # series key -> _Histogram
+        self._counters = {}  # series key -> float
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """Record one duration for a stage"""
+        key = _series_key(stage, labels)
+        with self._lock:
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = _Histogram()
+            histogram.add(seconds)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add to a counter (tokens, errors, cache hits, ...)"""
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def timed(self, stage: str, **labels) -> "timed":
+        return timed(stage, registry=self, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> List[Dict]:
+        """One dict per series: durations with count/avg/p50/p95/max, counters with value"""
+        with self._lock:
+            durations = [(key, histogram.count, histogram.total, histogram.max, sorted(histogram.samples))
+                         for key, histogram in self._durations.items()]
+            counters = list(self._counters.items())
+
+        rows = []
+        for key, count, total, maximum, samples in sorted(durations):
+            rows.append({
+                'type': 'duration',
+                'stage': key[0],
+                'labels': dict(key[1:]),
+                'count': count,
+                'avg': round(total / count, 4) if count else 0,
+                'p50': round(samples[len(samples) // 2], 4) if samples else 0,
+                'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4) if samples else 0,
+                'max': round(maximum, 4),
+                'total': round(total, 4),
+            })
+        for key, value in sorted(counters):
+            rows.append({'type': 'counter', 'name': key[0], 'labels': dict(key[1:]), 'value': value})
+        return rows
+
+    def prometheus_text(self, prefix: str = "nextrole_") -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            durations = sorted((key, histogram.count, histogram.total, list(histogram.buckets))
+                               for key, histogram in self._durations.items())
+            counters = sorted(self._counters.items())
+
+        lines = [f"# TYPE {prefix}stage_duration_seconds histogram"]
+        for key, count, total, buckets in durations:
+            labels = (('stage', key[0]),) + key[1:]
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"{prefix}stage_duration_seconds_bucket{_label_text(('',) + labels + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{prefix}stage_duration_seconds_bucket{_label_text(('',) + labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{prefix}stage_duration_seconds_sum{_label_text(('',) + labels)} {total}")
+            lines.append(f"{prefix}stage_duration_seconds_count{_label_text(('',) + labels)} {count}")
+
+        typed = set()
+        for key, value in counters:
+            name = f"{prefix}{key[0]}_total"
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_label_text(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self) -> str:
+        """One JSON object per series, stamped with the export time"""
+        now = time.time()
+        return "".join(json.dumps(dict(row, ts=now)) + "\n" for row in self.snapshot())
+
+    def export(self, path: str, fmt: Optional[str] = None):
+        """Write the current metrics to path as 'prometheus' or 'jsonl' (by extension if fmt is None)
+
+        Prometheus output replaces the file (for a textfile collector);
+        JSON lines are appended so the file keeps a history of snapshots.
+        """
+        fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'prometheus')
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if fmt == 'jsonl':
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(self.json_lines())
+            return
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            handle.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+    def start_exporter(self, path: str, interval: float = 60, fmt: Optional[str] = None) -> threading.Thread:
+        """Export every interval seconds from a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.export(path, fmt)
+                except OSError as e:
+                    print(f"Metrics export failed: {e}")
+
+        thread = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        thread.start()
+        return thread
+
+
+class timed(ContextDecorator):
+    """Time a block or function as a stage: `with timed('pdf_parse'):` or `@timed('ats_scoring')`
+
+    Exceptions are counted in stage_errors with the same labels and re-raised.
+    """
+
+    def __init__(self, stage: str, registry: Optional[Metrics] = None, **labels):
+        self.stage = stage
+        self.registry = registry
+        self.labels = labels
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self._starts, 'stack', None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._starts.stack.pop()
+        registry = self.registry or metrics
+        registry.observe(self.stage, elapsed, **self.labels)
+        if exc_type is not None:
+            registry.increment('stage_errors', stage=self.stage, **self.labels)
+        return False
+
+
+metrics = Metrics()
+
+if os.getenv('METRICS_EXPORT_PATH'):
+    metrics.start_exporter(os.environ['METRICS_EXPORT_PATH'], float(os.getenv('METRICS_EXPORT_INTERVAL', '60')))
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import pdfplumber
+
+from metrics import metrics
+
+NO_TEXT_MESSAGE = "Could not extract text from PDF. Please try a different file or check if the PDF contains selectable text."
+PDF_TEXT_CACHE_SIZE = 32
+
+# Below this many pages a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 8
+
+_pdf_text_cache = OrderedDict()
+_pdf_text_cache_lock = threading.Lock()
+
+
+def _has_fonts(resources, seen: set) -> bool:
+    """True if a resource dictionary, or any Form XObject it draws, declares fonts"""
+    if resources is None:
+        return False
+    resources = resources.get_object()
+    if resources.get('/Font'):
+        return True
+    xobjects = resources.get('/XObject')
+    if xobjects is None:
+        return False
+    for ref in xobjects.get_object().values():
+        key = (ref.idnum, ref.generation) if hasattr(ref, 'idnum') else id(ref)
+        if key in seen:
+            continue  # shared or self-referencing forms
+        seen.add(key)
+        xobject = ref.get_object()
+        if xobject.get('/Subtype') == '/Form' and _has_fonts(xobject.get('/Resources'), seen):
+            return True
+    return False
+
+
+def _inspect_pdf(pdf_bytes: bytes):
+    """Cheap structural check before any text extraction
+
+    Returns (status, reader) where status is 'text' (some page or a Form
+    XObject it draws has fonts), 'image_only' (no fonts anywhere, so there
+    is no text layer) or 'unreadable' (PyPDF2 can't parse the structure).
+    """
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        seen = set()
+        for page in reader.pages:
+            if _has_fonts(page.get('/Resources'), seen):
+                return 'text', reader
+        return 'image_only', reader
+    except Exception as e:
+        print(f"PDF pre-check failed: {e}")
+        return 'unreadable', None
+
+
+def _pdfplumber_pages(pdf_bytes: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Yield page texts from pdfplumber one page at a time"""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages[start:end]:
+            page_text = page.extract_text()
+            page.close()  # drop the page's parsed layout before moving on
+            yield page_text or ""
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, end: int) -> List[str]:
+    """Process-pool worker: text of pages [start, end)"""
+    return list(_pdfplumber_pages(pdf_bytes, start, end))
+
+
+def iter_pdf_pages(pdf_bytes: bytes, max_pages: Optional[int] = None, reader=None) -> Iterator[str]:
+    """Yield page texts as they are parsed
+
+    Uses pdfplumber; if it fails or only finds blank pages, falls back to
+    the PyPDF2 reader (opened here when not supplied). Leading blank pages
+    are held back until pdfplumber finds some text, so nothing is yielded
+    twice when the fallback runs.
+    """
+    blank_pages = 0
+    found_text = False
+    try:
+        for page_text in _pdfplumber_pages(pdf_bytes, 0, max_pages):
+            if not found_text and not page_text.strip():
+                blank_pages += 1
+                continue
+            if not found_text:
+                found_text = True
+                yield from [""] * blank_pages
+            yield page_text
+    except Exception as e:
+        print(f"pdfplumber failed: {e}")
+    if found_text:
+        return
+
+    try:
+        if reader is None:
+            import PyPDF2
+            reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        for page in reader.pages[:max_pages]:
+            yield page.extract_text() or ""
+    except Exception as e:
+        print(f"PyPDF2 failed: {e}")
+
+
+def _parallel_pages(pdf_bytes: bytes, page_count: int, processes: int) -> List[str]:
+    """Split the page range across worker processes"""
+    chunk = -(-page_count // processes)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        parts = pool.map(_extract_page_range, [pdf_bytes] * len(ranges), *zip(*ranges))
+        return [page_text for part in parts for page_text in part]
+
+
+def extract_pdf_text(pdf_bytes: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                     processes: int = 0) -> str:
+    """Extract text from PDF bytes, stopping early at max_pages / max_chars
+
+    processes > 1 parses page ranges on a process pool for long documents;
+    otherwise pages are streamed so caps stop parsing as soon as they are hit.
+    """
+    if b'%PDF' not in pdf_bytes[:1024]:
+        return "Error processing PDF: file is not a valid PDF document."
+
+    status, reader = _inspect_pdf(pdf_bytes)
+    if status == 'image_only':
+        return NO_TEXT_MESSAGE
+
+    page_count = len(reader.pages) if reader is not None else 0
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    pages = []
+    workers = min(processes, os.cpu_count() or 1)
+    if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+        try:
+            pages = _parallel_pages(pdf_bytes, page_count, workers)
+        except Exception as e:
+            print(f"Parallel PDF extraction failed: {e}")
+
+    if not any(page.strip() for page in pages):
+        pages = []
+        chars = 0
+        for page_text in iter_pdf_pages(pdf_bytes, max_pages, reader):
+            pages.append(page_text)
+            chars += len(page_text) + 1
+            if max_chars is not None and chars >= max_chars:
+                break
+
+    text = "\n".join(page for page in pages if page)
+    if not text.strip():
+        return NO_TEXT_MESSAGE
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text + "\n"
+
+
+def extract_text_from_pdf(uploaded_file, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                          processes: int = 0):
+    """Extract text from uploaded PDF, cached by a hash of the file contents"""
+    try:
+        # Reset file pointer
+        uploaded_file.seek(0)
+        pdf_bytes = uploaded_file.read()
+        key = (hashlib.sha256(pdf_bytes).hexdigest(), max_pages, max_chars)
+
+        with _pdf_text_cache_lock:
+            if key in _pdf_text_cache:
+                _pdf_text_cache.move_to_end(key)
+                metrics.increment('pdf_cache', result='hit')
+                return _pdf_text_cache[key]
+
+        metrics.increment('pdf_cache', result='miss')
+        with metrics.timed('pdf_parse'):
+            text = extract_pdf_text(pdf_bytes, max_pages, max_chars, processes)
+
+        with _pdf_text_cache_lock:
+            _pdf_text_cache[key] = text
+            while len(_pdf_text_cache) > PDF_TEXT_CACHE_SIZE:
+                _pdf_text_cache.popitem(last=False)
+        return text
+
+    except Exception as e:
+        return f"Error processing PDF: {str(e)}"
@@ -0,0 +1,394 @@
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Gemini's tokenizer isn't available offline. This estimate takes the larger of
+# the word/punctuation count and chars / 4, which tends to over-count slightly,
+# so prompts land under budget. Pass counter= for exact counts.
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+# Below this many tokens a trimmed section isn't worth including
+MIN_SECTION_TOKENS = 40
+
+TRIM_MARKER = "[...]"
+
+# Resume headings by priority (0 = always keep first)
+RESUME_SECTIONS = {
+    0: ("experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "internships", "internship", "skills", "technical skills", "core competencies",
+        "key skills", "technologies", "tech stack", "skills & tools", "skills and tools"),
+    1: ("projects", "personal projects", "key projects", "summary", "professional summary", "profile",
+        "objective", "career objective", "about me"),
+    2: ("certifications", "certificates", "achievements", "awards", "accomplishments", "education",
+        "licenses"),
+    3: ("publications", "volunteer", "volunteering", "leadership", "activities", "languages"),
+    4: ("interests", "hobbies", "references", "declaration"),
+}
+
+# Job description headings by priority
+JOB_SECTIONS = {
+    0: ("requirements", "qualifications", "required qualifications", "minimum qualifications",
+        "what you'll need", "what you need", "what we're looking for", "must have", "skills",
+        "required skills", "who you are"),
+    1: ("responsibilities", "key responsibilities", "what you'll do", "the role", "role", "duties",
+        "preferred qualifications", "nice to have", "bonus points"),
+    2: ("about the role", "overview", "job summary", "summary", "description"),
+    3: ("about us", "about the company", "who we are", "benefits", "perks", "compensation", "salary"),
+    4: ("equal opportunity", "eeo statement", "how to apply"),
+}
+
+# Text before the first recognised heading (contact details, intro)
+PREAMBLE_PRIORITY = 2
+# Headings that look like headings but aren't in the table
+UNKNOWN_SECTION_PRIORITY = 3
+# When a document doesn't fit, sections below this priority are left out even if there's room
+MAX_SELECTED_PRIORITY = 2
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count for prompt budgeting"""
+    if not text:
+        return 0
+    return max(len(_TOKEN_PIECE.findall(text)), (len(text) + 3) // 4)
+
+
+def truncate_to_tokens(text: str, budget: int, counter: Callable[[str], int] = count_tokens) -> str:
+    """Longest prefix of text, cut at a line or word boundary, within budget tokens"""
+    if counter(text) <= budget:
+        return text
+
+    kept, used = [], counter(TRIM_MARKER)
+    for line in text.splitlines():
+        cost = counter(line) + 1
+        if used + cost <= budget:
+            kept.append(line)
+            used += cost
+            continue
+        words = []
+        for word in line.split():
+            cost = counter(word)
+            if used + cost > budget:
+                break
+            words.append(word)
+            used += cost
+        if words:
+            kept.append(" ".join(words))
+        break
+    kept.append(TRIM_MARKER)
+    return "\n".join(kept)
+
+
+class Section(NamedTuple):
+    position: int
+    heading: str
+    body: str
+    priority: int
+
+    @property
+    def text(self) -> str:
+        return f"{self.heading}\n{self.body}".strip() if self.heading else self.body.strip()
+
+
+def _heading_priority(line: str, table: Dict[str, int]) -> Optional[int]:
+    """Priority of line if it looks like a section heading, else None"""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 40 or len(stripped.split()) > 5:
+        return None
+    normalized = re.sub(r"\s+", " ", stripped.strip("#*-•:|=_ \t").lower())
+    normalized = normalized.replace("’", "'")
+    if normalized in table:
+        return table[normalized]
+    # ALL-CAPS short lines are headings even when we don't know the name
+    letters = re.sub(r"[^A-Za-z]", "", stripped)
+    if len(letters) >= 4 and letters.isupper():
+        return UNKNOWN_SECTION_PRIORITY
+    return None
+
+
+def split_sections(text: str, priorities: Dict[int, Sequence[str]]) -> List[Section]:
+    """Split a document at recognised headings; text before the first heading is the preamble"""
+    table = {phrase: priority for priority, phrases in priorities.items() for phrase in phrases}
+
+    sections = []
+    heading, priority, lines = "", PREAMBLE_PRIORITY, []
+    for line in text.splitlines():
+        line_priority = _heading_priority(line, table)
+        if line_priority is None:
+            lines.append(line)
+            continue
+        if heading or any(part.strip() for part in lines):
+            sections.append(Section(len(sections), heading, "\n".join(lines), priority))
+        heading, priority, lines = line.strip(), line_priority, []
+    if heading or any(part.strip() for part in lines):
+        sections.append(Section(len(sections), heading, "\n".join(lines), priority))
+    return sections
+
+
+def select_sections(text: str, budget: int, priorities: Optional[Dict[int, Sequence[str]]] = None,
+                    keywords: Iterable[str] = (), counter: Callable[[str], int] = count_tokens) -> str:
+    """The most relevant parts of a document that fit in budget tokens, in document order
+
+    Sections are taken a priority tier at a time: whole sections that fit
+    first (most keyword mentions first), then the first one that doesn't is
+    trimmed to the space left. Low-priority sections (interests, benefits,
+    ...) are dropped, and the headings of everything left out are listed
+    so the model knows they exist.
+    """
+    text = text.strip()
+    if budget <= 0 or not text:
+        return ""
+    if counter(text) <= budget:
+        return text
+
+    sections = split_sections(text, priorities) if priorities else []
+    if len(sections) < 2:
+        return truncate_to_tokens(text, budget, counter)
+
+    terms = [term.lower() for term in keywords if term]
+
+    def rank(section: Section) -> Tuple:
+        lowered = section.text.lower()
+        return section.priority, -sum(term in lowered for term in terms), section.position
+
+    headings = [section.heading for section in sections if section.heading]
+    chosen, remaining = {}, budget - counter("Omitted sections: " + ", ".join(headings))
+    for priority in sorted({section.priority for section in sections}):
+        if priority > MAX_SELECTED_PRIORITY or remaining < MIN_SECTION_TOKENS:
+            break
+        tier = sorted((section for section in sections if section.priority == priority), key=rank)
+        for section in tier:
+            cost = counter(section.text) + 1
+            if cost <= remaining:
+                chosen[section.position] = section.text
+                remaining -= cost
+        leftover = [section for section in tier if section.position not in chosen]
+        if leftover and remaining >= MIN_SECTION_TOKENS:
+            chosen[leftover[0].position] = truncate_to_tokens(leftover[0].text, remaining - 1, counter)
+            remaining = 0
+
+    parts = [chosen[position] for position in sorted(chosen)]
+    omitted = [section.heading for section in sections if section.heading and section.position not in chosen]
+    if omitted:
+        parts.append("Omitted sections: " + ", ".join(omitted))
+    return "\n\n".join(parts)
+
+
+# Shared instruction templates. Bullets may use {placeholders} filled from build(values=...).
+RESPONSE_STYLE = "Respond in Markdown using exactly the headings below, with bullet points and specific, actionable recommendations."
+
+REPORTS = {
+    'resume_analysis': {
+        'task': "Analyze this resume in detail.",
+        'title': "## 📊 Resume Analysis Report",
+        'sections': [
+            ("Skills Assessment", ["Technical skills identified and proficiency levels",
+                                   "Soft skills and leadership qualities",
+                                   "Industry-specific competencies"]),
+            ("Experience Evaluation", ["Career level assessment (Junior/Mid/Senior)",
+                                       "Years of experience estimation",
+                                       "Career progression analysis"]),
+            ("ATS Optimization", ["Current ATS compatibility score: {ats_score}/100",
+                                  "Specific formatting improvements needed",
+                                  "Missing keywords for better visibility"]),
+            ("Content Quality Review", ["Strengths and standout achievements",
+                                        "Areas requiring improvement",
+                                        "Missing critical sections"]),
+            ("Market Competitiveness", ["Overall market readiness score (1-10)",
+                                        "Comparison to industry standards",
+                                        "Competitive advantages identified"]),
+            ("Action Plan", ["Top 5 specific improvements to implement",
+                             "Keywords to add for better ATS performance",
+                             "Recommended next steps"]),
+        ],
+    },
+    'job_matching': {
+        'task': "Perform a detailed job matching analysis.",
+        'title': "## 🎯 Job Matching Report",
+        'sections': [
+            ("Skills Alignment", ["Matching skills and proficiency levels",
+                                  "Gap analysis for missing requirements",
+                                  "Transferable skills identification"]),
+            ("Role Compatibility", ["Overall fit score: {compatibility_score}/100",
+                                    "Experience level match",
+                                    "Industry alignment assessment"]),
+            ("Market Opportunities", ["Recommended job titles and roles",
+                                      "Growth industries for this skillset",
+                                      "Salary expectations and ranges"]),
+            ("Skill Development Plan", ["Priority skills to develop",
+                                        "Recommended certifications",
+                                        "Learning resources and timeline"]),
+            ("Application Strategy", ["How to position yourself for target roles",
+                                      "Keywords to emphasize",
+                                      "Portfolio/project recommendations"]),
+        ],
+    },
+    'company_research': {
+        'task': "Write an interview-focused research guide on this company.",
+        'title': "## 🏢 Company Intelligence Report",
+        'sections': [
+            ("Company Overview", ["Mission, vision, and core values",
+                                  "Business model and key products/services",
+                                  "Market position and competitive advantages",
+                                  "Leadership team and organizational structure"]),
+            ("Recent Developments", ["Latest news and announcements",
+                                     "Growth initiatives and strategic moves",
+                                     "Financial performance and market trends",
+                                     "Industry challenges and opportunities"]),
+            ("Culture & Work Environment", ["Company culture and values",
+                                            "Work-life balance and employee benefits",
+                                            "Diversity and inclusion initiatives",
+                                            "Employee satisfaction and retention"]),
+            ("Interview Intelligence", ["Typical interview process and timeline",
+                                        "Common interview questions for this company",
+                                        "Assessment criteria and what they value",
+                                        "Decision-making factors and priorities"]),
+            ("Strategic Talking Points", ["How to align the candidate's experience with their needs",
+                                          "Key achievements to highlight",
+                                          "Questions to ask the interviewer",
+                                          "Value proposition positioning"]),
+            ("Salary & Benefits Analysis", ["Market rate expectations for roles",
+                                            "Benefits and perks typically offered",
+                                            "Negotiation strategies and timing",
+                                            "Total compensation benchmarks"]),
+            ("Risk Assessment", ["Company challenges or potential concerns",
+                                 "Industry headwinds and market risks",
+                                 "Growth sustainability analysis"]),
+        ],
+    },
+    'interview_prep': {
+        'task': "Create a detailed interview preparation plan tailored to this role and company.",
+        'title': "## 🎯 Interview Preparation Masterplan",
+        'sections': [
+            ("Technical Interview Questions (15+ questions)", ["Role-specific technical questions with difficulty levels",
+                                                               "Problem-solving scenarios and case studies",
+                                                               "System design questions (if applicable)",
+                                                               "Code challenges and algorithmic thinking"]),
+            ("Behavioral Interview Questions (12+ questions)", ["Leadership and teamwork scenarios",
+                                                                "Conflict resolution and problem-solving",
+                                                                "Achievement stories and failure recovery",
+                                                                "Motivation, career goals, and culture fit"]),
+            ("Company-Specific Questions (8+ questions)", ["Why this company and role specifically",
+                                                           "Alignment with company values",
+                                                           "Knowledge of products, services, market and challenges"]),
+            ("STAR Method Frameworks", ["Templates and example answers for common scenarios",
+                                        "Quantifiable achievement examples"]),
+            ("Strategic Questions to Ask Interviewer", ["Role, team dynamics, and expectations",
+                                                        "Culture, growth, and career development",
+                                                        "Success metrics and performance evaluation"]),
+            ("Salary Negotiation Masterclass", ["Market salary ranges and total compensation",
+                                                "When and how to discuss compensation",
+                                                "Counter-offer strategies"]),
+            ("Interview Day Excellence", ["Presentation, logistics and mindset",
+                                          "Follow-up and thank-you note templates"]),
+            ("Mock Interview Practice Plan", ["Key scenarios to practice",
+                                              "Common mistakes to avoid",
+                                              "Self-assessment and peer feedback"]),
+        ],
+    },
+    'career_summary': {
+        'task': "Create a career strategy summary that connects the analyses above.",
+        'title': "## 🚀 Complete Career Strategy Report",
+        'sections': [
+            ("Executive Summary", ["Overall career readiness assessment",
+                                   "Key strengths and competitive advantages",
+                                   "Priority areas for improvement",
+                                   "Strategic career positioning"]),
+            ("Integrated Action Plan", ["Immediate actions (next 1-2 weeks)",
+                                        "Short-term goals (next 1-3 months)",
+                                        "Long-term career strategy (6-12 months)",
+                                        "Success metrics and milestones"]),
+            ("Market Positioning Strategy", ["Positioning in the current market",
+                                             "Industry trends and opportunities alignment",
+                                             "Personal brand and networking recommendations"]),
+            ("Next Steps Prioritization", ["Top priority actions with deadlines",
+                                           "Resource requirements and investments",
+                                           "Success tracking and contingency plans"]),
+        ],
+    },
+}
+
+
+def render_report(name: str, values: Optional[Dict] = None) -> str:
+    """Heading and bullet instructions for one of REPORTS"""
+    report = REPORTS[name]
+    values = values or {}
+    lines = [RESPONSE_STYLE, "", report['title']]
+    for heading, bullets in report['sections']:
+        lines.append(f"### {heading}")
+        lines.extend(f"- {bullet.format(**values)}" for bullet in bullets)
+    return "\n".join(lines)
+
+
+class PromptBuilder:
+    """Assembles a prompt for one of REPORTS within a token budget
+
+    The report's task line comes first and its instructions last. Fixed
+    parts (task, fields, instructions) are always included.
+    Whatever budget they leave is split across the documents by weight;
+    a document shorter than its share hands the rest to the others.
+    """
+
+    def __init__(self, report: str, budget: int, counter: Callable[[str], int] = count_tokens):
+        self.report = report
+        self.budget = budget
+        self.counter = counter
+        self.tokens = 0
+        self._parts = []  # ('text', str) or ('document', dict)
+
+    def add(self, text: str) -> "PromptBuilder":
+        if text:
+            self._parts.append(('text', text))
+        return self
+
+    def add_field(self, label: str, value) -> "PromptBuilder":
+        if value not in (None, "", []):
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(str(item) for item in value)
+            self._parts.append(('text', f"{label}: {value}"))
+        return self
+
+    def add_document(self, label: str, text: str, priorities: Optional[Dict[int, Sequence[str]]] = None,
+                     keywords: Iterable[str] = (), weight: float = 1.0) -> "PromptBuilder":
+        if text and text.strip():
+            self._parts.append(('document', {'label': label, 'text': text.strip(), 'priorities': priorities,
+                                             'keywords': list(keywords), 'weight': weight}))
+        return self
+
+    def _allocate(self, documents: List[Dict], available: int) -> List[int]:
+        """Token share per document, redistributing what short documents don't use"""
+        sizes = [self.counter(document['text']) for document in documents]
+        shares = [0] * len(documents)
+        open_indexes = list(range(len(documents)))
+        while open_indexes and available > 0:
+            total_weight = sum(documents[index]['weight'] for index in open_indexes)
+            offers = {index: int(available * documents[index]['weight'] / total_weight) for index in open_indexes}
+            satisfied = [index for index in open_indexes if sizes[index] <= offers[index]]
+            if not satisfied:
+                for index in open_indexes:
+                    shares[index] = offers[index]
+                break
+            for index in satisfied:
+                shares[index] = sizes[index]
+                available -= sizes[index]
+                open_indexes.remove(index)
+        return shares
+
+    def build(self, values: Optional[Dict] = None) -> str:
+        parts = [('text', REPORTS[self.report]['task'])] + self._parts + [('text', render_report(self.report, values))]
+        fixed = [part for kind, part in parts if kind == 'text']
+        documents = [part for kind, part in parts if kind == 'document']
+        overhead = sum(self.counter(part) + 1 for part in fixed)
+        overhead += sum(self.counter(document['label']) + 2 for document in documents)
+        shares = iter(self._allocate(documents, self.budget - overhead))
+
+        rendered = []
+        for kind, part in parts:
+            if kind == 'text':
+                rendered.append(part)
+                continue
+            body = select_sections(part['text'], next(shares), part['priorities'], part['keywords'], self.counter)
+            if body:
+                rendered.append(f"{part['label']}:\n{body}")
+
+        prompt = "\n\n".join(rendered)
+        self.tokens = self.counter(prompt)
+        return prompt
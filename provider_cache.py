@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+# Freshness per data source in seconds
+PROVIDER_TTLS = {
+    'news': 3600,
+    'financial_data': 24 * 3600,
+    'market_sentiment': 3600,
+    'job_market': 6 * 3600,
+}
+
+
+class ProviderCache:
+    """TTL cache for external API results with stale-while-revalidate and request coalescing
+
+    A fresh entry is returned directly. An expired entry still inside its
+    stale window is returned immediately while one background refresh
+    runs. Concurrent misses for the same key share a single upstream call.
+    Failed fetches (None) are never cached. The SQLite tier keeps at most
+    max_disk_entries rows, dropping the oldest fetches on write.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 3600,
+                 stale_factor: float = 1.0, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.ttls = dict(PROVIDER_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.stale_factor = stale_factor
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (fetched_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="provider-refresh")
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0}
+
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS provider_cache "
+                        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS provider_cache_fetched ON provider_cache (fetched_at)")
+            except sqlite3.Error as e:
+                print(f"Provider disk cache disabled: {e}")
+                self.disk_path = None
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.disk_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(source: str, *parts) -> str:
+        return source + ':' + '|'.join(str(part).strip().lower() for part in parts)
+
+    def get_or_fetch(self, source: str, key_parts: Tuple, fetch: Callable, ttl: Optional[float] = None):
+        """Return the cached value for (source, key_parts), calling fetch() when needed"""
+        ttl = ttl if ttl is not None else self.ttls.get(source, self.default_ttl)
+        key = self.make_key(source, *key_parts)
+        entry = self._lookup(key)
+
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < ttl:
+                self._count('hits')
+                return entry[1]
+            if age < ttl * (1 + self.stale_factor):
+                self._count('stale_hits')
+                self._refresh_in_background(key, fetch)
+                return entry[1]
+
+        self._count('misses')
+        return self._fetch_once(key, fetch)
+
+    def _fetch_once(self, key: str, fetch: Callable):
+        """Single-flight fetch: concurrent callers for the same key wait on one call"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+            if value is not None:
+                self._store(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, fetch: Callable):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._fetch_once(key, fetch)
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+
+        self._refresher.submit(refresh)
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if not self.disk_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, fetched_at FROM provider_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Provider disk cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+
+        entry = (row[1], json.loads(row[0]))
+        self._remember(key, entry)
+        return entry
+
+    def _store(self, key: str, value):
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO provider_cache (key, value, fetched_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), entry[0])
+                    )
+                    conn.execute(
+                        "DELETE FROM provider_cache WHERE key IN "
+                        "(SELECT key FROM provider_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                print(f"Provider disk cache write failed: {e}")
+
+    def _remember(self, key: str, entry: Tuple):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def clear(self):
+        """Drop all cached provider results"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM provider_cache")
+            except sqlite3.Error as e:
+                print(f"Provider disk cache clear failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/stale/miss/coalesced counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
+
+
+default_provider_cache = ProviderCache(
+    disk_path=os.getenv('PROVIDER_CACHE_PATH') or None,
+    max_disk_entries=int(os.getenv('PROVIDER_CACHE_MAX_DISK_ENTRIES', '10000'))
+)
@@ -0,0 +1,546 @@
+"""Embedding-based job matching: requirement-to-evidence alignment and a local job vector index
+
+Resumes and job descriptions are split into short segments (bullets,
+sentences), embedded, and compared by cosine similarity. Embeddings come
+from a local sentence-transformers model when SEMANTIC_EMBEDDING_MODEL is
+set, otherwise from a deterministic hashing embedder that needs no model.
+Vectors are cached by content hash. Stored job descriptions live in an
+hnswlib index when that package is installed, or a NumPy matrix otherwise,
+backed by a SQLite table (SEMANTIC_INDEX_PATH) that every process shares.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import metrics, timed
+from skill_matcher import default_taxonomy
+
+SEGMENT_MIN_WORDS = 3
+SEGMENT_MAX_WORDS = 50
+MAX_REQUIREMENTS = 40
+
+_BULLET = re.compile(r'^(?:[-*•▪●◦‣–—>]|\(cid:\d+\)|\d{1,2}[.)])\s+')
+_SENTENCE_END = re.compile(r'(?<=[.!?;])\s+(?=[A-Z(])')
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+
+# Short lines that introduce a section ("Requirements", "About the role:", "What we offer");
+# any other short line is content ("Python and Django")
+_SECTION_HEADING = re.compile(
+    r"^(?:[a-z'&/+-]+\s+){0,3}(?:requirements|qualifications|responsibilities|duties|skills|experience|education"
+    r"|summary|profile|objective|projects|certifications?|awards|publications|languages|interests|stack"
+    r"|technologies|tools|benefits|perks|compensation|salary|role|position|company|team|us|you|are|do|offer"
+    r"|bring|have|opportunity|apply|overview|description|expectations|background|history|employment)$"
+)
+
+# Job description sections that describe the company rather than the role
+_JD_BOILERPLATE = re.compile(r'\b(?:about|benefits?|perks|equal opportunity|compensation|salary|how to apply|why join|who we are)\b')
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to was we were will with
+you your years year experience including using used use strong ability work working plus etc
+skills knowledge proven required preferred familiarity solid
+""".split())
+
+
+# Segmentation
+
+def split_segments(text: str) -> List[Tuple[str, str]]:
+    """(section, segment) pairs: one per bullet or sentence, known headings tracked as the current section"""
+    segments = []
+    section = ""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        is_bullet = _BULLET.match(line) is not None
+        if not is_bullet and len(line.split()) <= 4 and ',' not in line and '.' not in line:
+            heading = line.strip(' :#*').lower()
+            if _SECTION_HEADING.match(heading):
+                section = heading
+                continue
+        body = _BULLET.sub('', line)
+        sentences = _SENTENCE_END.split(body)
+        for sentence in sentences:
+            words = sentence.split()
+            for start in range(0, len(words), SEGMENT_MAX_WORDS):
+                chunk = words[start:start + SEGMENT_MAX_WORDS]
+                # A whole line is kept at any length ("- Python"); only fragments of a
+                # longer paragraph have to be substantial on their own
+                if len(sentences) == 1 or len(chunk) >= SEGMENT_MIN_WORDS or ',' in sentence:
+                    segments.append((section, ' '.join(chunk)))
+    return segments
+
+
+def split_requirements(job_description: str) -> List[str]:
+    """Requirement statements of a job description, skipping company boilerplate sections"""
+    segments = split_segments(job_description)
+    requirements = [text for section, text in segments if not _JD_BOILERPLATE.search(section)]
+    requirements = requirements or [text for _, text in segments]
+    return list(dict.fromkeys(requirements))[:MAX_REQUIREMENTS]
+
+
+# Embedders
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedding; runs anywhere with no model download
+
+    Features are content words, character trigrams (so "deploying" and
+    "deployment" overlap), and canonical taxonomy skills with their parent
+    skills and categories, so aliases ("JS"/"JavaScript"), frameworks
+    ("Django" -> Python) and related tools (two databases) land close together.
+    """
+
+    match_threshold = 0.45
+    partial_threshold = 0.22
+
+    # Weight per feature kind: word, character trigram, skill, skill category
+    WEIGHTS = {'w': 1.0, 'c': 0.1, 's': 2.5, 'k': 1.5}
+
+    def __init__(self, dim: int = 1024, taxonomy=default_taxonomy):
+        self.dim = dim
+        self.taxonomy = taxonomy
+        # Vectors depend on the taxonomy and how it matches text, so an edited skills file or
+        # matcher must not reuse cached embeddings or a stored index built from the old one
+        fingerprint = hashlib.sha256((json.dumps(taxonomy.entries, sort_keys=True) +
+                                      taxonomy.matcher.pattern_source).encode('utf-8')).hexdigest()[:12]
+        self.model_id = f"hashing-{dim}-v1-{fingerprint}"
+
+    def _features(self, text: str) -> Counter:
+        features = Counter()
+        for word in _TOKEN.findall(text.lower()):
+            if word in _STOPWORDS:
+                continue
+            features['w:' + word] += 1
+            if len(word) >= 5:
+                features.update('c:' + word[i:i + 3] for i in range(len(word) - 2))
+        skills = self.taxonomy.extract(text)
+        for skill in self.taxonomy.expand_with_parents(skills):
+            features['s:' + skill] += 2 if skill in skills else 1  # implied parents count half
+            features['k:' + self.taxonomy.category_of(skill)] += 1
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode('utf-8'))  # stable across processes, unlike hash()
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                matrix[row, digest % self.dim] += sign * self.WEIGHTS[feature[0]] * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model on CPU (pip install sentence-transformers)"""
+
+    match_threshold = 0.6
+    partial_threshold = 0.45
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.model_id = f"st:{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+# Embedding cache
+
+class EmbeddingCache:
+    """Vectors keyed by model and content hash: LRU in memory with an optional SQLite tier
+
+    The SQLite tier keeps at most max_disk_entries vectors, dropping the
+    oldest writes first.
+    """
+
+    def __init__(self, max_entries: int = 20000, disk_path: Optional[str] = None, max_disk_entries: int = 50000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            except sqlite3.Error as e:
+                print(f"Embedding disk cache disabled: {e}")
+                self.disk_path = None
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.disk_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        return hashlib.sha256(f"{model_id}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+            self._stats['hits'] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.disk_path:
+            disk = self._disk_get(missing)
+            self._memory_set(disk)
+            found.update(disk)
+            with self._lock:
+                self._stats['disk_hits'] += len(disk)
+        with self._lock:
+            self._stats['misses'] += len(keys) - len(found)
+        return found
+
+    def set_many(self, vectors: Dict[str, np.ndarray]):
+        self._memory_set(vectors)
+        if self.disk_path and vectors:
+            try:
+                with self._connect() as conn:
+                    conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                     [(key, vector.astype(np.float32).tobytes()) for key, vector in vectors.items()])
+                    # INSERT OR REPLACE gives rewritten rows a new rowid, so rowid order is write order
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+            except sqlite3.Error as e:
+                print(f"Embedding disk cache write failed: {e}")
+
+    def _memory_set(self, vectors: Dict[str, np.ndarray]):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        except sqlite3.Error as e:
+            print(f"Embedding disk cache read failed: {e}")
+        return found
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+# Vector indexes (inner product over unit vectors = cosine similarity)
+
+class NumpyIndex:
+    """Exact brute-force search; a few thousand jobs take about a millisecond"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids = []
+        self._rows = {}
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        new_rows = []
+        for item_id, vector in zip(ids, vectors):
+            row = self._rows.get(item_id)
+            if row is None:
+                self._rows[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                new_rows.append(vector)
+            elif row < len(self.vectors):
+                self.vectors[row] = vector
+            else:
+                new_rows[row - len(self.vectors)] = vector
+        if new_rows:
+            self.vectors = np.vstack([self.vectors, np.asarray(new_rows, dtype=np.float32)])
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        scores = self.vectors @ vector
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[row], float(scores[row])) for row in top]
+
+
+class HnswIndex:
+    """Approximate nearest-neighbour search with hnswlib, for very large job stores"""
+
+    def __init__(self, dim: int, capacity: int = 10000, ef: int = 100, m: int = 16):
+        import hnswlib
+        self.dim = dim
+        self.ids = []
+        self._labels = {}
+        self.index = hnswlib.Index(space='ip', dim=dim)
+        self.index.init_index(max_elements=capacity, ef_construction=200, M=m)
+        self.index.set_ef(ef)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        labels = []
+        for item_id in ids:
+            if item_id not in self._labels:
+                self._labels[item_id] = len(self.ids)
+                self.ids.append(item_id)
+            labels.append(self._labels[item_id])
+        if len(self.ids) > self.index.get_max_elements():
+            self.index.resize_index(max(len(self.ids), 2 * self.index.get_max_elements()))
+        self.index.add_items(np.asarray(vectors, dtype=np.float32), labels)  # existing labels are updated in place
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        labels, distances = self.index.knn_query(vector.reshape(1, -1), k=k)
+        return [(self.ids[label], float(1 - distance)) for label, distance in zip(labels[0], distances[0])]
+
+
+def make_index(dim: int, backend: str = 'auto'):
+    """'hnsw', 'numpy', or 'auto' (hnswlib when installed)"""
+    if backend in ('auto', 'hnsw'):
+        try:
+            return HnswIndex(dim)
+        except ImportError:
+            if backend == 'hnsw':
+                print("hnswlib is not installed; using exact NumPy search")
+    return NumpyIndex(dim)
+
+
+# Matcher
+
+class SemanticMatcher:
+    """Aligns job requirements with resume evidence and searches stored job descriptions"""
+
+    def __init__(self, embedder=None, cache: Optional[EmbeddingCache] = None, index_path: Optional[str] = None,
+                 index_backend: str = 'auto'):
+        self.embedder = embedder or HashingEmbedder()
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.index_path = index_path
+        self.index_backend = index_backend
+        self.index = make_index(self.embedder.dim, index_backend)
+        self.jobs = {}  # job_id -> requirement statements
+        self._lock = threading.Lock()
+        self._seq = 0  # newest store row already in the index
+        if index_path:
+            self._init_store()
+            self._sync()
+
+    @timed('embedding')
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Unit vectors for the texts, reusing cached ones"""
+        if not texts:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        keys = [EmbeddingCache.key(self.embedder.model_id, text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        metrics.increment('embedding_cache', len(texts) - len(missing), result="hit")
+        metrics.increment('embedding_cache', len(missing), result="miss")
+        if missing:
+            computed = dict(zip(missing, self.embedder.embed(list(missing.values()))))
+            self.cache.set_many(computed)
+            found.update(computed)
+        return np.vstack([found[key] for key in keys])
+
+    @staticmethod
+    def _centroid(vectors: np.ndarray) -> np.ndarray:
+        centroid = vectors.mean(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+        norm = np.linalg.norm(centroid)
+        return (centroid / norm if norm > 0 else centroid).astype(np.float32)
+
+    def align(self, resume_text: str, job_description: str, top_k: int = 3) -> Dict:
+        """Requirement-to-evidence alignments, best-supported requirements first
+
+        Each requirement is 'met', 'partial' or 'missing' depending on its
+        closest resume segment; the score counts partial matches as half.
+        """
+        requirements = split_requirements(job_description)
+        evidence = split_segments(resume_text)
+        if not requirements:
+            return {'score': 0, 'alignments': [], 'met': [], 'partial': [], 'missing': [], 'model': self.embedder.model_id}
+
+        requirement_vectors = self.embed(requirements)
+        evidence_vectors = self.embed([text for _, text in evidence])
+        similarity = requirement_vectors @ evidence_vectors.T  # requirements x evidence
+
+        alignments = []
+        for i, requirement in enumerate(requirements):
+            ranked = np.argsort(-similarity[i])[:top_k] if evidence else []
+            best = float(similarity[i, ranked[0]]) if len(ranked) else 0.0
+            if best >= self.embedder.match_threshold:
+                status = 'met'
+            elif best >= self.embedder.partial_threshold:
+                status = 'partial'
+            else:
+                status = 'missing'
+            alignments.append({
+                'requirement': requirement,
+                'status': status,
+                'similarity': round(best, 3),
+                'evidence': [{'text': evidence[j][1], 'section': evidence[j][0], 'similarity': round(float(similarity[i, j]), 3)}
+                             for j in ranked],
+            })
+        alignments.sort(key=lambda alignment: alignment['similarity'], reverse=True)
+
+        by_status = {status: [a['requirement'] for a in alignments if a['status'] == status]
+                     for status in ('met', 'partial', 'missing')}
+        score = 100 * (len(by_status['met']) + 0.5 * len(by_status['partial'])) / len(requirements)
+        return {'score': round(score, 1), 'alignments': alignments, **by_status, 'model': self.embedder.model_id}
+
+    def add_jobs(self, jobs: Dict[str, str]) -> int:
+        """Embed and store job descriptions (replacing ones with the same ID); returns the store size"""
+        requirements = {job_id: split_requirements(text) or [text] for job_id, text in jobs.items()}
+        self._add(requirements)
+        self._sync()
+        return len(self.jobs)
+
+    def _add(self, requirements: Dict[str, List[str]]):
+        if not requirements:
+            return
+        vectors = np.vstack([self._centroid(self.embed(statements)) for statements in requirements.values()])
+        if self.index_path:
+            self._store(requirements, vectors)
+        with self._lock:
+            self.index.add(list(requirements), vectors)
+            self.jobs.update(requirements)
+
+    @timed('semantic_search')
+    def search(self, resume_text: str, k: int = 10) -> List[Dict]:
+        """The k stored jobs closest to the resume, most similar first"""
+        self._sync()
+        evidence = [text for _, text in split_segments(resume_text)] or [resume_text]
+        query = self._centroid(self.embed(evidence))
+        with self._lock:
+            hits = self.index.search(query, k)
+        return [{'job_id': job_id, 'similarity': round(score, 4)} for job_id, score in hits]
+
+    def stats(self) -> Dict:
+        self._sync()
+        return {'jobs': len(self.jobs), 'model': self.embedder.model_id, 'index': type(self.index).__name__,
+                'cache': self.cache.stats()}
+
+    # Persistence: one SQLite table shared by every process given the same
+    # index_path (API workers, batch runs). Each write gets the next sequence
+    # number; before searching, a process pulls only rows newer than the last
+    # one it has seen, so jobs indexed by another worker show up and no write
+    # ever rewrites the whole store.
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_store(self):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_jobs (job_id TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                "requirements TEXT NOT NULL, vector BLOB NOT NULL, seq INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS semantic_jobs_seq ON semantic_jobs (seq)")
+
+    def _store(self, requirements: Dict[str, List[str]], vectors: np.ndarray):
+        try:
+            with self._connect() as conn:
+                # The sequence number is taken inside the write, so concurrent writers never share one
+                conn.executemany(
+                    "INSERT OR REPLACE INTO semantic_jobs (job_id, model, requirements, vector, seq) "
+                    "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM semantic_jobs))",
+                    [(job_id, self.embedder.model_id, json.dumps(statements), vector.astype(np.float32).tobytes())
+                     for (job_id, statements), vector in zip(requirements.items(), vectors)]
+                )
+        except sqlite3.Error as e:
+            print(f"Could not save semantic job index: {e}")
+
+    def _sync(self):
+        """Load rows written since the last sync (by this or any other process)"""
+        if not self.index_path:
+            return
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT job_id, model, requirements, vector, seq FROM semantic_jobs WHERE seq > ? ORDER BY seq",
+                    (self._seq,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not load semantic job index: {e}")
+            return
+        if not rows:
+            return
+
+        current = [row for row in rows if row[1] == self.embedder.model_id]
+        stale = {row[0]: json.loads(row[2]) for row in rows if row[1] != self.embedder.model_id}
+        with self._lock:
+            if current:
+                self.index.add([row[0] for row in current],
+                               np.vstack([np.frombuffer(row[3], dtype=np.float32) for row in current]))
+                self.jobs.update((row[0], json.loads(row[2])) for row in current)
+            self._seq = max(self._seq, rows[-1][4])
+        if stale:
+            print(f"Re-embedding {len(stale)} stored jobs with {self.embedder.model_id}")
+            self._add(stale)
+
+
+def embedder_from_env():
+    """SEMANTIC_EMBEDDING_MODEL names a local sentence-transformers model; unset means the hashing embedder"""
+    model_name = os.getenv('SEMANTIC_EMBEDDING_MODEL')
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"Could not load embedding model {model_name}, using hashing embedder: {e}")
+    return HashingEmbedder()
+
+
+def semantic_matcher_from_env() -> SemanticMatcher:
+    """Matcher configured from SEMANTIC_* / EMBEDDING_CACHE_PATH environment variables"""
+    return SemanticMatcher(
+        embedder=embedder_from_env(),
+        cache=EmbeddingCache(disk_path=os.getenv('EMBEDDING_CACHE_PATH') or None,
+                             max_disk_entries=int(os.getenv('EMBEDDING_CACHE_MAX_DISK_ENTRIES', '50000'))),
+        index_path=os.getenv('SEMANTIC_INDEX_PATH') or None,
+        index_backend=os.getenv('SEMANTIC_INDEX_BACKEND', 'auto'),
+    )
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional
+
+from metrics import timed
+
+TAXONOMY_PATH = os.getenv('SKILL_TAXONOMY_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills_taxonomy.json')
+INDEX_CACHE_PATH = os.getenv('SKILL_INDEX_CACHE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'skill_index.json')
+
+# Bump when the serialized index layout changes; changes to the code that builds the
+# index are picked up through BUILDER_HASH
+INDEX_FORMAT = 2
+
+with open(__file__, 'rb') as _source:
+    BUILDER_HASH = hashlib.sha256(_source.read()).hexdigest()
+
+# A skill must not be glued to surrounding letters ("AI" in "maintain",
+# "Java" in "JavaScript"); trailing digits are allowed for "HTML5", "Python3"
+_LEFT_BOUNDARY = r'(?<![\w.+#])'
+_RIGHT_BOUNDARY = r'(?![A-Za-z+#]|\.[A-Za-z])'
+
+# All-caps forms this short ("ML", "AI", "SQL") only match as written, so "500 ml" is not Machine Learning
+ABBREVIATION_MAX_CHARS = 4
+
+
+def _is_abbreviation(phrase: str) -> bool:
+    return phrase.isupper() and len(phrase) <= ABBREVIATION_MAX_CHARS and ' ' not in phrase
+
+
+def _build_trie(phrases: Iterable[str]) -> Dict:
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Render a character trie as a prefix-factored regex"""
+    terminal = '' in node
+    branches = [
+        (r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child)
+        for char, child in sorted(node.items()) if char != ''
+    ]
+    if not branches:
+        return ''
+
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if terminal:
+        # Greedy optional group: longest phrase wins, shorter one is the fallback
+        return '(?:' + body + ')?'
+    return body
+
+
+class SkillMatcher:
+    """Finds skills and their aliases in a single regex pass over the text
+
+    Matching ignores case, except for short all-caps abbreviations. The
+    regex is compiled on first use, so loading a cached index is cheap.
+    """
+
+    def __init__(self, skills: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.skills = list(dict.fromkeys(skills))
+        self._order = {skill: i for i, skill in enumerate(self.skills)}
+
+        # Normalized surface form -> canonical skill
+        self._lookup = {}
+        abbreviations = set()
+        forms = [(skill, skill) for skill in self.skills]
+        forms += [(alias, skill) for alias, skill in (aliases or {}).items() if skill in self._order]
+        for form, skill in forms:
+            key = self._normalize(form)
+            if key in self._lookup:
+                continue
+            self._lookup[key] = skill
+            if _is_abbreviation(form.strip()):
+                abbreviations.add(form.strip())
+
+        # Case-insensitive forms first, so "SQL Server" still beats the exact-case "SQL"
+        pattern = _trie_pattern(_build_trie(key for key in self._lookup if key.upper() not in abbreviations))
+        if abbreviations:
+            pattern += '|(?-i:' + _trie_pattern(_build_trie(abbreviations)) + ')'
+        self.pattern_source = _LEFT_BOUNDARY + '(' + pattern + ')' + _RIGHT_BOUNDARY
+
+    @cached_property
+    def pattern(self) -> re.Pattern:
+        # Compiling dominates build time for large taxonomies and can't be serialized
+        return re.compile(self.pattern_source, re.IGNORECASE)
+
+    @staticmethod
+    def _normalize(phrase: str) -> str:
+        return ' '.join(phrase.lower().split())
+
+    def to_dict(self) -> Dict:
+        """Serializable form of the compiled index"""
+        return {'skills': self.skills, 'lookup': self._lookup, 'pattern': self.pattern_source}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SkillMatcher':
+        """Restore a matcher from to_dict() output without rebuilding the trie"""
+        matcher = cls.__new__(cls)
+        matcher.skills = list(data['skills'])
+        matcher._order = {skill: i for i, skill in enumerate(matcher.skills)}
+        matcher._lookup = dict(data['lookup'])
+        matcher.pattern_source = data['pattern']
+        return matcher
+
+    def find(self, text: str) -> List[Dict]:
+        """Return every skill mention with its canonical name and offsets"""
+        if not text:
+            return []
+        return [
+            {
+                'skill': self._lookup[self._normalize(match.group(1))],
+                'text': match.group(1),
+                'start': match.start(1),
+                'end': match.end(1)
+            }
+            for match in self.pattern.finditer(text)
+        ]
+
+    def extract(self, text: str) -> List[str]:
+        """Return the distinct skills found, in taxonomy order"""
+        found = {match['skill'] for match in self.find(text)}
+        return sorted(found, key=self._order.__getitem__)
+
+
+class SkillTaxonomy:
+    """Skill catalogue with categories, aliases and parent skills plus its compiled matcher"""
+
+    def __init__(self, entries: List[Dict], version=None, matcher: Optional[SkillMatcher] = None):
+        self.version = version
+        self.entries = {entry['name']: entry for entry in entries}
+        self.categories = {name: entry.get('category', 'Other') for name, entry in self.entries.items()}
+        self.parents = {name: list(entry.get('parents', [])) for name, entry in self.entries.items()}
+
+        if matcher is None:
+            aliases = {alias: name for name, entry in self.entries.items() for alias in entry.get('aliases', [])}
+            matcher = SkillMatcher(self.entries, aliases)
+        self.matcher = matcher
+
+    @timed('skill_extraction')
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in the text"""
+        return self.matcher.extract(text)
+
+    def find(self, text: str) -> List[Dict]:
+        """Skill mentions with offsets"""
+        return self.matcher.find(text)
+
+    def category_of(self, skill: str) -> str:
+        return self.categories.get(skill, 'Other')
+
+    def group_by_category(self, skills: Iterable[str]) -> Dict[str, List[str]]:
+        """Bucket skills by taxonomy category, preserving order"""
+        grouped = {}
+        for skill in skills:
+            grouped.setdefault(self.category_of(skill), []).append(skill)
+        return grouped
+
+    def expand_with_parents(self, skills: Iterable[str]) -> List[str]:
+        """Add implied parent skills (e.g. Django implies Python)"""
+        expanded = list(dict.fromkeys(skills))
+        seen = set(expanded)
+        i = 0
+        while i < len(expanded):
+            for parent in self.parents.get(expanded[i], []):
+                if parent not in seen:
+                    seen.add(parent)
+                    expanded.append(parent)
+            i += 1
+        return expanded
+
+
+def load_taxonomy(path: str = TAXONOMY_PATH, cache_path: Optional[str] = INDEX_CACHE_PATH) -> SkillTaxonomy:
+    """Load a JSON taxonomy, reusing the serialized index when the file is unchanged"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    source_hash = hashlib.sha256(raw).hexdigest()
+
+    if cache_path:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get('format') == INDEX_FORMAT and cached.get('source_hash') == source_hash
+                    and cached.get('builder_hash') == BUILDER_HASH):
+                return SkillTaxonomy(data['skills'], data.get('version'), SkillMatcher.from_dict(cached['matcher']))
+        except (OSError, ValueError, KeyError):
+            pass
+
+    taxonomy = SkillTaxonomy(data['skills'], data.get('version'))
+
+    if cache_path:
+        tmp_path = None
+        try:
+            cache_dir = os.path.dirname(os.path.abspath(cache_path))
+            os.makedirs(cache_dir, exist_ok=True)
+            # A unique temp file per writer, so concurrent processes never interleave
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'format': INDEX_FORMAT, 'source_hash': source_hash, 'builder_hash': BUILDER_HASH,
+                           'version': taxonomy.version, 'matcher': taxonomy.matcher.to_dict()}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not write skill index cache: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    return taxonomy
+
+
+default_taxonomy = load_taxonomy()
+default_matcher = default_taxonomy.matcher